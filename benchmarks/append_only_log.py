@@ -0,0 +1,95 @@
+"""
+Benchmark of AppendOnlyLogStorage against a naive file-per-entry DBStorage.
+
+Run with:
+
+    python -m benchmarks.append_only_log --entries 100000
+"""
+import argparse
+import bisect
+import os
+import pickle
+import tempfile
+import time
+import typing as tp
+
+from satella.coding.structures import DBStorage, AppendOnlyLogStorage
+
+
+class NaiveDBStorage(DBStorage):
+    """Keeps every entry in a separate pickle file, and all the keys in memory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = []
+
+    def _path_for(self, key) -> str:
+        return os.path.join(self.path, '%020d' % (key,))
+
+    def put(self, key, value) -> None:
+        with open(self._path_for(key), 'wb') as f_out:
+            pickle.dump(value, f_out)
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        self.keys.append(key)
+
+    def iterate(self, starting_key):
+        index = 0 if starting_key is None else bisect.bisect_left(self.keys, starting_key)
+        for key in self.keys[index:]:
+            with open(self._path_for(key), 'rb') as f_in:
+                yield key, pickle.load(f_in)
+
+    def delete(self, key) -> None:
+        os.unlink(self._path_for(key))
+        del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def on_change_start_entry(self, start_entry) -> None:
+        pass
+
+    def on_change_stop_entry(self, stop_entry) -> None:
+        pass
+
+    def on_change_synced_up_to(self, synced_up_to) -> None:
+        pass
+
+
+def bench(name: str, fun: tp.Callable[[], tp.Any]) -> None:
+    started = time.monotonic()
+    fun()
+    print('  %s: %.3f s' % (name, time.monotonic() - started))
+
+
+def run(storage: DBStorage, entries: int, batch: int) -> None:
+    items = [(key, {'value': key * 1.5, 'tag': 'sensor'}) for key in range(entries)]
+
+    def write():
+        for i in range(0, entries, batch):
+            storage.put_many(items[i:i + batch])
+
+    bench('write in batches of %s' % (batch,), write)
+    bench('read everything', lambda: sum(1 for _ in storage.iterate(None)))
+    bench('read 1000 entries from the middle, 100 times',
+          lambda: [sum(1 for _, _ in zip(range(1000), storage.iterate(key)))
+                   for key in range(0, entries, entries // 100)])
+    bench('delete the older half', lambda: storage.delete_range(0, entries // 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--entries', type=int, default=100000, help='amount of entries')
+    parser.add_argument('--batch', type=int, default=1000, help='entries per put_many')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        print('AppendOnlyLogStorage')
+        storage = AppendOnlyLogStorage(path)
+        run(storage, args.entries, args.batch)
+        storage.close()
+
+    with tempfile.TemporaryDirectory() as path:
+        print('NaiveDBStorage')
+        run(NaiveDBStorage(path), args.entries, args.batch)
+
+
+if __name__ == '__main__':
+    main()
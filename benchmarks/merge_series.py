@@ -0,0 +1,53 @@
+"""
+Throughput benchmark for merge_series and resample_series.
+
+Series are generated lazily, so memory use does not depend on their length.
+
+Run with:
+
+    python -m benchmarks.merge_series --series 500 --points 1000000
+"""
+import argparse
+import itertools
+import random
+import time
+
+from satella.coding.transforms import merge_series, resample_series
+
+
+def make_series(points: int, seed: int):
+    rnd = random.Random(seed)
+    ts = 0.0
+    for _ in range(points):
+        ts += rnd.uniform(0.5, 1.5)
+        yield ts, rnd.random()
+
+
+def bench(name: str, iterator, rows: int) -> None:
+    started = time.monotonic()
+    count = sum(1 for _ in itertools.islice(iterator, rows))
+    elapsed = time.monotonic() - started
+    print('%s: %s rows in %.2f s, %.0f rows/s' % (name, count, elapsed, count / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--series', type=int, default=500, help='amount of series')
+    parser.add_argument('--points', type=int, default=1000000, help='points per series')
+    parser.add_argument('--rows', type=int, default=None,
+                        help='stop after that many output rows. Default is to merge everything')
+    args = parser.parse_args()
+    rows = args.rows
+
+    bench('merge_series',
+          merge_series(*(make_series(args.points, i) for i in range(args.series))), rows)
+    bench('resample_series',
+          resample_series(*(make_series(args.points, i) for i in range(args.series)),
+                          interval=1.0), rows)
+    bench('resample_series(interpolate=True)',
+          resample_series(*(make_series(args.points, i) for i in range(args.series)),
+                          interval=1.0, interpolate=True), rows)
+
+
+if __name__ == '__main__':
+    main()
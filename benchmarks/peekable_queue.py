@@ -0,0 +1,71 @@
+"""
+Throughput benchmark of PeekableQueue against queue.Queue.
+
+Run with:
+
+    python -m benchmarks.peekable_queue --items 200000 --batch 100
+"""
+import argparse
+import queue
+import threading
+import time
+import typing as tp
+
+from satella.coding.concurrent import PeekableQueue
+
+
+def bench(name: str, items: int, producer: tp.Callable[[], None],
+          consumer: tp.Callable[[], None]) -> None:
+    started = time.monotonic()
+    threads = [threading.Thread(target=producer), threading.Thread(target=consumer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    print('%s: %.3f s, %.0f items/s' % (name, elapsed, items / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--items', type=int, default=200000, help='amount of items to pass')
+    parser.add_argument('--batch', type=int, default=100, help='items per batch')
+    parser.add_argument('--maxsize', type=int, default=1000, help='maximum size of the queue')
+    args = parser.parse_args()
+    items, batch = args.items, args.batch
+
+    q = queue.Queue(args.maxsize)
+
+    def consume_one(get):
+        def consumer():
+            for _ in range(items):
+                get()
+        return consumer
+
+    def produce_one(put):
+        def producer():
+            for i in range(items):
+                put(i)
+        return producer
+
+    bench('queue.Queue, one at a time', items, produce_one(q.put), consume_one(q.get))
+
+    pq = PeekableQueue(args.maxsize)
+    bench('PeekableQueue, one at a time', items, produce_one(pq.put), consume_one(pq.get))
+
+    pq = PeekableQueue(args.maxsize)
+
+    def producer():
+        for i in range(0, items, batch):
+            pq.put_many(range(i, min(i + batch, items)))
+
+    def consumer():
+        received = 0
+        while received < items:
+            received += len(pq.get_many(batch))
+
+    bench('PeekableQueue, batches of %s' % (batch,), items, producer, consumer)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Read throughput of RWMonitor against Monitor, as the amount of reader threads grows.
+
+Every read hashes a buffer while holding the lock. hashlib releases the GIL while doing so,
+so readers that don't exclude each other can actually run in parallel. A single writer
+changes the structure every --write-interval seconds.
+
+Run with:
+
+    python -m benchmarks.rw_monitor --duration 2 --threads 1 2 4 8
+"""
+import argparse
+import hashlib
+import threading
+import time
+import typing as tp
+
+from satella.coding.concurrent import Monitor, RWMonitor
+
+
+class MonitorTable(Monitor):
+    def __init__(self, data: bytes):
+        super().__init__()
+        self.data = data
+
+    @Monitor.synchronized
+    def read(self) -> bytes:
+        return hashlib.sha256(self.data).digest()
+
+    @Monitor.synchronized
+    def write(self, data: bytes) -> None:
+        self.data = data
+
+
+class RWMonitorTable(RWMonitor):
+    def __init__(self, data: bytes):
+        super().__init__()
+        self.data = data
+
+    @RWMonitor.synchronized_read
+    def read(self) -> bytes:
+        return hashlib.sha256(self.data).digest()
+
+    @RWMonitor.synchronized_write
+    def write(self, data: bytes) -> None:
+        self.data = data
+
+
+def bench(table: tp.Union[MonitorTable, RWMonitorTable], threads: int, duration: float,
+          write_interval: float) -> float:
+    reads = [0] * threads
+    stop = threading.Event()
+
+    def reader(no: int) -> None:
+        while not stop.is_set():
+            table.read()
+            reads[no] += 1
+
+    def writer() -> None:
+        while not stop.wait(write_interval):
+            table.write(bytes(len(table.data)))
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(reads) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--duration', type=float, default=2, help='seconds per measurement')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='amounts of reader threads to try')
+    parser.add_argument('--size', type=int, default=256 * 1024, help='bytes hashed per read')
+    parser.add_argument('--write-interval', type=float, default=0.1,
+                        help='seconds between writes')
+    args = parser.parse_args()
+
+    for threads in args.threads:
+        for name, table_class in (('Monitor', MonitorTable), ('RWMonitor', RWMonitorTable)):
+            table = table_class(bytes(args.size))
+            rate = bench(table, threads, args.duration, args.write_interval)
+            print('%s, %d threads: %.0f reads/s' % (name, threads, rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark of SyncableDroppable.on_sync_request against a large DB.
+
+The fake DBStorage generates its rows on the fly, so it does not take any memory itself.
+Peak memory is measured with tracemalloc.
+
+Run with:
+
+    python -m benchmarks.syncable_droppable --rows 50000000 --batch 1000
+"""
+import argparse
+import time
+import tracemalloc
+import typing as tp
+
+from satella.coding.structures import DBStorage, SyncableDroppable
+
+
+class FakeDBStorage(DBStorage):
+    """A DB with keys 0, 1, ..., rows-1, each with a value of it's key"""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+
+    def iterate(self, starting_key):
+        return ((key, key) for key in range(starting_key or 0, self.rows))
+
+    def put(self, key, value) -> None:
+        raise NotImplementedError('read-only DB')
+
+    def delete(self, key) -> None:
+        raise NotImplementedError('read-only DB')
+
+    def on_change_start_entry(self, start_entry) -> None:
+        pass
+
+    def on_change_stop_entry(self, stop_entry) -> None:
+        pass
+
+    def on_change_synced_up_to(self, synced_up_to) -> None:
+        pass
+
+
+def bench(name: str, fun: tp.Callable[[], tp.Any]) -> None:
+    tracemalloc.start()
+    started = time.monotonic()
+    fun()
+    elapsed = time.monotonic() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('%s: %.4f s, peak memory %.1f kB' % (name, elapsed, peak / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=50000000, help='amount of rows in the DB')
+    parser.add_argument('--batch', type=int, default=1000, help='maximum entries to sync')
+    parser.add_argument('--memory', type=int, default=1000, help='amount of rows in memory')
+    args = parser.parse_args()
+
+    db = FakeDBStorage(args.rows)
+    sd = SyncableDroppable(db, 0, args.rows - 1, None, 2 * args.memory, 4 * args.memory)
+    for key in range(args.rows, args.rows + args.memory):
+        sd.on_new_data(key, key)
+
+    bench('first batch, nothing synced yet',
+          lambda: list(sd.on_sync_request(args.batch)))
+    sd.on_synced_up_to(args.rows // 2)
+    bench('batch from the middle of the DB',
+          lambda: list(sd.on_sync_request(args.batch)))
+    sd.on_synced_up_to(args.rows + args.memory // 2)
+    bench('batch from memory',
+          lambda: list(sd.on_sync_request(args.batch)))
+
+    def page_through():
+        after = None
+        for _ in range(100):
+            page = list(sd.on_sync_request(args.batch, after=after))
+            after = page[-1][0]
+
+    sd.on_synced_up_to(None)
+    bench('100 pages with paging tokens', page_through)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,20 @@
-from .atomic import AtomicNumber
+from .atomic import AtomicNumber, StripedAtomicNumber
+from .batcher import Batcher
 from .callablegroup import CallableGroup, CallNoOftenThan, CancellableCallback
+from .concurrent_dict import ConcurrentDict
+from .executors import BoundedThreadPoolExecutor, PriorityThreadPoolExecutor, \
+    get_shared_executor, set_shared_executor
 from .functions import parallel_execute, run_as_future
 from .futures import Future, WrappingFuture, InvalidStateError
 from .id_allocator import IDAllocator, SequentialIssuer
+from .lock_profiler import enable_lock_profiling, disable_lock_profiling, \
+    get_top_contended_locks, LockSiteStats
 from .locked_dataset import LockedDataset
-from .locked_structure import LockedStructure
-from .monitor import MonitorList, Monitor, MonitorDict, RMonitor
+from .locked_structure import LockedStructure, RWLockedStructure
+from .monitor import MonitorList, Monitor, MonitorDict, RMonitor, ReadWriteLock, RWMonitor, \
+    RWMonitorDict
+from .scheduler import PeriodicScheduler, ScheduledJob, get_shared_scheduler, \
+    set_shared_scheduler
 from .sync import sync_threadpool
 from .thread import TerminableThread, Condition, SingleStartThread, call_in_separate_thread, \
     BogusTerminableThread, IntervalTerminableThread
@@ -19,4 +28,9 @@ __all__ = ['LockedDataset', 'Monitor', 'RMonitor', 'CallableGroup', 'TerminableT
            'sync_threadpool', 'IntervalTerminableThread', 'Future',
            'WrappingFuture', 'InvalidStateError', 'PeekableQueue',
            'CancellableCallback',
-           'SequentialIssuer']
+           'SequentialIssuer', 'StripedAtomicNumber', 'ReadWriteLock', 'RWMonitor',
+           'RWMonitorDict', 'RWLockedStructure', 'ConcurrentDict',
+           'BoundedThreadPoolExecutor', 'get_shared_executor', 'set_shared_executor',
+           'PriorityThreadPoolExecutor', 'Batcher', 'PeriodicScheduler', 'ScheduledJob',
+           'get_shared_scheduler', 'set_shared_scheduler', 'enable_lock_profiling',
+           'disable_lock_profiling', 'get_top_contended_locks', 'LockSiteStats']
@@ -1,3 +1,4 @@
+import threading
 import typing as tp
 
 from .monitor import Monitor
@@ -280,3 +281,143 @@ class AtomicNumber(Monitor):
                 with Monitor.acquire(self):
                     if self.value != v:
                         raise WouldWaitMore()
+
+
+class StripedAtomicNumber:
+    """
+    An atomic number meant to be changed often from many threads, and read rarely, such as a hot
+    counter. Akin to Java's LongAdder.
+
+    Every thread adds to it's own cell, without taking any lock. Reading the value sums all of
+    the cells, so it is more expensive than in :class:`AtomicNumber`. Cells of threads that have
+    terminated are folded into a single value on read, and as new threads add their cells, so
+    that short-lived threads don't pile them up even if the value is never read.
+
+    >>> a = StripedAtomicNumber()
+    >>> a += 2
+    >>> a.value
+    2
+
+    Only addition and subtraction are supported.
+
+    You can wait for the value to meet a condition with :meth:`wait_until`. Changing the value
+    notifies the waiters only if there are any, so it costs nothing more if nobody waits.
+
+    :param v: initial value
+    """
+    __slots__ = ('_base', '_cells', '_local', '_lock', '_condition', '_watchers', '_fold_at')
+
+    def __init__(self, v: Number = 0):
+        self._base = v
+        self._cells = []  # type: tp.List[tp.Tuple[threading.Thread, tp.List[Number]]]
+        # amount of cells at which the cells of terminated threads will be folded
+        self._fold_at = 16
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(threading.Lock())
+        self._watchers = 0
+
+    def _new_cell(self) -> tp.List[Number]:
+        cell = [0]
+        with self._lock:
+            if len(self._cells) >= self._fold_at:
+                self._fold()
+                self._fold_at = max(2 * len(self._cells), 16)
+            self._cells.append((threading.current_thread(), cell))
+        self._local.cell = cell
+        return cell
+
+    def add(self, v: Number) -> None:
+        """
+        Add v to this number
+        """
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+        cell[0] += v
+        if self._watchers:
+            with self._condition:
+                self._condition.notify_all()
+
+    def __iadd__(self, other: Number) -> 'StripedAtomicNumber':
+        self.add(other)
+        return self
+
+    def __isub__(self, other: Number) -> 'StripedAtomicNumber':
+        self.add(-other)
+        return self
+
+    def _fold(self) -> None:
+        """Fold cells of terminated threads into the base. Must be called with the lock held"""
+        alive_cells = []
+        for thread, cell in self._cells:
+            if thread.is_alive():
+                alive_cells.append((thread, cell))
+            else:
+                self._base += cell[0]
+        self._cells = alive_cells
+
+    def _sum(self) -> Number:
+        """Must be called with the lock held"""
+        self._fold()
+        return self._base + sum(cell[0] for _, cell in self._cells)
+
+    @property
+    def value(self) -> Number:
+        """
+        Current value of this number. Additions that happen concurrently with this call may or
+        may not be accounted for.
+        """
+        with self._lock:
+            return self._sum()
+
+    def sum_then_reset(self) -> Number:
+        """
+        Return current value and reset it to zero.
+
+        No addition will be lost, each of the concurrent additions will be accounted for either
+        in the returned value or in the new one.
+        """
+        with self._lock:
+            value = self._sum()
+            self._base -= value
+            return value
+
+    def wait_until(self, predicate: tp.Callable[[Number], bool],
+                   timeout: tp.Optional[float] = None) -> Number:
+        """
+        Wait until predicate called with the value of this number returns True.
+
+        :param predicate: a callable that accepts the value of this number
+        :param timeout: maximum time to wait. None means wait indefinitely
+        :return: value for which predicate returned True
+        :raises WouldWaitMore: predicate didn't become True within the timeout
+        """
+        with self._condition:
+            self._watchers += 1
+            try:
+                with measure(timeout=timeout) as measurement:
+                    while True:
+                        value = self.value
+                        if predicate(value):
+                            return value
+                        measurement.assert_not_timeouted()
+                        self._condition.wait(measurement.time_remaining)
+            finally:
+                self._watchers -= 1
+
+    def __int__(self) -> int:
+        return int(self.value)
+
+    def __float__(self) -> float:
+        return float(self.value)
+
+    def __eq__(self, other: Number) -> bool:
+        return self.value == other
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+    def __repr__(self) -> str:
+        return 'StripedAtomicNumber(%s)' % (self.value,)
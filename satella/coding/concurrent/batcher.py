@@ -0,0 +1,190 @@
+import collections
+import threading
+import time
+import typing as tp
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from satella.coding.typing import T, U
+from .futures import Future
+
+
+class Batcher(tp.Generic[T, U]):
+    """
+    Collects single items submitted from many threads into batches, passes every batch in a
+    single call to batch_fn, and then resolves every item's future with it's own result.
+
+    A batch is dispatched as soon as it has max_batch_size items, or when it's oldest item waited
+    for max_latency seconds, whichever comes first. If max_concurrent_batches batches are already
+    being processed, the items keep being collected until a batch finishes, so batches grow under
+    load.
+
+    batch_fn must return a list of results, one for each item, in the same order. If it raises,
+    or returns a list of the wrong length, the futures of all items in the batch will raise it.
+    The same happens if the executor refuses to accept the batch.
+
+    >>> def fetch_users(ids: tp.List[int]) -> tp.List[User]:
+    >>>     return db.query(User).filter(User.id.in_(ids)).order_by_list(ids)
+    >>> batcher = Batcher(fetch_users, max_batch_size=100, max_latency=0.005)
+    >>> user = batcher(5)
+
+    Since calling it blocks until the result is available, it can serve as value getter of
+    :class:`~satella.coding.structures.CacheDict` or
+    :class:`~satella.coding.structures.ExclusiveWritebackCache`.
+
+    Metrics are duck-typed, any object with a method runtime(value) will do, such as satella's
+    metrics.
+
+    :param batch_fn: a callable that accepts a list of items and returns a list of results
+    :param max_batch_size: maximum amount of items in a batch
+    :param max_latency: maximum amount of seconds that an item waits for it's batch to be
+        dispatched
+    :param max_concurrent_batches: maximum amount of batch_fn calls in progress at once
+    :param executor: executor to call batch_fn in. By default a thread pool of
+        max_concurrent_batches threads is created.
+    :param batch_size_metric: a metric to which the size of every batch will be reported
+    :param latency_metric: a metric to which, for every batch, time from submission of it's
+        oldest item until the results were available will be reported
+    """
+    __slots__ = ('batch_fn', 'max_batch_size', 'max_latency', 'max_concurrent_batches',
+                 'executor', 'batch_size_metric', 'latency_metric', '_pending', '_condition',
+                 '_slots', '_dispatcher', '_closed', '_owns_executor')
+
+    def __init__(self, batch_fn: tp.Callable[[tp.List[T]], tp.List[U]],
+                 max_batch_size: int = 100,
+                 max_latency: float = 0.005,
+                 max_concurrent_batches: int = 1,
+                 executor: tp.Optional[Executor] = None,
+                 batch_size_metric=None,
+                 latency_metric=None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_concurrent_batches = max_concurrent_batches
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_concurrent_batches)
+        self.batch_size_metric = batch_size_metric
+        self.latency_metric = latency_metric
+        # (item, it's future, time of submission)
+        self._pending = collections.deque()  # type: tp.Deque[tp.Tuple[T, Future, float]]
+        self._condition = threading.Condition(threading.Lock())
+        self._slots = threading.Semaphore(max_concurrent_batches)
+        self._dispatcher = None  # type: tp.Optional[threading.Thread]
+        self._closed = False
+
+    def submit(self, item: T) -> Future:
+        """
+        Submit an item to be processed in the next batch.
+
+        :return: a future that will be completed with the result for this item
+        :raises RuntimeError: the batcher was closed
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('The batcher was closed')
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, daemon=True,
+                                                    name='Batcher dispatcher')
+                self._dispatcher.start()
+            self._pending.append((item, future, time.monotonic()))
+            if len(self._pending) == 1 or len(self._pending) == self.max_batch_size:
+                self._condition.notify()
+        return future
+
+    def __call__(self, item: T, timeout: tp.Optional[float] = None) -> U:
+        """
+        Submit an item and wait for it's result.
+
+        :param timeout: maximum time to wait
+        :raises TimeoutError: the result was not available in time
+        """
+        return self.submit(item).result(timeout)
+
+    def _wait_for_batch(self) -> bool:
+        """
+        Wait until a batch should be dispatched. Must be called with the lock held.
+
+        :return: False if the batcher was closed and there's nothing left to dispatch
+        """
+        while True:
+            if not self._pending:
+                if self._closed:
+                    return False
+                self._condition.wait()
+                continue
+            if self._closed or len(self._pending) >= self.max_batch_size:
+                return True
+            remaining = self._pending[0][2] + self.max_latency - time.monotonic()
+            if remaining <= 0:
+                return True
+            self._condition.wait(remaining)
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._condition:
+                if not self._wait_for_batch():
+                    return
+            # wait for a free slot without the lock, so that items can be collected meanwhile
+            self._slots.acquire()
+            with self._condition:
+                batch_length = min(len(self._pending), self.max_batch_size)
+                batch = [self._pending.popleft() for _ in range(batch_length)]
+            try:
+                self.executor.submit(self._run_batch, batch)
+            except Exception as e:     # eg. the executor was shut down or is full
+                self._slots.release()
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+    def _run_batch(self, batch: tp.List[tp.Tuple[T, Future, float]]) -> None:
+        try:
+            if self.batch_size_metric is not None:
+                self.batch_size_metric.runtime(len(batch))
+            try:
+                results = self.batch_fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError('batch_fn returned %s results for %s items' % (
+                        len(results), len(batch)))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for index, (_, future, _) in enumerate(batch):
+                    future.add_pre_done_callback(_result_extractor(index))
+                    future.set_result(results)
+            if self.latency_metric is not None:
+                self.latency_metric.runtime(time.monotonic() - batch[0][2])
+        finally:
+            self._slots.release()
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Dispatch the items that were already submitted, and stop accepting new ones.
+
+        The executor will be shut down, unless it was given by the user.
+
+        :param wait: whether to wait until all of them are processed
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            dispatcher = self._dispatcher
+        if not wait:
+            return
+        if dispatcher is not None:
+            dispatcher.join()
+        # wait for the batches in progress to finish
+        for _ in range(self.max_concurrent_batches):
+            self._slots.acquire()
+        for _ in range(self.max_concurrent_batches):
+            self._slots.release()
+        if self._owns_executor:
+            self.executor.shutdown()
+
+
+def _result_extractor(index: int) -> tp.Callable[[Future], None]:
+    def extract(future: Future) -> None:
+        if future.exception(None) is None:
+            future.set_result(future.result()[index])
+    return extract
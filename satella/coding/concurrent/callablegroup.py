@@ -1,11 +1,11 @@
 import collections
-import copy
-import weakref
 import time
 import typing as tp
+from concurrent.futures import Executor, wait
 
 from satella.coding.deleters import DictDeleter
 from satella.coding.typing import T, NoArgCallable
+from satella.exceptions import WouldWaitMore
 
 
 class CancellableCallback:
@@ -64,23 +64,41 @@ class CallableGroup(tp.Generic[T]):
     Now both foo and bar will be called with arguments (2, 3). Their exceptions
     will be propagated.
 
+    If an executor is given, the callables will be submitted to it all at once, so that a slow
+    one doesn't delay the others, and the call will wait for all of them to complete. In that
+    case, if any of them raised, the exception of the first one (in order of adding) will be
+    raised after all of them completed. A callable that does not complete within timeout
+    seconds counts as having raised :class:`~satella.exceptions.WouldWaitMore`. It will keep on
+    running in the executor, though.
     """
-    __slots__ = ('callables', 'gather', 'swallow_exceptions',
+    __slots__ = ('callables', 'gather', 'swallow_exceptions', 'executor', 'timeout',
                  '_has_cancellable_callbacks')
 
-    def __init__(self, gather: bool = True, swallow_exceptions: bool = False):
+    def __init__(self, gather: bool = True, swallow_exceptions: bool = False,
+                 executor: tp.Optional[Executor] = None, timeout: tp.Optional[float] = None):
         """
         :param gather: if True, results from all callables will be gathered
                        into a list and returned from __call__
         :param swallow_exceptions: if True, exceptions from callables will be
                                    silently ignored. If gather is set,
                                    result will be the exception instance
+        :param executor: executor to call the callables in parallel in. By default they are
+                         called one after another, in the calling thread.
+        :param timeout: amount of seconds, counted from submitting them to the executor,
+                        that the callables have to complete in. Works only with an executor.
         """
         self.callables = collections.OrderedDict()  # type: tp.Dict[tp.Callable, bool]
         self.gather = gather  # type: bool
         self.swallow_exceptions = swallow_exceptions  # type: bool
+        self.executor = executor  # type: tp.Optional[Executor]
+        self.timeout = timeout  # type: tp.Optional[float]
         self._has_cancellable_callbacks = False
 
+    @staticmethod
+    def _is_cancelled(callable_) -> bool:
+        callable_ = getattr(callable_, '_Proxy__obj')
+        return isinstance(callable_, CancellableCallback) and callable_.cancelled
+
     @property
     def has_cancelled_callbacks(self) -> bool:
         """
@@ -90,21 +108,21 @@ class CallableGroup(tp.Generic[T]):
         """
         if not self._has_cancellable_callbacks:
             return False
-        for clb in self.callables:
-            if isinstance(clb, CancellableCallback) and not clb:
-                return True
-        return False
+        return any(self._is_cancelled(clb) for clb in self.callables)
 
     def remove_cancelled(self) -> None:
         """
-        Remove it's entries that are CancelledCallbacks and that were cancelled
+        Remove it's entries that are CancelledCallbacks and that were cancelled.
+
+        Calling the group removes the cancelled ones as well, so this is needed only for groups
+        that are rarely called.
         """
-        if not self.has_cancelled_callbacks:
+        if not self._has_cancellable_callbacks:
             return
 
         with DictDeleter(self.callables) as dd:
             for callable_ in dd:
-                if isinstance(callable_, CancellableCallback) and not callable_:
+                if self._is_cancelled(callable_):
                     dd.delete()
 
     def add(self, callable_: tp.Union[CancellableCallback, NoArgCallable[T]],
@@ -139,31 +157,51 @@ class CallableGroup(tp.Generic[T]):
 
         :return: list of results if gather was set, else None
         """
-        if self.has_cancelled_callbacks:
-            self.remove_cancelled()
-
-        callables = copy.copy(self.callables)
-        self.callables.clear()
-
-        results = []
-
-        for call, one_shot in callables.items():
-            try:
-                q = call(*args, **kwargs)
-            except Exception as e:
-                if not self.swallow_exceptions:
-                    raise  # re-raise
-                q = e
-
-            if self.gather:
+        callables = []
+        for call, one_shot in list(self.callables.items()):
+            cancelled = self._has_cancellable_callbacks and self._is_cancelled(call)
+            if one_shot or cancelled:
+                del self.callables[call]
+            if not cancelled:
+                callables.append(call)
+
+        if self.executor is not None:
+            results = self._call_in_parallel(callables, args, kwargs)
+        else:
+            results = []
+            for call in callables:
+                try:
+                    q = call(*args, **kwargs)
+                except Exception as e:
+                    if not self.swallow_exceptions:
+                        raise  # re-raise
+                    q = e
                 results.append(q)
 
-            if not one_shot:
-                self.add(call, one_shot)
-
         if self.gather:
             return results
 
+    def _call_in_parallel(self, callables: tp.List[tp.Callable], args, kwargs) -> tp.List:
+        futures = [self.executor.submit(call, *args, **kwargs) for call in callables]
+        wait(futures, timeout=self.timeout)
+        results = []
+        exception = None
+        for future in futures:
+            if not future.done():
+                q = WouldWaitMore('callable did not complete within %s seconds' % (
+                    self.timeout,))
+            elif future.exception() is not None:
+                q = future.exception()
+            else:
+                results.append(future.result())
+                continue
+            if exception is None:
+                exception = q
+            results.append(q)
+        if exception is not None and not self.swallow_exceptions:
+            raise exception
+        return results
+
 
 class CallNoOftenThan:
     """
@@ -0,0 +1,154 @@
+import collections.abc
+import threading
+import typing as tp
+
+from satella.coding.typing import K, V, KVTuple
+
+
+class _ConcurrentItemsView(collections.abc.ItemsView):
+    def __iter__(self) -> tp.Iterator[KVTuple]:
+        return self._mapping.iter_items()
+
+
+class _ConcurrentValuesView(collections.abc.ValuesView):
+    def __iter__(self) -> tp.Iterator[V]:
+        for _, value in self._mapping.iter_items():
+            yield value
+
+
+class ConcurrentDict(collections.abc.MutableMapping, tp.Generic[K, V]):
+    """
+    A thread-safe dictionary, that splits it's keys between a number of stripes, each with it's
+    own lock. Threads that access keys in different stripes won't contend with each other.
+
+    All of the operations on a single key, including :meth:`compute_if_absent` and
+    :meth:`compute_if_present`, are atomic.
+
+    Iteration goes through the stripes one by one, taking a snapshot of every stripe under it's
+    lock. It will thus never fail due to concurrent modification, but keys that are added or
+    removed by other threads during the iteration may or may not show up. The same goes
+    for :meth:`items` and :meth:`values`. :func:`len` is not atomic either.
+
+    :param data: initial data, a mapping or an iterable of (key, value)
+    :param stripes: amount of stripes
+    """
+    __slots__ = ('stripes', '_locks', '_dicts')
+
+    def __init__(self, data: tp.Optional[tp.Union[tp.Mapping[K, V],
+                                                  tp.Iterable[KVTuple]]] = None,
+                 stripes: int = 16):
+        self.stripes = stripes
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._dicts = [{} for _ in range(stripes)]  # type: tp.List[tp.Dict[K, V]]
+        if data is not None:
+            self.update(data)
+
+    def _stripe(self, key: K) -> tp.Tuple[threading.Lock, tp.Dict[K, V]]:
+        index = hash(key) % self.stripes
+        return self._locks[index], self._dicts[index]
+
+    def __getitem__(self, key: K) -> V:
+        lock, dct = self._stripe(key)
+        with lock:
+            return dct[key]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        lock, dct = self._stripe(key)
+        with lock:
+            dct[key] = value
+
+    def __delitem__(self, key: K) -> None:
+        lock, dct = self._stripe(key)
+        with lock:
+            del dct[key]
+
+    def __contains__(self, key: K) -> bool:
+        lock, dct = self._stripe(key)
+        with lock:
+            return key in dct
+
+    def get(self, key: K, default: tp.Optional[V] = None) -> tp.Optional[V]:
+        lock, dct = self._stripe(key)
+        with lock:
+            return dct.get(key, default)
+
+    def setdefault(self, key: K, default: tp.Optional[V] = None) -> tp.Optional[V]:
+        lock, dct = self._stripe(key)
+        with lock:
+            return dct.setdefault(key, default)
+
+    def compute_if_absent(self, key: K, fun: tp.Callable[[K], V]) -> V:
+        """
+        If key is not present, compute it's value with fun and store it. Done atomically.
+
+        Note that fun is called with the stripe's lock held, so it must not access this dictionary.
+
+        :param key: key to look up
+        :param fun: a callable that accepts the key and returns the value for it
+        :return: value present or computed for this key
+        """
+        lock, dct = self._stripe(key)
+        with lock:
+            try:
+                return dct[key]
+            except KeyError:
+                value = dct[key] = fun(key)
+                return value
+
+    def compute_if_present(self, key: K,
+                           fun: tp.Callable[[K, V], tp.Optional[V]]) -> tp.Optional[V]:
+        """
+        If key is present, compute it's new value with fun and store it. If fun returns None,
+        the key will be removed. Done atomically.
+
+        Note that fun is called with the stripe's lock held, so it must not access this dictionary.
+
+        :param key: key to look up
+        :param fun: a callable that accepts the key and it's current value, and returns the
+            new value, or None to remove the key
+        :return: the new value, or None if the key was not present or has been removed
+        """
+        lock, dct = self._stripe(key)
+        with lock:
+            try:
+                value = dct[key]
+            except KeyError:
+                return None
+            value = fun(key, value)
+            if value is None:
+                del dct[key]
+            else:
+                dct[key] = value
+            return value
+
+    def __len__(self) -> int:
+        return sum(len(dct) for dct in self._dicts)
+
+    def __iter__(self) -> tp.Iterator[K]:
+        for lock, dct in zip(self._locks, self._dicts):
+            with lock:
+                keys = list(dct)
+            yield from keys
+
+    def iter_items(self) -> tp.Iterator[KVTuple]:
+        """
+        Iterate over (key, value), taking a snapshot of every stripe in turn
+        """
+        for lock, dct in zip(self._locks, self._dicts):
+            with lock:
+                items = list(dct.items())
+            yield from items
+
+    def items(self) -> tp.ItemsView[K, V]:
+        return _ConcurrentItemsView(self)
+
+    def values(self) -> tp.ValuesView[V]:
+        return _ConcurrentValuesView(self)
+
+    def clear(self) -> None:
+        for lock, dct in zip(self._locks, self._dicts):
+            with lock:
+                dct.clear()
+
+    def __repr__(self) -> str:
+        return 'ConcurrentDict(%s)' % (dict(self.iter_items()),)
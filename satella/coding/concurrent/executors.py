@@ -0,0 +1,330 @@
+import collections
+import heapq
+import itertools
+import threading
+import time
+import typing as tp
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+from ...exceptions import Full
+
+REJECTION_POLICIES = ('raise', 'block', 'caller_runs')
+
+
+class BoundedThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    A thread pool executor with a limit on the amount of tasks waiting for a worker.
+
+    Threads are started lazily, as tasks are submitted, up to max_workers of them.
+
+    If max_queue tasks are already waiting for a worker, submitting another one is handled
+    according to rejection_policy:
+
+    * 'raise' - :class:`~satella.exceptions.Full` is raised
+    * 'block' - submit blocks until there's room in the queue
+    * 'caller_runs' - the task is executed by the thread that submitted it, and a completed
+      future is returned. This naturally slows the submitters down.
+
+    Metrics are duck-typed, any object with a method runtime(value) will do, such as satella's
+    metrics.
+
+    :param max_workers: maximum amount of worker threads, defaults to what ThreadPoolExecutor
+        chooses
+    :param max_queue: maximum amount of tasks waiting for a worker. None means no limit.
+    :param rejection_policy: what to do when the queue is full
+    :param thread_name_prefix: prefix of names of the worker threads
+    :param queue_depth_metric: a metric to which the amount of tasks waiting for a worker will
+        be reported each time it changes
+    :param waiting_time_metric: a metric to which the time each task spent waiting for a worker,
+        in seconds, will be reported
+    :raises ValueError: unknown rejection policy
+    """
+
+    def __init__(self, max_workers: tp.Optional[int] = None, max_queue: tp.Optional[int] = None,
+                 rejection_policy: str = 'raise', thread_name_prefix: str = '',
+                 queue_depth_metric=None, waiting_time_metric=None):
+        if rejection_policy not in REJECTION_POLICIES:
+            raise ValueError('Unknown rejection policy %s' % (rejection_policy,))
+        super().__init__(max_workers)
+        if thread_name_prefix:
+            self._thread_name_prefix = thread_name_prefix
+        self.max_queue = max_queue
+        self.rejection_policy = rejection_policy
+        self.queue_depth_metric = queue_depth_metric
+        self.waiting_time_metric = waiting_time_metric
+        self._slots = None  # type: tp.Optional[threading.Semaphore]
+        if max_queue is not None:
+            self._slots = threading.Semaphore(self._max_workers + max_queue)
+        self._queue_depth = 0
+        self._queue_depth_lock = threading.Lock()
+
+    def get_queue_length(self) -> int:
+        """
+        Return the amount of tasks currently waiting for a worker
+        """
+        return self._queue_depth
+
+    def _change_queue_depth(self, delta: int) -> None:
+        with self._queue_depth_lock:
+            self._queue_depth += delta
+            depth = self._queue_depth
+        if self.queue_depth_metric is not None:
+            self.queue_depth_metric.runtime(depth)
+
+    def _acquire_slot(self) -> bool:
+        """
+        :return: whether a slot was acquired. If not, the task should be ran by the caller.
+        :raises Full: the queue is full and the policy is to raise
+        """
+        if self.rejection_policy == 'block':
+            return self._slots.acquire()
+        if self._slots.acquire(blocking=False):
+            return True
+        if self.rejection_policy == 'raise':
+            raise Full('%s tasks are already waiting' % (self.max_queue,))
+        return False
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Submit a task to the executor.
+
+        :raises Full: the queue is full and the rejection policy is 'raise'
+        """
+        if self._slots is not None and not self._acquire_slot():
+            future = Future()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+            return future
+
+        started = False
+        submitted_at = time.monotonic()
+
+        def run():
+            nonlocal started
+            started = True
+            self._change_queue_depth(-1)
+            if self.waiting_time_metric is not None:
+                self.waiting_time_metric.runtime(time.monotonic() - submitted_at)
+            return fn(*args, **kwargs)
+
+        def on_done(_):
+            if not started:     # it was cancelled
+                self._change_queue_depth(-1)
+            if self._slots is not None:
+                self._slots.release()
+
+        self._change_queue_depth(1)
+        try:
+            future = super().submit(run)
+        except BaseException:
+            on_done(None)
+            raise
+        future.add_done_callback(on_done)
+        return future
+
+
+class _PriorityWorkItem:
+    __slots__ = ('future', 'fn', 'args', 'kwargs', 'priority', 'deadline', 'submitted_at',
+                 'taken')
+
+    def __init__(self, fn, args, kwargs, priority, deadline):
+        self.future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.deadline = deadline
+        self.submitted_at = time.monotonic()
+        self.taken = False
+
+    def run(self) -> None:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.future.cancel()
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class PriorityThreadPoolExecutor(Executor):
+    """
+    A thread pool executor that executes tasks in order of their priority, instead of the
+    order they were submitted in. Tasks with lower priority values are executed first. Tasks
+    of the same priority are executed in order of submission.
+
+    A task can be given a deadline. If it is not started by then, it's future will be cancelled
+    and it won't be executed.
+
+    To keep a stream of high priority tasks from starving the low priority ones, give
+    starvation_timeout. A task that waited for that long will be executed next, regardless of
+    it's priority.
+
+    Threads are started lazily, as tasks are submitted, up to max_workers of them.
+
+    The metric is duck-typed, any object with a method runtime(value, **labels) will do,
+    such as satella's metrics.
+
+    :param max_workers: maximum amount of worker threads
+    :param starvation_timeout: amount of seconds after which a task will be executed regardless
+        of it's priority. None means never.
+    :param thread_name_prefix: prefix of names of the worker threads
+    :param queue_depth_metric: a metric to which the amount of tasks waiting for a worker will be
+        reported each time it changes, with a label of priority
+    """
+
+    def __init__(self, max_workers: int = 4, starvation_timeout: tp.Optional[float] = None,
+                 thread_name_prefix: str = 'PriorityThreadPoolExecutor',
+                 queue_depth_metric=None):
+        self.max_workers = max_workers
+        self.starvation_timeout = starvation_timeout
+        self.thread_name_prefix = thread_name_prefix
+        self.queue_depth_metric = queue_depth_metric
+        self._condition = threading.Condition(threading.Lock())
+        self._heap = []  # type: tp.List[tp.Tuple[float, int, _PriorityWorkItem]]
+        # all the queued tasks in order of submission, used for starvation protection
+        self._fifo = collections.deque()  # type: tp.Deque[_PriorityWorkItem]
+        self._queue_depths = collections.Counter()  # type: tp.Dict[float, int]
+        self._counter = itertools.count()
+        self._threads = []  # type: tp.List[threading.Thread]
+        self._idle_workers = 0
+        self._shutdown = False
+
+    def submit(self, fn, *args, priority: float = 0, deadline: tp.Optional[float] = None,
+               **kwargs) -> Future:
+        """
+        Submit a task to the executor.
+
+        :param priority: priority of the task, lower values are executed first
+        :param deadline: time.monotonic() value after which the task should not be started
+        :raises RuntimeError: the executor was shut down
+        """
+        item = _PriorityWorkItem(fn, args, kwargs, priority, deadline)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            heapq.heappush(self._heap, (priority, next(self._counter), item))
+            if self.starvation_timeout is not None:
+                self._fifo.append(item)
+            self._change_queue_depth(priority, 1)
+            if not self._idle_workers and len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._worker, daemon=True,
+                                          name='%s_%d' % (self.thread_name_prefix,
+                                                          len(self._threads)))
+                thread.start()
+                self._threads.append(thread)
+            else:
+                self._condition.notify()
+        return item.future
+
+    def get_queue_length(self, priority: tp.Optional[float] = None) -> int:
+        """
+        Return the amount of tasks waiting for a worker
+
+        :param priority: priority to count the tasks of. None means count all of them.
+        """
+        with self._condition:
+            if priority is None:
+                return sum(self._queue_depths.values())
+            return self._queue_depths[priority]
+
+    def _change_queue_depth(self, priority: float, delta: int) -> None:
+        """Must be called with the lock held"""
+        self._queue_depths[priority] += delta
+        depth = self._queue_depths[priority]
+        if not depth:
+            del self._queue_depths[priority]
+        if self.queue_depth_metric is not None:
+            self.queue_depth_metric.runtime(depth, priority=priority)
+
+    def _take(self) -> _PriorityWorkItem:
+        """Take the next task. There must be any. Must be called with the lock held."""
+        if self.starvation_timeout is not None:
+            while self._fifo[0].taken:
+                self._fifo.popleft()
+            if time.monotonic() - self._fifo[0].submitted_at >= self.starvation_timeout:
+                item = self._fifo.popleft()
+            else:
+                item = None
+            if item is None:
+                while self._heap[0][2].taken:
+                    heapq.heappop(self._heap)
+                item = heapq.heappop(self._heap)[2]
+        else:
+            item = heapq.heappop(self._heap)[2]
+        item.taken = True
+        self._change_queue_depth(item.priority, -1)
+        return item
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue_depths and not self._shutdown:
+                    self._idle_workers += 1
+                    self._condition.wait()
+                    self._idle_workers -= 1
+                if not self._queue_depths:
+                    return
+                item = self._take()
+            item.run()
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """
+        Shut the executor down. Tasks already submitted will still be executed, unless
+        cancel_futures is True.
+
+        :param wait: whether to wait for the workers to finish
+        :param cancel_futures: whether to cancel the tasks that were not started
+        """
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue_depths:
+                    self._take().future.cancel()
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+_shared_executor = None  # type: tp.Optional[Executor]
+_shared_executor_lock = threading.Lock()
+
+
+def get_shared_executor() -> Executor:
+    """
+    Return the executor that pooled :func:`~satella.coding.concurrent.call_in_separate_thread`
+    and :func:`~satella.coding.concurrent.run_as_future` use.
+
+    Unless :func:`set_shared_executor` was called before, it will be created on first use,
+    as a :class:`BoundedThreadPoolExecutor` with the default amount of workers, that lets at
+    most 1024 tasks wait for a worker. Tasks submitted past that are executed by the thread
+    that submitted them (the 'caller_runs' rejection policy), so that the queue can't grow
+    without bounds, and tasks that submit tasks of their own can't deadlock it.
+    """
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_executor_lock:
+            if _shared_executor is None:
+                _shared_executor = BoundedThreadPoolExecutor(
+                    max_queue=1024, rejection_policy='caller_runs',
+                    thread_name_prefix='satella-shared-executor')
+    return _shared_executor
+
+
+def set_shared_executor(executor: Executor) -> None:
+    """
+    Set the executor returned by :func:`get_shared_executor`, for example a
+    :class:`BoundedThreadPoolExecutor` with limits and metrics of your choice.
+
+    The previous executor won't be shut down.
+    """
+    global _shared_executor
+    with _shared_executor_lock:
+        _shared_executor = executor
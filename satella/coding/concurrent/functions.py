@@ -1,13 +1,18 @@
+import math
+import time
 import typing as tp
-from concurrent.futures import Future
+from concurrent.futures import CancelledError, Executor, Future, FIRST_COMPLETED, wait
 from threading import Thread
 
 from satella.coding.decorators.decorators import wraps
 from satella.coding.sequences.sequences import infinite_iterator
 from satella.coding.typing import T
+from .executors import get_shared_executor
+from ...exceptions import WouldWaitMore
 
 
-def run_as_future(fun):
+def run_as_future(fun: tp.Optional[tp.Callable] = None, pooled: bool = False,
+                  executor: tp.Optional[Executor] = None):
     """
     A decorator that accepts a function that should be executed in a separate thread,
     and a Future returned instead of it's result, that will enable to watch the function for
@@ -22,28 +27,57 @@ def run_as_future(fun):
     >>>     ...
     >>> fut = parse_a_file('test.txt')
     >>> result = fut.result()
+
+    Instead of starting a new thread on every call, you can submit the calls to the shared
+    executor (see :func:`~satella.coding.concurrent.get_shared_executor`) or an executor of
+    your own:
+
+    >>> @run_as_future(pooled=True)
+    >>> def parse_a_file(x: str):
+    >>>     ...
+
+    :param pooled: whether to use the shared executor
+    :param executor: executor to use
     """
 
-    @wraps(fun)
-    def inner(*args, **kwargs):
-        fut = Future()
-        fut.set_running_or_notify_cancel()
+    def outer(fun):
+        @wraps(fun)
+        def inner(*args, **kwargs):
+            if pooled or executor is not None:
+                return (executor or get_shared_executor()).submit(fun, *args, **kwargs)
+
+            fut = Future()
+            fut.set_running_or_notify_cancel()
+
+            def separate_target():
+                try:
+                    fut.set_result(fun(*args, **kwargs))
+                except Exception as e:
+                    fut.set_exception(e)
+
+            Thread(target=separate_target).start()
+            return fut
+
+        return inner
 
-        def separate_target():
-            try:
-                fut.set_result(fun(*args, **kwargs))
-            except Exception as e:
-                fut.set_exception(e)
+    if fun is not None:
+        return outer(fun)
+    return outer
 
-        Thread(target=separate_target).start()
-        return fut
 
-    return inner
+def _result_of(future: Future):
+    try:
+        return future.result()
+    except (Exception, CancelledError) as e:
+        return e
 
 
 def parallel_execute(callable_: tp.Callable[[T], Future],
                      args: tp.Iterable[T],
-                     kwargs: tp.Iterable[dict] = infinite_iterator(return_factory=dict)):
+                     kwargs: tp.Iterable[dict] = infinite_iterator(return_factory=dict),
+                     max_in_flight: tp.Optional[int] = None,
+                     ordered: bool = True,
+                     timeout: tp.Optional[float] = None):
     """
     Execute a number of calls to callable in parallel.
 
@@ -52,14 +86,83 @@ def parallel_execute(callable_: tp.Callable[[T], Future],
     Return will be an iterator that will yield every value of the iterator,
     or return an instance of exception, if any of the calls excepted.
 
+    By default all of the calls are made at once, and their results are yielded in the order
+    of the calls. To keep at most max_in_flight calls running, give max_in_flight. Arguments will
+    then be read lazily, as previous calls complete. The results can be yielded as soon as they
+    complete, if ordered is False. If ordered is True, results that completed early are kept
+    until all of the preceding ones are yielded, and they count towards max_in_flight.
+
+    If timeout is given, a call that did not complete within timeout seconds of being made
+    will have it's future cancelled, and a :class:`~satella.exceptions.WouldWaitMore` instance
+    will be yielded instead of it's result. Cancelling a future does not stop a call that's
+    already running though, it will continue in the background, and it's result will be
+    discarded. It will no longer count towards max_in_flight.
+
+    If the iterator is closed before it's exhausted, the futures of calls that are in flight
+    are cancelled. The same applies to them.
+
     :param callable_: a callable that returns futures
     :param args: an iterable of arguments to provide to the callable
     :param kwargs: an iterable of keyword arguments to provide to the callable
+    :param max_in_flight: maximum amount of calls in flight. None means no limit.
+    :param ordered: whether to yield the results in the order of the calls
+    :param timeout: maximum amount of seconds to wait for a single call
     :return: an iterator yielding every value (or exception instance if thew) of the future
     """
-    futures = [callable_(*arg, **kwarg) for arg, kwarg in zip(args, kwargs)]
-    for future in futures:
-        try:
-            yield future.result()
-        except Exception as e:
-            yield e
+    if max_in_flight is None and ordered and timeout is None:
+        futures = [callable_(*arg, **kwarg) for arg, kwarg in zip(args, kwargs)]
+        for future in futures:
+            yield _result_of(future)
+        return
+
+    if max_in_flight is None:
+        max_in_flight = math.inf
+    calls = enumerate(zip(args, kwargs))
+    pending = {}  # type: tp.Dict[Future, tp.Tuple[int, tp.Optional[float]]]
+    completed = {}  # type: tp.Dict[int, tp.Any]
+    next_to_yield = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) + len(completed) < max_in_flight:
+                try:
+                    index, (arg, kwarg) = next(calls)
+                except StopIteration:
+                    exhausted = True
+                    break
+                deadline = None if timeout is None else time.monotonic() + timeout
+                pending[callable_(*arg, **kwarg)] = index, deadline
+
+            if not pending:
+                break
+
+            wait_for = None
+            if timeout is not None:
+                earliest = min(deadline for _, deadline in pending.values())
+                wait_for = max(earliest - time.monotonic(), 0)
+            done, _ = wait(pending, wait_for, return_when=FIRST_COMPLETED)
+
+            results = []
+            for future in done:
+                index, _ = pending.pop(future)
+                results.append((index, _result_of(future)))
+            if timeout is not None:
+                now = time.monotonic()
+                for future, (index, deadline) in list(pending.items()):
+                    if deadline <= now:
+                        del pending[future]
+                        future.cancel()
+                        results.append((index, WouldWaitMore('call did not complete in time')))
+
+            if ordered:
+                completed.update(results)
+                while next_to_yield in completed:
+                    yield completed.pop(next_to_yield)
+                    next_to_yield += 1
+            else:
+                results.sort(key=lambda result: result[0])
+                for _, result in results:
+                    yield result
+    finally:
+        for future in pending:
+            future.cancel()
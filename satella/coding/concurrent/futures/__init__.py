@@ -1,6 +1,9 @@
 from .call_in_future import call_in_future
+from .combinators import gather, first_completed, any_success, with_timeout, \
+    to_asyncio, from_asyncio
 from .futures import Future, WrappingFuture, InvalidStateError, wrap_if
 from .wrapped_executor import ExecutorWrapper
 
 __all__ = ['Future', 'WrappingFuture', 'InvalidStateError', 'call_in_future',
-           'ExecutorWrapper', 'wrap_if']
+           'ExecutorWrapper', 'wrap_if', 'gather', 'first_completed', 'any_success',
+           'with_timeout', 'to_asyncio', 'from_asyncio']
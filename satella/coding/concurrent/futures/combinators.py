@@ -0,0 +1,230 @@
+import asyncio
+import functools
+import threading
+import typing as tp
+from concurrent.futures import Future as PythonFuture
+
+from satella.exceptions import WouldWaitMore
+from .futures import Future, _outcome, _complete
+
+
+def gather(futures: tp.Iterable[PythonFuture]) -> Future:
+    """
+    Return a future that will be completed with a list of results of given futures, in their
+    order, once all of them complete.
+
+    If any of them fails, the returned future will fail with it's exception right away.
+
+    No thread waits for the futures, their callbacks do all the work.
+
+    :param futures: Python or Satella futures
+    :return: a new future
+    """
+    futures = list(futures)
+    future = Future()
+    results = [None] * len(futures)
+    remaining = len(futures)
+    lock = threading.Lock()
+
+    if not futures:
+        future.set_result(results)
+        return future
+
+    def on_done(index: int, fut: PythonFuture) -> None:
+        nonlocal remaining
+        exception, result = _outcome(fut)
+        with lock:
+            if remaining <= 0:      # already failed
+                return
+            if exception is not None:
+                remaining = 0
+            else:
+                results[index] = result
+                remaining -= 1
+                if remaining:
+                    return
+        _complete(future, exception, results)
+
+    for index, fut in enumerate(futures):
+        fut.add_done_callback(functools.partial(on_done, index))
+    return future
+
+
+def first_completed(futures: tp.Iterable[PythonFuture]) -> Future:
+    """
+    Return a future that will be completed with the outcome, be it a result or an exception,
+    of the first of given futures to complete.
+
+    :param futures: Python or Satella futures, at least one
+    :return: a new future
+    :raises ValueError: no futures were given
+    """
+    futures = list(futures)
+    if not futures:
+        raise ValueError('At least one future is required')
+    future = Future()
+    lock = threading.Lock()
+    done = False
+
+    def on_done(fut: PythonFuture) -> None:
+        nonlocal done
+        with lock:
+            if done:
+                return
+            done = True
+        _complete(future, *_outcome(fut))
+
+    for fut in futures:
+        fut.add_done_callback(on_done)
+    return future
+
+
+def any_success(futures: tp.Iterable[PythonFuture]) -> Future:
+    """
+    Return a future that will be completed with the result of the first of given futures
+    to succeed. If all of them fail, it will fail with the exception of the last one to fail.
+
+    :param futures: Python or Satella futures, at least one
+    :return: a new future
+    :raises ValueError: no futures were given
+    """
+    futures = list(futures)
+    if not futures:
+        raise ValueError('At least one future is required')
+    future = Future()
+    lock = threading.Lock()
+    remaining = len(futures)
+
+    def on_done(fut: PythonFuture) -> None:
+        nonlocal remaining
+        exception, result = _outcome(fut)
+        with lock:
+            if remaining <= 0:      # already succeeded
+                return
+            if exception is None:
+                remaining = 0
+            else:
+                remaining -= 1
+                if remaining:
+                    return
+        _complete(future, exception, result)
+
+    for fut in futures:
+        fut.add_done_callback(on_done)
+    return future
+
+
+def with_timeout(future: PythonFuture, timeout: float, cancel: bool = False) -> Future:
+    """
+    Return a future that will be completed with the outcome of given future, or fail with
+    :class:`~satella.exceptions.WouldWaitMore` if it does not complete within timeout seconds.
+
+    The timeout is tracked by the single thread that backs all
+    :class:`~satella.coding.concurrent.Timer` objects, so it's callbacks will be called in that
+    thread if it fires, and they shouldn't block.
+
+    :param future: a Python or a Satella future
+    :param timeout: amount of seconds to wait for
+    :param cancel: whether to cancel given future if it times out
+    :return: a new future
+    """
+    from ..timer import Timer
+
+    result_future = Future()
+    lock = threading.Lock()
+    done = False
+
+    def complete(exception: tp.Optional[BaseException], result) -> bool:
+        nonlocal done
+        with lock:
+            if done:
+                return False
+            done = True
+        _complete(result_future, exception, result)
+        return True
+
+    def on_timeout() -> None:
+        if complete(WouldWaitMore('Future did not complete within %s seconds' % (timeout,)),
+                    None) and cancel:
+            future.cancel()
+
+    timer = Timer(timeout, on_timeout)
+    timer.start()
+
+    def on_done(fut: PythonFuture) -> None:
+        timer.cancel()
+        complete(*_outcome(fut))
+
+    future.add_done_callback(on_done)
+    return result_future
+
+
+def to_asyncio(future: PythonFuture,
+               loop: tp.Optional[asyncio.AbstractEventLoop] = None) -> asyncio.Future:
+    """
+    Return an asyncio future that will be completed with the outcome of given future.
+
+    The result is passed as-is, without copying. Cancelling the asyncio future will cancel
+    given future.
+
+    :param future: a Python or a Satella future
+    :param loop: event loop to create the asyncio future in. Defaults to the event loop running
+        in this thread, so it has to be given if this is not called from a coroutine or
+        a callback.
+    :return: an asyncio future
+    :raises RuntimeError: loop was not given, and there's no event loop running in this thread
+    """
+    if loop is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except AttributeError:      # Python < 3.7
+            loop = asyncio.get_event_loop()
+    asyncio_future = loop.create_future()
+
+    def copy_outcome(exception: tp.Optional[BaseException], result,
+                     cancelled: bool) -> None:
+        if asyncio_future.done():
+            return
+        if cancelled:
+            asyncio_future.cancel()
+        elif exception is not None:
+            asyncio_future.set_exception(exception)
+        else:
+            asyncio_future.set_result(result)
+
+    def on_done(fut: PythonFuture) -> None:
+        loop.call_soon_threadsafe(copy_outcome, *_outcome(fut), fut.cancelled())
+
+    def on_asyncio_done(fut: asyncio.Future) -> None:
+        if fut.cancelled():
+            future.cancel()
+
+    asyncio_future.add_done_callback(on_asyncio_done)
+    future.add_done_callback(on_done)
+    return asyncio_future
+
+
+def from_asyncio(asyncio_future: asyncio.Future) -> Future:
+    """
+    Return a Satella future that will be completed with the outcome of given asyncio future,
+    so that threads can wait on it.
+
+    The result is passed as-is, without copying. If the asyncio future is cancelled, so will be
+    the returned one.
+
+    This must be called in the thread of the asyncio future's event loop.
+
+    :param asyncio_future: an asyncio future
+    :return: a new future
+    """
+    future = Future()
+
+    def on_done(fut: asyncio.Future) -> None:
+        if fut.cancelled():
+            future.cancel()
+            return
+        exception = fut.exception()
+        _complete(future, exception, None if exception is not None else fut.result())
+
+    asyncio_future.add_done_callback(on_done)
+    return future
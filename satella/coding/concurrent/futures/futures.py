@@ -1,10 +1,10 @@
 import concurrent.futures._base
 import logging
 import typing as tp
-from concurrent.futures import Future as PythonFuture
+from concurrent.futures import Future as PythonFuture, CancelledError
 from concurrent.futures._base import CANCELLED, CANCELLED_AND_NOTIFIED, FINISHED
 
-from satella.coding.typing import T
+from satella.coding.typing import T, U
 
 try:
     from concurrent.futures import InvalidStateError
@@ -92,6 +92,57 @@ class Future(PythonFuture, tp.Generic[T]):
         self.add_done_callback(inner)
         return self
 
+    def map(self, fun: tp.Callable[[T], U]) -> 'Future[U]':
+        """
+        Return a new future, that will be completed with fun called on the result of this
+        future. If this future fails, or fun raises, the new future will fail with the
+        exception.
+
+        fun is called in the thread that completes this future.
+
+        :param fun: function to call with the result of this future
+        :return: a new future
+        """
+        future = Future()
+
+        def inner(fut: PythonFuture):
+            exception, result = _outcome(fut)
+            if exception is None:
+                try:
+                    result = fun(result)
+                except Exception as e:
+                    exception = e
+            _complete(future, exception, result)
+
+        self.add_done_callback(inner)
+        return future
+
+    def flat_map(self, fun: tp.Callable[[T], PythonFuture]) -> 'Future':
+        """
+        Return a new future, that will be completed with the outcome of the future returned by
+        fun called on the result of this future. If this future fails, or fun raises, the new
+        future will fail with the exception.
+
+        fun is called in the thread that completes this future.
+
+        :param fun: function to call with the result of this future, returning a future
+        :return: a new future
+        """
+        future = Future()
+
+        def inner(fut: PythonFuture):
+            exception, result = _outcome(fut)
+            if exception is None:
+                try:
+                    fun(result).add_done_callback(lambda f: _complete(future, *_outcome(f)))
+                    return
+                except Exception as e:
+                    exception = e
+            _complete(future, exception, None)
+
+        self.add_done_callback(inner)
+        return future
+
     def add_pre_done_callback(self, fn):
         """
         Attaches a callable that will be called just before the future finishes
@@ -213,6 +264,27 @@ class WrappingFuture(Future):
         return self.source_future.cancel()
 
 
+def _outcome(future: PythonFuture) -> tp.Tuple[tp.Optional[BaseException], tp.Any]:
+    """Return (exception or None, result) of a done future"""
+    if future.cancelled():
+        return CancelledError(), None
+    if future._exception is not None:
+        return future._exception, None
+    return None, future._result
+
+
+def _complete(future: PythonFuture, exception: tp.Optional[BaseException],
+              result: tp.Any) -> None:
+    """Complete a future with an outcome, unless it has been cancelled"""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
 def wrap_if(fut: tp.Union[PythonFuture, Future]) -> Future:
     """
     Wrap a future, if it isn't already wrapped
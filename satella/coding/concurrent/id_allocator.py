@@ -1,3 +1,7 @@
+import itertools
+import threading
+import typing as tp
+
 from .monitor import Monitor
 from ...exceptions import AlreadyAllocated
 
@@ -6,29 +10,74 @@ class SequentialIssuer(Monitor):
     """
     A classs that issues an monotonically increasing value.
 
+    By default every identifier is issued under a lock, so identifiers are unique, and increasing
+    in the order in which they were issued, across all threads.
+
+    If contention on that lock is a problem, you can choose one of two faster modes:
+
+    * lock_free - identifiers are taken from an itertools.count, which CPython advances
+      atomically without any lock. The guarantees are the same as above. :meth:`no_less_than`
+      still takes the lock, and replaces the count with one starting further on.
+    * block_size - every thread reserves block_size identifiers at once, taking the lock once per
+      block_size identifiers, and issues them without any lock. Identifiers are unique across all
+      threads and increasing within every thread, but a thread can be issued a lower identifier
+      than some other thread was issued earlier. Identifiers left unissued by a thread that has
+      terminated, or that called :meth:`no_less_than`, will never be issued.
+
     :param start: start issuing IDs from this value
+    :param block_size: amount of identifiers that every thread reserves at once
+    :param lock_free: whether to issue identifiers from an itertools.count
+    :raises ValueError: both block_size and lock_free were given
 
-    :ivar start: next value to be issued
+    :ivar start: next value to be issued, or reserved if block_size is given. Not updated if
+        lock_free is given.
     """
-    __slots__ = ('start', )
+    __slots__ = ('start', 'block_size', 'lock_free', '_counter', '_local')
 
-    def __init__(self, start: int = 0):
+    def __init__(self, start: int = 0, block_size: tp.Optional[int] = None,
+                 lock_free: bool = False):
         super().__init__()
-        self.start = 0
+        if block_size is not None and lock_free:
+            raise ValueError('Only one of block_size and lock_free can be given')
+        self.start = start
+        self.block_size = block_size
+        self.lock_free = lock_free
+        self._counter = itertools.count(start) if lock_free else None
+        self._local = threading.local()
 
-    @Monitor.synchronized
     def issue(self) -> int:
         """
         Just issue a next identifier
 
         :return: a next identifier
         """
-        try:
-            return self.start
-        finally:
-            self.start += 1
+        if self.lock_free:
+            while True:
+                counter = self._counter
+                if counter is None:     # no_less_than is replacing it
+                    with Monitor.acquire(self):
+                        continue
+                value = next(counter)
+                # if it was replaced meanwhile, value might have been issued by no_less_than
+                if counter is self._counter:
+                    return value
+        if self.block_size is not None:
+            local = self._local
+            value = getattr(local, 'next', None)
+            if value is not None and value < local.stop:
+                local.next = value + 1
+                return value
+            with Monitor.acquire(self):
+                value = self.start
+                self.start += self.block_size
+            local.next, local.stop = value + 1, value + self.block_size
+            return value
+        with Monitor.acquire(self):
+            try:
+                return self.start
+            finally:
+                self.start += 1
 
-    @Monitor.synchronized
     def no_less_than(self, no_less_than: int) -> int:
         """
         Issue an int, which is no less than a given value
@@ -36,15 +85,27 @@ class SequentialIssuer(Monitor):
         :param no_less_than: value that the returned id will not be less than this
         :return: an identifier, no less than no_less_than
         """
-        try:
-            if self.start > no_less_than:
-                return self.start
-                self.start += 1
-            else:
-                self.start = no_less_than
-                return self.start
-        finally:
-            self.start += 1
+        if self.lock_free:
+            with Monitor.acquire(self):
+                counter, self._counter = self._counter, None
+                value = max(next(counter), no_less_than)
+                self._counter = itertools.count(value + 1)
+            return value
+        with Monitor.acquire(self):
+            value = max(self.start, no_less_than)
+            self.start = value + 1
+        if self.block_size is not None:
+            # so that this thread won't issue anything lower from it's block
+            self._local.next = None
+        return value
+
+
+_WORD_BITS = 64
+_FULL_WORD = (1 << _WORD_BITS) - 1
+
+
+def _lowest_zero_bit(word: int) -> int:
+    return (~word & (word + 1)).bit_length() - 1
 
 
 class IDAllocator(Monitor):
@@ -52,25 +113,100 @@ class IDAllocator(Monitor):
     Reusable ID allocator
 
     You can use it to requisition ints from a pool, and then free their ints, permitting
-    them to be reused.
+    them to be reused. The lowest free int is always returned.
+
+    Allocated ints are kept in a hierarchical bitmap: a bit per int, and a bit per each 64-bit
+    word of the level below, telling whether that word is full. Finding the lowest free int
+    thus takes a single lookup per level, and there's a level per 64 times more ints.
+    The bitmap grows twice every time it runs out of space.
 
     Thread-safe.
 
     :param start_at: the lowest integer that the allocator will return
     """
-    __slots__ = ('start_at', 'ints_allocated', 'free_ints', 'bound')
+    __slots__ = ('start_at', 'levels', 'bound')
 
     def __init__(self, start_at: int = 0):
         super().__init__()
         self.start_at = start_at
-        self.ints_allocated = set()
-        self.free_ints = set()
-        self.bound = 0
+        # levels[0] is the bitmap of ints, levels[i] has a bit set for each full word
+        # of levels[i-1]. The last level is a single word.
+        self.levels = [[0]]  # type: tp.List[tp.List[int]]
+        self.bound = _WORD_BITS
+
+    def _extend_the_bound_to(self, x: int) -> None:
+        if x <= self.bound:
+            return
+        leaves = self.levels[0]
+        words = max(len(leaves) * 2, (x + _WORD_BITS - 1) // _WORD_BITS)
+        leaves.extend([0] * (words - len(leaves)))
+        self.bound = words * _WORD_BITS
+        level_no = 1
+        while len(self.levels[level_no - 1]) > 1:
+            words = (len(self.levels[level_no - 1]) + _WORD_BITS - 1) // _WORD_BITS
+            if level_no == len(self.levels):
+                # a new level on top, compute it from the level below
+                level = [0] * words
+                for i, child in enumerate(self.levels[level_no - 1]):
+                    if child == _FULL_WORD:
+                        level[i // _WORD_BITS] |= 1 << (i % _WORD_BITS)
+                self.levels.append(level)
+            else:
+                level = self.levels[level_no]
+                level.extend([0] * (words - len(level)))
+            level_no += 1
+
+    def _is_allocated(self, x: int) -> bool:
+        return x < self.bound and bool(self.levels[0][x // _WORD_BITS] >> (x % _WORD_BITS) & 1)
+
+    def _mark_word_full(self, index: int) -> None:
+        """Propagate the fact that the index-th word of levels[0] might have become full"""
+        for level_no in range(1, len(self.levels)):
+            if self.levels[level_no - 1][index] != _FULL_WORD:
+                return
+            index, bit = divmod(index, _WORD_BITS)
+            self.levels[level_no][index] |= 1 << bit
+
+    def _set(self, x: int) -> None:
+        index, bit = divmod(x, _WORD_BITS)
+        self.levels[0][index] |= 1 << bit
+        self._mark_word_full(index)
+
+    def _clear(self, x: int) -> None:
+        index, bit = divmod(x, _WORD_BITS)
+        self.levels[0][index] &= ~(1 << bit)
+        for level in self.levels[1:]:
+            index, bit = divmod(index, _WORD_BITS)
+            if not level[index] >> bit & 1:
+                return
+            level[index] &= ~(1 << bit)
+
+    def _find_lowest_free(self) -> int:
+        index = 0
+        for level in reversed(self.levels):
+            if index >= len(level):
+                # all of the ints up to the bound are allocated
+                return self.bound
+            index = index * _WORD_BITS + _lowest_zero_bit(level[index])
+        return index
 
-    def _extend_the_bound_to(self, x: int):
-        for i in range(self.bound, x):
-            self.free_ints.add(i)
-        self.bound = x
+    def _find_free_range(self, n: int) -> int:
+        """Return the lowest x such that ints from x to x+n-1 are free"""
+        run_start = self._find_lowest_free()
+        x = run_start
+        leaves = self.levels[0]
+        while x < self.bound and x - run_start < n:
+            index, bit = divmod(x, _WORD_BITS)
+            word = leaves[index] >> bit
+            if not word:
+                x = (index + 1) * _WORD_BITS
+            elif word & 1:
+                # skip the allocated ints, the run starts anew after them
+                x += _lowest_zero_bit(word)
+                run_start = x
+            else:
+                x += _lowest_zero_bit(~word)
+        return run_start
 
     @Monitor.synchronized
     def mark_as_free(self, x: int):
@@ -82,25 +218,48 @@ class IDAllocator(Monitor):
         """
         if x < self.start_at:
             raise ValueError('%s is less than start_at' % (x,))
-        x -= self.start_at
-        if x not in self.ints_allocated:
+        if not self._is_allocated(x - self.start_at):
             raise ValueError('%s was not allocated' % (x,))
-        self.ints_allocated.remove(x)
-        self.free_ints.add(x)
+        self._clear(x - self.start_at)
 
     @Monitor.synchronized
     def allocate_int(self) -> int:
         """
-        Return a previously unallocated int, and mark it as allocated
+        Return the lowest previously unallocated int, and mark it as allocated
 
         :return: an allocated int
         """
-        if not self.free_ints:
-            self._extend_the_bound_to(self.bound + 10)
-        x = self.free_ints.pop()
-        self.ints_allocated.add(x)
+        x = self._find_lowest_free()
+        self._extend_the_bound_to(x + 1)
+        self._set(x)
         return x + self.start_at
 
+    @Monitor.synchronized
+    def allocate_range(self, n: int) -> int:
+        """
+        Allocate n consecutive ints, starting at the lowest possible one.
+
+        They can be freed with :meth:`mark_as_free`, one by one.
+
+        :param n: amount of ints to allocate
+        :return: the first of allocated ints
+        :raises ValueError: n was not positive
+        """
+        if n <= 0:
+            raise ValueError('n must be positive')
+        start = self._find_free_range(n)
+        stop = start + n
+        self._extend_the_bound_to(stop)
+        leaves = self.levels[0]
+        x = start
+        while x < stop:
+            index, bit = divmod(x, _WORD_BITS)
+            bits = min(_WORD_BITS - bit, stop - x)
+            leaves[index] |= ((1 << bits) - 1) << bit
+            self._mark_word_full(index)
+            x += bits
+        return start + self.start_at
+
     @Monitor.synchronized
     def mark_as_allocated(self, x: int):
         """
@@ -113,12 +272,7 @@ class IDAllocator(Monitor):
         if x < self.start_at:
             raise ValueError('%s is less than start_at' % (x,))
         x -= self.start_at
-        if x >= self.bound:
-            self._extend_the_bound_to(x + 1)
-            self.free_ints.remove(x)
-            self.ints_allocated.add(x)
-        else:
-            if x in self.ints_allocated:
-                raise AlreadyAllocated()
-            self.free_ints.remove(x)
-            self.ints_allocated.add(x)
+        if self._is_allocated(x):
+            raise AlreadyAllocated()
+        self._extend_the_bound_to(x + 1)
+        self._set(x)
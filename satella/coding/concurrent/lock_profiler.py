@@ -0,0 +1,151 @@
+import collections
+import random
+import sys
+import threading
+import time
+import typing as tp
+
+__all__ = ['enable_lock_profiling', 'disable_lock_profiling', 'get_top_contended_locks',
+           'LockSiteStats']
+
+LockSiteStats = collections.namedtuple('LockSiteStats', ('site', 'samples', 'total_wait',
+                                                         'max_wait', 'total_hold'))
+LockSiteStats.__doc__ = """
+Statistics of the sampled acquisitions of a single lock site.
+
+Times are in seconds. Hold times are not measured for Condition.wait and for monitors locked
+with 'with monitor:', so total_hold is zero for these.
+"""
+
+
+class _LockProfiler:
+    __slots__ = ('wait_metric', 'hold_metric', 'sampling_rate', 'lock', 'stats')
+
+    def __init__(self, wait_metric, hold_metric, sampling_rate: float):
+        self.wait_metric = wait_metric
+        self.hold_metric = hold_metric
+        self.sampling_rate = sampling_rate
+        self.lock = threading.Lock()
+        # site -> [samples, total wait, max wait, total hold]
+        self.stats = {}  # type: tp.Dict[str, tp.List[float]]
+
+    def should_sample(self) -> bool:
+        return random.random() < self.sampling_rate
+
+    def record(self, site: str, wait_time: float, hold_time: tp.Optional[float]) -> None:
+        with self.lock:
+            try:
+                stats = self.stats[site]
+            except KeyError:
+                stats = self.stats[site] = [0, 0.0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += wait_time
+            if wait_time > stats[2]:
+                stats[2] = wait_time
+            if hold_time is not None:
+                stats[3] += hold_time
+        if self.wait_metric is not None:
+            self.wait_metric.runtime(wait_time, site=site)
+        if hold_time is not None and self.hold_metric is not None:
+            self.hold_metric.runtime(hold_time, site=site)
+
+    def locked(self, site: str, acquire: tp.Callable[[], tp.Any],
+               release: tp.Callable[[], None]) -> '_ProfiledHold':
+        return _ProfiledHold(self, site, acquire, release)
+
+
+class _ProfiledHold:
+    __slots__ = ('profiler', 'site', 'acquire', 'release', 'started', 'acquired')
+
+    def __init__(self, profiler: _LockProfiler, site: str, acquire: tp.Callable[[], tp.Any],
+                 release: tp.Callable[[], None]):
+        self.profiler = profiler
+        self.site = site
+        self.acquire = acquire
+        self.release = release
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+        self.acquire()
+        self.acquired = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        held = time.perf_counter() - self.acquired
+        self.release()
+        self.profiler.record(self.site, self.acquired - self.started, held)
+        return False
+
+
+def caller_site(depth: int) -> str:
+    """
+    Return the qualified name (or just the name, before Python 3.11) of the function depth
+    frames above the caller of this function.
+    """
+    code = sys._getframe(depth + 1).f_code
+    return getattr(code, 'co_qualname', code.co_name)
+
+
+# the profiler currently in use, None if profiling is disabled
+profiler = None  # type: tp.Optional[_LockProfiler]
+# the profiler that was enabled last, it's statistics are reported
+_last_profiler = None  # type: tp.Optional[_LockProfiler]
+
+
+def enable_lock_profiling(wait_metric=None, hold_metric=None,
+                          sampling_rate: float = 0.01) -> None:
+    """
+    Start measuring how long threads wait to acquire, and then hold, the locks of
+    :class:`~satella.coding.concurrent.Monitor` (and so also of
+    :class:`~satella.coding.concurrent.RMonitor`, :class:`~satella.coding.concurrent.MonitorDict`
+    and the rest of them) and of :class:`~satella.coding.concurrent.Condition`.
+
+    Only a sampling_rate fraction of acquisitions is measured, to keep the overhead low. While
+    profiling is disabled, it costs a single check per acquisition.
+
+    Lock sites are named as follows:
+
+    * methods decorated with :meth:`~satella.coding.concurrent.Monitor.synchronized` (and the
+      likes) by their qualified name, such as 'MyClass.method'
+    * :class:`~satella.coding.concurrent.Monitor.acquire` by the site given to it, or by
+      the qualified name of the function that used it. Before Python 3.11 only the function's
+      name is available.
+    * 'with monitor:' by the qualified name of the function that did it, as above. Only the
+      time spent waiting for the lock is measured then.
+    * wait(), notify() and notify_all() of Conditions by the name given to the Condition
+      followed by the method, such as 'Condition.wait' if no name was given.
+
+    Metrics are duck-typed, any object with a method runtime(value, **labels) will do. Satella's
+    SummaryMetric or HistogramMetric are a good fit. They will be updated with a label of site.
+
+    Calling it again resets the statistics.
+
+    :param wait_metric: a metric to which the time spent waiting for the lock will be reported
+    :param hold_metric: a metric to which the time the lock was held for will be reported
+    :param sampling_rate: fraction of lock acquisitions to measure, between 0 and 1
+    """
+    global profiler, _last_profiler
+    profiler = _last_profiler = _LockProfiler(wait_metric, hold_metric, sampling_rate)
+
+
+def disable_lock_profiling() -> None:
+    """
+    Stop measuring the locks. The statistics are kept until profiling is enabled again.
+    """
+    global profiler
+    profiler = None
+
+
+def get_top_contended_locks(n: int = 10) -> tp.List[LockSiteStats]:
+    """
+    Return statistics of the lock sites that were waited on for the longest total time,
+    in descending order. These are the locks that are worth splitting.
+
+    :param n: maximum amount of sites to return
+    :return: a list of statistics of the sampled acquisitions, by site
+    """
+    if _last_profiler is None:
+        return []
+    with _last_profiler.lock:
+        stats = [LockSiteStats(site, *values) for site, values in _last_profiler.stats.items()]
+    stats.sort(key=lambda stat: stat.total_wait, reverse=True)
+    return stats[:n]
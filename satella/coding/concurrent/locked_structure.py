@@ -2,6 +2,7 @@ import threading
 import typing as tp
 
 from satella.coding.typing import T
+from .monitor import ReadWriteLock
 from ..structures.proxy import Proxy
 
 
@@ -42,3 +43,34 @@ class LockedStructure(Proxy, tp.Generic[T]):
     def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
         self.__lock.release()
         return False
+
+
+class RWLockedStructure(LockedStructure[T]):
+    """
+    A :class:`LockedStructure` for read-mostly structures, that can be read by many threads
+    at once.
+
+    Using it as a context manager locks it for writing. To lock it for reading use
+    :meth:`reading`. This uses a :class:`~satella.coding.concurrent.ReadWriteLock`, so writers
+    are preferred and it is NOT re-entrant.
+
+    Example:
+
+    >>> routes = RWLockedStructure({})
+    >>> with routes.reading():
+    >>>     destination = routes['10.0.0.1']
+    >>> with routes:
+    >>>     routes['10.0.0.2'] = destination
+
+    Note that the name reading will not be passed on to the wrapped object.
+    """
+    __slots__ = ()
+
+    def __init__(self, obj_to_wrap: T, lock: tp.Optional[ReadWriteLock] = None):
+        super().__init__(obj_to_wrap, lock or ReadWriteLock())
+
+    def reading(self):
+        """
+        Return a context manager that locks this structure for reading
+        """
+        return self._LockedStructure__lock.reading()
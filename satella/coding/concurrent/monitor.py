@@ -1,12 +1,15 @@
 import collections
 import copy
 import threading
+import time
 import typing as tp
 
 from ..decorators.decorators import wraps
+from . import lock_profiler
 
 __all__ = [
-    'Monitor', 'RMonitor', 'MonitorDict', 'MonitorList'
+    'Monitor', 'RMonitor', 'MonitorDict', 'MonitorList', 'ReadWriteLock', 'RWMonitor',
+    'RWMonitorDict'
 ]
 
 from ..typing import K, V, T
@@ -40,6 +43,12 @@ class Monitor:
     __slots__ = ('_monitor_lock',)
 
     def __enter__(self) -> 'Monitor':
+        profiler = lock_profiler.profiler
+        if profiler is not None and profiler.should_sample():
+            started = time.perf_counter()
+            self._monitor_lock.acquire()
+            profiler.record(lock_profiler.caller_site(1), time.perf_counter() - started, None)
+            return self
         self._monitor_lock.acquire()
         return self
 
@@ -61,8 +70,16 @@ class Monitor:
         may vary
         """
 
+        site = fun.__qualname__
+
         @wraps(fun)
         def monitored(*args, **kwargs):
+            profiler = lock_profiler.profiler
+            if profiler is not None and profiler.should_sample():
+                # noinspection PyProtectedMember
+                lock = args[0]._monitor_lock
+                with profiler.locked(site, lock.acquire, lock.release):
+                    return fun(*args, **kwargs)
             # noinspection PyProtectedMember
             with args[0]._monitor_lock:
                 return fun(*args, **kwargs)
@@ -109,17 +126,34 @@ class Monitor:
 
         >>> with Monitor.acquire(foo):
         >>>     .. do operations on foo that need mutual exclusion ..
+
+        :param foo: monitor to lock
+        :param site: name of this lock site, reported by lock profiling. Defaults to the
+            qualified name of the function that locks it.
         """
-        __slots__ = ('foo',)
+        __slots__ = ('foo', 'site', 'profiled_hold')
 
-        def __init__(self, foo: 'Monitor'):
+        def __init__(self, foo: 'Monitor', site: tp.Optional[str] = None):
             self.foo = foo
+            self.site = site
+            self.profiled_hold = None
 
         def __enter__(self) -> None:
+            profiler = lock_profiler.profiler
+            if profiler is not None and profiler.should_sample():
+                # noinspection PyProtectedMember
+                lock = self.foo._monitor_lock
+                self.profiled_hold = profiler.locked(self.site or lock_profiler.caller_site(1),
+                                                     lock.acquire, lock.release)
+                self.profiled_hold.__enter__()
+                return
             # noinspection PyProtectedMember
             self.foo._monitor_lock.acquire()
 
         def __exit__(self, e1, e2, e3) -> bool:
+            if self.profiled_hold is not None:
+                profiled_hold, self.profiled_hold = self.profiled_hold, None
+                return profiled_hold.__exit__(e1, e2, e3)
             # noinspection PyProtectedMember
             self.foo._monitor_lock.release()
             return False
@@ -141,9 +175,19 @@ class Monitor:
         """
 
         def outer(fun):
+            site = fun.__qualname__
+
             @wraps(fun)
             def inner(*args, **kwargs):
-                with cls.acquire(monitor):
+                profiler = lock_profiler.profiler
+                if profiler is not None and profiler.should_sample():
+                    # noinspection PyProtectedMember
+                    lock = monitor._monitor_lock
+                    with profiler.locked(site, lock.acquire, lock.release):
+                        return fun(*args, **kwargs)
+                # not through cls.acquire, that would sample again
+                # noinspection PyProtectedMember
+                with monitor._monitor_lock:
                     return fun(*args, **kwargs)
 
             return inner
@@ -161,6 +205,178 @@ class RMonitor(Monitor):
         self._monitor_lock = threading.RLock()  # type: threading.RLock
 
 
+class ReadWriteLock:
+    """
+    A lock that can be held by many readers at once, or by a single writer.
+
+    Writers are preferred: once a writer waits for the lock, no new readers will acquire it,
+    so that a steady stream of readers can't starve the writers. As a consequence, this lock
+    is NOT re-entrant, not even for readers.
+
+    Using it as a context manager, or calling :meth:`acquire` and :meth:`release`, locks it for
+    writing, so it can stand in for a threading.Lock. To lock it for reading use :meth:`reading`,
+    or :meth:`acquire_read` and :meth:`release_read`.
+
+    >>> lock = ReadWriteLock()
+    >>> with lock.reading():
+    >>>     .. read the shared resource ..
+    >>> with lock:
+    >>>     .. change the shared resource ..
+    """
+    __slots__ = ('_condition', '_readers', '_writer', '_writers_waiting')
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self) -> None:
+        """
+        Lock for reading, waiting until there are no writers
+        """
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        """
+        Release a lock acquired for reading
+        """
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire(self) -> None:
+        """
+        Lock for writing, waiting until there are no readers or writers
+        """
+        with self._condition:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+
+    def release(self) -> None:
+        """
+        Release a lock acquired for writing
+        """
+        with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+    def reading(self) -> '_ReadLocked':
+        """
+        Return a context manager that locks this for reading
+        """
+        return _ReadLocked(self)
+
+    def __enter__(self) -> 'ReadWriteLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.release()
+        return False
+
+
+class _ReadLocked:
+    __slots__ = ('lock',)
+
+    def __init__(self, lock: ReadWriteLock):
+        self.lock = lock
+
+    def __enter__(self) -> None:
+        self.lock.acquire_read()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.lock.release_read()
+        return False
+
+
+class RWMonitor(Monitor):
+    """
+    A monitor that distinguishes between readers, who can hold it at the same time, and
+    writers, who hold it exclusively. Use it for read-mostly structures.
+
+    It uses a :class:`ReadWriteLock`, so writers are preferred and it is NOT re-entrant.
+
+    Everything inherited from :class:`Monitor` (synchronized, acquire, release and the context
+    manager protocol) locks it for writing.
+
+    >>> class RoutingTable(RWMonitor):
+    >>>     def __init__(self):
+    >>>         super().__init__()
+    >>>         self.routes = {}
+    >>>     @RWMonitor.synchronized_read
+    >>>     def route(self, address):
+    >>>         return self.routes[address]
+    >>>     @RWMonitor.synchronized_write
+    >>>     def add_route(self, address, destination):
+    >>>         self.routes[address] = destination
+    >>>     def dump(self):
+    >>>         with RWMonitor.acquire_read(self):
+    >>>             return dict(self.routes)
+    """
+    __slots__ = ()
+
+    def __init__(self):
+        self._monitor_lock = ReadWriteLock()  # type: ReadWriteLock
+
+    @staticmethod
+    def synchronized_read(fun: tp.Callable) -> tp.Callable:
+        """
+        This is a decorator. Class method decorated with that will lock the given instance for
+        reading.
+        """
+
+        site = fun.__qualname__
+
+        @wraps(fun)
+        def monitored(*args, **kwargs):
+            profiler = lock_profiler.profiler
+            if profiler is not None and profiler.should_sample():
+                # noinspection PyProtectedMember
+                lock = args[0]._monitor_lock
+                with profiler.locked(site, lock.acquire_read, lock.release_read):
+                    return fun(*args, **kwargs)
+            # noinspection PyProtectedMember
+            with args[0]._monitor_lock.reading():
+                return fun(*args, **kwargs)
+
+        return monitored
+
+    synchronized_write = staticmethod(Monitor.synchronized)
+
+    class acquire_read:
+        """
+        Returns a context manager object that locks given RWMonitor for reading.
+
+        >>> with RWMonitor.acquire_read(foo):
+        >>>     .. read foo ..
+        """
+        __slots__ = ('foo',)
+
+        def __init__(self, foo: 'RWMonitor'):
+            self.foo = foo
+
+        def __enter__(self) -> None:
+            # noinspection PyProtectedMember
+            self.foo._monitor_lock.acquire_read()
+
+        def __exit__(self, e1, e2, e3) -> bool:
+            # noinspection PyProtectedMember
+            self.foo._monitor_lock.release_read()
+            return False
+
+    acquire_write = Monitor.acquire
+
+
 class MonitorList(tp.Generic[T], collections.UserList, Monitor):
     """
     A list that is also a monitor.
@@ -215,3 +431,31 @@ class MonitorDict(tp.Generic[K, V], collections.UserDict, Monitor):
 
     def __deepcopy__(self, memo) -> 'MonitorDict':
         return MonitorDict(copy.deepcopy(self.data, memo=memo))
+
+
+class RWMonitorDict(tp.Generic[K, V], collections.UserDict, RWMonitor):
+    """
+    A dict that is also a :class:`RWMonitor`.
+
+    Note that access to it's properties is not automatically synchronized, you got to
+    invoke the monitor to implement an opportunistic locking of your own choice
+    """
+
+    def __init__(self, *args, **kwargs):
+        collections.UserDict.__init__(self, *args, **kwargs)
+        RWMonitor.__init__(self)
+
+    def __getitem__(self, item: K) -> V:
+        return self.data[item]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self.data[key] = value
+
+    def __delitem__(self, key: K) -> None:
+        del self.data[key]
+
+    def __copy__(self) -> 'RWMonitorDict':
+        return RWMonitorDict(copy.copy(self.data))
+
+    def __deepcopy__(self, memo) -> 'RWMonitorDict':
+        return RWMonitorDict(copy.deepcopy(self.data, memo=memo))
@@ -2,71 +2,111 @@ import typing as tp
 
 import collections
 import threading
+import time
 
-from satella.coding.recast_exceptions import rethrow_as
-from satella.coding.concurrent.thread import Condition
 from satella.coding.typing import T
-from satella.exceptions import WouldWaitMore, Empty
-from satella.time import measure
+from satella.exceptions import Empty, Full
 
 
 class PeekableQueue(tp.Generic[T]):
     """
     A thread-safe FIFO queue that supports peek()ing for elements.
+
+    Items can be moved in batches with :meth:`put_many` and :meth:`get_many`, which take the
+    lock only once per batch.
+
+    :param maxsize: maximum amount of items in the queue. If the queue is full, put() will
+        block until there's space. Default value of None, as well as zero or a negative value,
+        means no limit, just like in queue.Queue
     """
-    __slots__ = ('queue', 'lock', 'inserted_condition')
+    __slots__ = ('queue', 'lock', 'inserted_condition', 'removed_condition', 'maxsize')
 
-    def __init__(self):
+    def __init__(self, maxsize: tp.Optional[int] = None):
         super().__init__()
         self.queue = collections.deque()
+        self.maxsize = maxsize if maxsize is not None and maxsize > 0 else None
         self.lock = threading.Lock()
-        self.inserted_condition = Condition()
+        self.inserted_condition = threading.Condition(self.lock)
+        self.removed_condition = threading.Condition(self.lock)
+
+    def _wait(self, condition: threading.Condition, predicate: tp.Callable[[], bool],
+              deadline: tp.Optional[float]) -> bool:
+        """
+        Wait, with the lock held, until predicate() is True.
+
+        :return: whether predicate() is True, ie. False if the deadline has passed
+        """
+        while not predicate():
+            if deadline is None:
+                condition.wait()
+            else:
+                time_remaining = deadline - time.monotonic()
+                if time_remaining <= 0:
+                    return False
+                condition.wait(time_remaining)
+        return True
 
-    def put(self, item: T) -> None:
+    def _has_space(self) -> bool:
+        return self.maxsize is None or len(self.queue) < self.maxsize
+
+    def put(self, item: T, timeout: tp.Optional[float] = None) -> None:
         """
         Add an element to the queue
 
         :param item: element to add
+        :param timeout: maximum amount of seconds to wait for space in the queue. Default
+            value of None means wait as long as necessary
+        :raise Full: no space was made in the queue within timeout
         """
+        deadline = None if timeout is None else time.monotonic() + timeout
         with self.lock:
+            if not self._wait(self.removed_condition, self._has_space, deadline):
+                raise Full('queue is full')
             self.queue.append(item)
-        self.inserted_condition.notify()
-
-    @rethrow_as(WouldWaitMore, Empty)
-    def __get(self, timeout, item_getter) -> T:
-        self.lock.acquire()
-        if len(self.queue):
-            # Fast path
-            try:
-                return item_getter(self.queue)
-            finally:
-                self.lock.release()
-        else:
-            if timeout is None:
-                while True:
-                    self.lock.release()
-                    self.inserted_condition.wait()
-                    self.lock.acquire()
-                    if len(self.queue):
-                        try:
-                            return item_getter(self.queue)
-                        finally:
-                            self.lock.release()
-            else:
-                with measure(timeout=timeout) as measurement:
-                    while not measurement.timeouted:
-                        self.lock.release()
-                        # raises WouldWaitMore
-                        self.inserted_condition.wait(timeout=measurement.time_remaining)
-                        self.lock.acquire()
-                        if len(self.queue):
-                            try:
-                                return item_getter(self.queue)
-                            finally:
-                                self.lock.release()
-                    else:
-                        self.lock.release()
-                        raise Empty('queue is empty')
+            self.inserted_condition.notify()
+
+    def put_many(self, items: tp.Iterable[T], timeout: tp.Optional[float] = None) -> None:
+        """
+        Add multiple elements to the queue.
+
+        If the queue has a maxsize, items will be added as soon as space is made for them,
+        so if Full is raised some of them might have been added already.
+
+        :param items: elements to add
+        :param timeout: maximum amount of seconds to wait for space in the queue. Default
+            value of None means wait as long as necessary
+        :raise Full: no space was made in the queue within timeout
+        """
+        items = collections.deque(items)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            while items:
+                if not self._wait(self.removed_condition, self._has_space, deadline):
+                    raise Full('queue is full')
+                if self.maxsize is None:
+                    count = len(items)
+                    self.queue.extend(items)
+                    items.clear()
+                else:
+                    count = min(len(items), self.maxsize - len(self.queue))
+                    for _ in range(count):
+                        self.queue.append(items.popleft())
+                self.inserted_condition.notify(count)
+
+    def __get(self, timeout: tp.Optional[float],
+              item_getter: tp.Callable[[collections.deque], T]) -> T:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            if not self._wait(self.inserted_condition, lambda: self.queue, deadline):
+                raise Empty('queue is empty')
+            return item_getter(self.queue)
+
+    def _take(self, queue: collections.deque, count: int) -> tp.List[T]:
+        """Remove count items from the queue, with the lock held"""
+        items = [queue.popleft() for _ in range(count)]
+        if self.maxsize is not None:
+            self.removed_condition.notify(count)
+        return items
 
     def get(self, timeout: tp.Optional[float] = None) -> T:
         """
@@ -77,7 +117,20 @@ class PeekableQueue(tp.Generic[T]):
         :return: the item
         :raise Empty: queue was empty
         """
-        return self.__get(timeout, lambda queue: queue.popleft())
+        return self.__get(timeout, lambda queue: self._take(queue, 1)[0])
+
+    def get_many(self, max_items: int, timeout: tp.Optional[float] = None) -> tp.List[T]:
+        """
+        Wait until there's at least a single element and get up to max_items elements.
+
+        :param max_items: maximum amount of elements to return
+        :param timeout: maximum amount of seconds to wait. Default value of None
+            means wait as long as necessary
+        :return: a list of at least one and at most max_items elements
+        :raise Empty: queue was empty
+        """
+        return self.__get(timeout,
+                          lambda queue: self._take(queue, min(max_items, len(queue))))
 
     def peek(self, timeout: tp.Optional[float] = None) -> T:
         """
@@ -86,9 +139,14 @@ class PeekableQueue(tp.Generic[T]):
         :param timeout: maximum amount of seconds to wait. Default value of None
             means wait as long as necessary
         :return: the item
-        :raise WouldWaitMore: timeout has expired
+        :raise Empty: queue was empty
         """
-        return self.__get(timeout, lambda queue: queue[0])
+        def item_getter(queue: collections.deque) -> T:
+            # The element stays in the queue, so let another waiter have it
+            self.inserted_condition.notify()
+            return queue[0]
+
+        return self.__get(timeout, item_getter)
 
     def qsize(self) -> int:
         """
@@ -97,4 +155,3 @@ class PeekableQueue(tp.Generic[T]):
         :return: approximate size of the queue
         """
         return len(self.queue)
-
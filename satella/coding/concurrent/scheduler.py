@@ -0,0 +1,243 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+import typing as tp
+
+from satella.coding.typing import NoArgCallable
+from .executors import BoundedThreadPoolExecutor
+from .futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledJob:
+    """
+    A job scheduled to run periodically on a :class:`PeriodicScheduler`. Don't construct it
+    yourself, use :meth:`PeriodicScheduler.schedule`.
+
+    :ivar name: (str) name of the job, used as a label of the metrics
+    :ivar interval: (float) seconds between the starts of consecutive runs
+    :ivar finished: (Future) a future that will complete once the job has been cancelled and
+        it's last run has finished
+    """
+    __slots__ = ('scheduler', 'fun', 'interval', 'on_overrun', 'name', 'jitter', 'cancelled',
+                 'running', 'finished')
+
+    def __init__(self, scheduler: 'PeriodicScheduler', fun: NoArgCallable[None],
+                 interval: float, on_overrun: tp.Optional[tp.Callable[[float], None]],
+                 name: str, jitter: float):
+        self.scheduler = scheduler
+        self.fun = fun
+        self.interval = interval
+        self.on_overrun = on_overrun
+        self.name = name
+        self.jitter = jitter
+        self.cancelled = False
+        self.running = False
+        self.finished = Future()
+
+    def cancel(self) -> None:
+        """
+        Do not run this job anymore. A run that's in progress will be finished.
+        """
+        self.scheduler._cancel(self)
+
+    def _next_interval(self) -> float:
+        if not self.jitter:
+            return self.interval
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def __repr__(self) -> str:
+        return 'ScheduledJob(%s, %s)' % (self.name, self.interval)
+
+
+class PeriodicScheduler:
+    """
+    Runs many periodic jobs on a small pool of worker threads, instead of dedicating a sleeping
+    thread to each of them. A single thread keeps track of when the jobs are due.
+
+    A job is never run concurrently with itself. Each run should start interval seconds after the
+    previous one started. If a run takes longer than that, the job's on_overrun will be called
+    with the time it took, and the next run will be started as soon as possible.
+
+    To keep jobs of the same interval from all waking up at the same moment, every interval can
+    be randomly lengthened or shortened by up to jitter times the interval. The first run is
+    delayed by a random amount of up to jitter times the interval.
+
+    An exception raised by a job will be logged, and the job will keep running.
+
+    Metrics are duck-typed, any object with a method runtime(value, **labels) will do,
+    such as satella's metrics.
+
+    :param workers: amount of worker threads that execute the jobs
+    :param jitter: default jitter, as a fraction of a job's interval
+    :param run_time_metric: a metric to which the time each run took will be reported, with a
+        label of job
+    :param lag_metric: a metric to which the amount of seconds each run started after it was due
+        will be reported, with a label of job
+    :param thread_name_prefix: prefix of names of the threads
+    """
+
+    def __init__(self, workers: int = 2, jitter: float = 0.0, run_time_metric=None,
+                 lag_metric=None, thread_name_prefix: str = 'PeriodicScheduler'):
+        self.workers = workers
+        self.jitter = jitter
+        self.run_time_metric = run_time_metric
+        self.lag_metric = lag_metric
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = BoundedThreadPoolExecutor(workers,
+                                                   thread_name_prefix=thread_name_prefix)
+        self._condition = threading.Condition(threading.Lock())
+        self._heap = []  # type: tp.List[tp.Tuple[float, int, ScheduledJob]]
+        self._counter = itertools.count()
+        self._thread = None  # type: tp.Optional[threading.Thread]
+        self._shutdown = False
+
+    def schedule(self, fun: NoArgCallable[None], interval: float,
+                 on_overrun: tp.Optional[tp.Callable[[float], None]] = None,
+                 name: tp.Optional[str] = None,
+                 jitter: tp.Optional[float] = None) -> ScheduledJob:
+        """
+        Schedule a callable to be run every interval seconds.
+
+        :param fun: callable to run, without arguments
+        :param interval: seconds between the starts of consecutive runs
+        :param on_overrun: a callable to call with the time a run took, if it took more than
+            interval
+        :param name: name of the job. Defaults to fun's name.
+        :param jitter: jitter of this job, as a fraction of the interval. Defaults to the
+            scheduler's.
+        :return: the scheduled job
+        :raises RuntimeError: the scheduler was shut down
+        """
+        if name is None:
+            name = getattr(fun, '__qualname__', repr(fun))
+        if jitter is None:
+            jitter = self.jitter
+        job = ScheduledJob(self, fun, interval, on_overrun, name, jitter)
+        first_run = time.monotonic() + random.uniform(0, jitter * interval)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('The scheduler was shut down')
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True,
+                                                name='%s_scheduler' % (self.thread_name_prefix,))
+                self._thread.start()
+            self._push(job, first_run)
+        return job
+
+    def _push(self, job: ScheduledJob, run_at: float) -> None:
+        """Must be called with the lock held"""
+        heapq.heappush(self._heap, (run_at, next(self._counter), job))
+        if self._heap[0][2] is job:
+            self._condition.notify()
+
+    def _cancel(self, job: ScheduledJob) -> None:
+        with self._condition:
+            if job.cancelled:
+                return
+            job.cancelled = True
+            # otherwise the run in progress will finish it
+            finish = not job.running
+        if finish:
+            job.finished.set_result(None)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._shutdown:
+                        return
+                    if self._heap:
+                        delay = self._heap[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                    else:
+                        delay = None
+                    self._condition.wait(delay)
+                due, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                job.running = True
+            try:
+                self._executor.submit(self._execute, job, due)
+            except RuntimeError:    # the executor was shut down meanwhile
+                job.finished.set_result(None)
+                return
+
+    def _execute(self, job: ScheduledJob, due: float) -> None:
+        started = time.monotonic()
+        if self.lag_metric is not None:
+            self.lag_metric.runtime(started - due, job=job.name)
+        try:
+            job.fun()
+        except Exception:
+            logger.exception('Periodic job %s failed', job.name)
+        time_taken = time.monotonic() - started
+        if self.run_time_metric is not None:
+            self.run_time_metric.runtime(time_taken, job=job.name)
+        if time_taken > job.interval and job.on_overrun is not None:
+            try:
+                job.on_overrun(time_taken)
+            except Exception:
+                logger.exception('on_overrun of periodic job %s failed', job.name)
+
+        with self._condition:
+            job.running = False
+            finish = job.cancelled or self._shutdown
+            if not finish:
+                self._push(job, started + job._next_interval())
+        if finish:
+            job.finished.set_result(None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Cancel all the jobs and stop the threads. Runs in progress will be finished.
+
+        :param wait: whether to wait for the runs in progress to finish
+        """
+        with self._condition:
+            self._shutdown = True
+            jobs = [job for _, _, job in self._heap]
+            self._heap = []
+            self._condition.notify()
+        for job in jobs:
+            job.cancel()
+        self._executor.shutdown(wait)
+        if wait and self._thread is not None:
+            self._thread.join()
+
+
+_shared_scheduler = None  # type: tp.Optional[PeriodicScheduler]
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_shared_scheduler() -> PeriodicScheduler:
+    """
+    Return the scheduler that pooled
+    :class:`~satella.coding.concurrent.IntervalTerminableThread` objects use.
+
+    Unless :func:`set_shared_scheduler` was called before, it will be created on first use,
+    as a :class:`PeriodicScheduler` with 2 workers and jitter of 0.1.
+    """
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        with _shared_scheduler_lock:
+            if _shared_scheduler is None:
+                _shared_scheduler = PeriodicScheduler(jitter=0.1,
+                                                      thread_name_prefix='satella-scheduler')
+    return _shared_scheduler
+
+
+def set_shared_scheduler(scheduler: PeriodicScheduler) -> None:
+    """
+    Set the scheduler returned by :func:`get_shared_scheduler`, for example one with metrics.
+
+    The previous scheduler won't be shut down.
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        _shared_scheduler = scheduler
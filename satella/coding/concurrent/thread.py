@@ -5,15 +5,19 @@ import time
 import typing as tp
 import warnings
 from abc import ABCMeta, abstractmethod
-from concurrent.futures import Future
+from concurrent.futures import Executor, Future
 from threading import Condition as PythonCondition
 
 from satella.coding.decorators import wraps
 from satella.time import measure
+from . import lock_profiler
+from .executors import get_shared_executor
+from .scheduler import PeriodicScheduler, ScheduledJob, get_shared_scheduler
 from ...exceptions import ResourceLocked, WouldWaitMore
 
 
-def call_in_separate_thread(*t_args, **t_kwargs):
+def call_in_separate_thread(*t_args, pooled: bool = False,
+                            executor: tp.Optional[Executor] = None, **t_kwargs):
     """
     Decorator to mark given routine as callable in a separate thread.
 
@@ -26,11 +30,22 @@ def call_in_separate_thread(*t_args, **t_kwargs):
     >>> def handle_messages():
     >>>     while True:
     >>>         ...
+
+    Starting a new thread on every call is expensive if the calls are frequent. Pass pooled=True
+    to submit them to the shared executor instead (see
+    :func:`~satella.coding.concurrent.get_shared_executor`), or give an executor of your own.
+    In that case the thread's constructor arguments are ignored.
+
+    :param pooled: whether to use the shared executor
+    :param executor: executor to use
     """
 
     def outer(fun):
         @wraps(fun)
         def inner(*args, **kwargs) -> Future:
+            if pooled or executor is not None:
+                return (executor or get_shared_executor()).submit(fun, *args, **kwargs)
+
             class MyThread(threading.Thread):
                 def __init__(self):
                     self.future = Future()
@@ -61,8 +76,16 @@ class Condition(PythonCondition):
     There's no need to acquire the underlying lock, as wait/notify/notify_all do it for you.
 
     This happens to sorta not work on PyPy. Use at your own peril. You have been warned.
+
+    :param lock: lock to use, a new RLock by default
+    :param name: name of this condition, reported by lock profiling. Defaults to the name of
+        the class.
     """
 
+    def __init__(self, lock=None, name: tp.Optional[str] = None):
+        super().__init__(lock)
+        self.name = name or self.__class__.__qualname__
+
     def notifyAll(self) -> None:
         """
         Deprecated alias for notify_all
@@ -86,12 +109,16 @@ class Condition(PythonCondition):
             if timeout < 0:
                 timeout = 0
 
+        profiler = lock_profiler.profiler
+        sampled = profiler is not None and profiler.should_sample()
         with measure(timeout=timeout) as measurement:
             if timeout is None:
                 self.acquire()
             else:
                 if not self.acquire(timeout=measurement.time_remaining):
                     raise ResourceLocked('internal lock locked')
+            if sampled:
+                profiler.record(self.name + '.wait', measurement(), None)
 
             try:
                 if timeout is None:
@@ -107,7 +134,7 @@ class Condition(PythonCondition):
         """
         Notify all threads waiting on this Condition
         """
-        with self._lock:
+        with self._profiled_lock('.notify_all'):
             super().notify_all()
 
     def notify(self, n: int = 1) -> None:
@@ -116,9 +143,15 @@ class Condition(PythonCondition):
 
         :param n: amount of threads to notify
         """
-        with self._lock:
+        with self._profiled_lock('.notify'):
             super().notify(n=n)
 
+    def _profiled_lock(self, method: str):
+        profiler = lock_profiler.profiler
+        if profiler is not None and profiler.should_sample():
+            return profiler.locked(self.name + method, self._lock.acquire, self._lock.release)
+        return self._lock
+
 
 class SingleStartThread(threading.Thread):
     """
@@ -325,13 +358,34 @@ class IntervalTerminableThread(TerminableThread, metaclass=ABCMeta):
 
     If executing .loop() takes more than x seconds, on_overrun() will be called.
 
+    If pooled is True, or a scheduler is given, no thread will be started. Instead, .loop()
+    will be called by a :class:`~satella.coding.concurrent.PeriodicScheduler`, the one returned
+    by :func:`~satella.coding.concurrent.get_shared_scheduler` by default. This saves a sleeping
+    thread per object, so it's the way to go if you have many of them. In that case:
+
+    * .prepare() and .loop() are called in the scheduler's worker threads, so .loop() shouldn't
+      block for long
+    * .cleanup() is called by the worker that finished the last .loop(), or by the thread
+      that called terminate() if .loop() was not running at that time
+    * start(), terminate(), join() and is_alive() work as usual, but terminate(force=True) only
+      prevents further calls to .loop()
+    * raising an exception in .loop() terminates it, just like it would terminate the thread
+
     :param seconds: time that a single looping through should take. This will
         include the time spent on calling .loop(), the rest of this time will
         be spent safe_sleep()ing.
+    :param pooled: whether to run on the shared scheduler instead of a thread of it's own
+    :param scheduler: a scheduler to run on instead of a thread of it's own
     """
 
-    def __init__(self, seconds: float, *args, **kwargs):
+    def __init__(self, seconds: float, *args, pooled: bool = False,
+                 scheduler: tp.Optional[PeriodicScheduler] = None, **kwargs):
         self.seconds = seconds
+        self.pooled = pooled or scheduler is not None
+        self.scheduler = scheduler
+        self._job = None  # type: tp.Optional[ScheduledJob]
+        self._prepared = False
+        self._scheduled_finished = threading.Event()
         super().__init__(*args, **kwargs)
 
     @abstractmethod
@@ -349,15 +403,71 @@ class IntervalTerminableThread(TerminableThread, metaclass=ABCMeta):
         :param time_taken: how long did calling .loop() take
         """
 
-    def run(self):
-        self.prepare()
-        while not self._terminating:
-            with measure() as measurement:
+    def start(self) -> 'IntervalTerminableThread':
+        """
+        Start the execution of this thread, or schedule it if it's pooled
+
+        :return: this thread
+        :raises RuntimeError: it was already started
+        """
+        if not self.pooled:
+            return super().start()
+        if self._job is not None:
+            raise RuntimeError('threads can only be started once')
+        scheduler = self.scheduler or get_shared_scheduler()
+        self._job = scheduler.schedule(self._run_scheduled, self.seconds,
+                                       on_overrun=self.on_overrun, name=self.name)
+        self._job.finished.add_done_callback(self._on_job_finished)
+        return self
+
+    def _run_scheduled(self) -> None:
+        try:
+            if not self._prepared:
+                self._prepared = True
+                self.prepare()
+            if not self._terminating:
                 self.loop()
-            time_taken = measurement()
-            time_to_sleep = self.seconds - time_taken
-            if time_to_sleep < 0:
-                self.on_overrun(time_taken)
-            else:
-                self.safe_sleep(time_to_sleep)
+        except SystemExit:
+            self._job.cancel()
+        except Exception:
+            self._job.cancel()
+            raise
+
+    def _on_job_finished(self, _) -> None:
+        try:
+            self.cleanup()
+        finally:
+            self._scheduled_finished.set()
+
+    def terminate(self, force: bool = False) -> 'TerminableThread':
+        if self._job is None:
+            return super().terminate(force)
+        self._terminating = True
+        self._job.cancel()
+        return self
+
+    def join(self, timeout: tp.Optional[float] = None) -> None:
+        if self._job is None:
+            return super().join(timeout)
+        self._scheduled_finished.wait(timeout)
+
+    def is_alive(self) -> bool:
+        if self._job is None:
+            return super().is_alive()
+        return not self._scheduled_finished.is_set()
+
+    def run(self):
+        try:
+            self.prepare()
+            while not self._terminating:
+                with measure() as measurement:
+                    self.loop()
+                time_taken = measurement()
+                time_to_sleep = self.seconds - time_taken
+                if time_to_sleep < 0:
+                    self.on_overrun(time_taken)
+                else:
+                    self.safe_sleep(time_to_sleep)
+        except SystemExit:      # raised by safe_sleep upon termination
+            pass
         self.cleanup()
@@ -16,8 +16,6 @@ class Timer:
     They can be executed either in background monitor's thread or a separate thread can be
     spawned for them.
 
-    There might be up to a second of delay before the timer is picked up.
-
     If spawn_separate is False, exceptions will be logged
 
     :param interval: amount of seconds that should elapsed between calling start() and function
@@ -45,6 +43,11 @@ class Timer:
         tbt = TimerBackgroundThread()
         with Monitor.acquire(tbt):
             tbt.timer_objects.put(execute_at, self)
+            tbt.condition.notify()
+
+    def __lt__(self, other: 'Timer') -> bool:
+        # timers due at the same moment are of equal precedence
+        return False
 
     def cancel(self) -> None:
         """Do not execute this timer"""
@@ -66,20 +69,21 @@ class TimerBackgroundThread(threading.Thread, Monitor):
         super().__init__(name='timer background thread', daemon=True)
         Monitor.__init__(self)
         self.timer_objects = TimeBasedHeap()  # type: TimeBasedHeap[Timer]
+        self.condition = threading.Condition(self._monitor_lock)
         self.start()
 
     def run(self):
         while True:
-            try:
-                ts, _ = self.timer_objects.peek_closest()
-                delay = min(ts - time.monotonic(), 1)
-                if delay < 0:
-                    delay = 0
-            except IndexError:
-                delay = 1
-            time.sleep(delay)
             with Monitor.acquire(self):
-                items_to_exec = self.timer_objects.pop_less_than(time.monotonic())
+                try:
+                    ts, _ = self.timer_objects.peek_closest()
+                    delay = ts - time.monotonic()
+                except IndexError:
+                    delay = None
+                if delay is None or delay > 0:
+                    # woken up when a new timer is started
+                    self.condition.wait(delay)
+                items_to_exec = list(self.timer_objects.pop_less_than(time.monotonic()))
 
             for item in items_to_exec:
                 with log_exceptions(logger, swallow_exception=True):
@@ -1,9 +1,10 @@
 from .arguments import auto_adapt_to_methods, attach_arguments, for_argument, \
     execute_before, copy_arguments, replace_argument_if, transform_result, \
     transform_arguments
-from .decorators import wraps, chain_functions, has_keys, short_none, memoize, return_as_list, \
-    default_return, cache_memoize
+from .decorators import wraps, chain_functions, has_keys, short_none, return_as_list, \
+    default_return
 from .flow_control import loop_while, queue_get
+from .memoize import memoize, cache_memoize
 from .preconditions import postcondition, precondition
 from .retry_dec import retry
 
@@ -1,5 +1,4 @@
 import inspect
-import time
 import typing as tp
 import warnings
 
@@ -131,89 +130,6 @@ def return_as_list(ignore_nulls: bool = False):
     return outer
 
 
-def cache_memoize(cache_duration: float, time_getter: tp.Callable[[], float] = time.monotonic):
-    """
-    A thread-safe memoizer that memoizes the return value for at most cache_duration seconds.
-
-    :param cache_duration: cache validity, in seconds
-    :param time_getter: a callable without arguments that yields us a time marker
-
-    Usage example:
-
-    >>> @cache_memoize(10)
-    >>> def expensive_but_idempotent_operation(a):
-    >>>     ...
-
-    >>> a = expensive_but_idempotent_operation(2)
-    >>> b = expensive_but_idempotent_operation(2)   # is much faster than computing the value anew
-    >>> time.sleep(10)
-    >>> c = expensive_but_idempotent_operation(2)   # function body is computed anew
-    """
-    from satella.coding.concurrent import MonitorDict, Monitor
-
-    def outer(fun):
-        fun.memoize_timestamps = MonitorDict()
-        fun.memoize_values = {}
-
-        @wraps(fun)
-        def inner(*args, **kwargs):
-
-            now = time_getter()
-
-            with Monitor.acquire(fun.memoize_timestamps):
-                if args in fun.memoize_timestamps:
-                    ts = fun.memoize_timestamps[args]
-                    if now - ts > cache_duration:
-                        with Monitor.release(fun.memoize_timestamps):
-                            v = fun(*args, **kwargs)
-                        fun.memoize_timestamps[args] = now
-                        fun.memoize_values[args] = v
-                else:
-                    with Monitor.release(fun.memoize_timestamps):
-                        v = fun(*args, **kwargs)
-                    fun.memoize_timestamps[args] = now
-                    fun.memoize_values[args] = v
-
-                return fun.memoize_values[args]
-
-        return inner
-    return outer
-
-
-def memoize(fun):
-    """
-    A thread safe memoizer based on function's ONLY positional arguments.
-
-    Note that this will make your function execute it at most one thread, the
-    remaining ones will have to wait.
-
-    Usage example:
-
-    >>> @memoize
-    >>> def expensive_but_idempotent_operation(a):
-    >>>     ...
-
-    >>> a = expensive_but_idempotent_operation(2)
-    >>> b = expensive_but_idempotent_operation(2)   # is much faster than computing the value anew
-    """
-    from satella.coding.concurrent.monitor import MonitorDict, Monitor
-
-    fun.memoizer = MonitorDict()
-
-    @wraps(fun)
-    def inner(*args, **kwargs):
-        with Monitor.acquire(fun.memoizer):
-            if args in fun.memoizer:
-                return fun.memoizer[args]
-            else:
-                with Monitor.release(fun.memoizer):
-                    v = fun(*args, **kwargs)
-                fun.memoizer[args] = v
-                return v
-
-    return inner
-
-
 def wraps(cls_to_wrap: tp.Type) -> tp.Callable[[tp.Type], tp.Type]:
     """
     A functools.wraps() but for classes.
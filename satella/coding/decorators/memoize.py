@@ -0,0 +1,269 @@
+import collections
+import threading
+import time
+import typing as tp
+
+from .decorators import wraps
+
+CacheInfo = collections.namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+_KWARGS_MARK = object()
+
+
+def _make_key(args: tuple, kwargs: dict) -> tp.Hashable:
+    if not kwargs:
+        return args
+    return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+
+
+class _LRUPolicy:
+    """Evicts the least recently used key"""
+    __slots__ = ('keys',)
+
+    def __init__(self):
+        self.keys = collections.OrderedDict()
+
+    def add(self, key) -> None:
+        self.keys[key] = None
+
+    def touch(self, key) -> None:
+        self.keys.move_to_end(key)
+
+    def remove(self, key) -> None:
+        del self.keys[key]
+
+    def evict(self) -> tp.Hashable:
+        return self.keys.popitem(last=False)[0]
+
+
+class _LFUPolicy:
+    """Evicts the least frequently used key, or the least recently used one among those"""
+    __slots__ = ('counts', 'buckets', 'min_count')
+
+    def __init__(self):
+        self.counts = {}
+        self.buckets = collections.defaultdict(collections.OrderedDict)
+        self.min_count = 0
+
+    def add(self, key) -> None:
+        self.counts[key] = 1
+        self.buckets[1][key] = None
+        self.min_count = 1
+
+    def _unlink(self, key) -> int:
+        count = self.counts.pop(key)
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+        return count
+
+    def touch(self, key) -> None:
+        count = self._unlink(key)
+        self.counts[key] = count + 1
+        self.buckets[count + 1][key] = None
+        if self.min_count == count and count not in self.buckets:
+            self.min_count = count + 1
+
+    def remove(self, key) -> None:
+        count = self._unlink(key)
+        if count == self.min_count and count not in self.buckets and self.buckets:
+            self.min_count = min(self.buckets)
+
+    def evict(self) -> tp.Hashable:
+        key = next(iter(self.buckets[self.min_count]))
+        self.remove(key)
+        return key
+
+
+_POLICIES = {'lru': _LRUPolicy, 'lfu': _LFUPolicy}
+
+# maximum amount of cache hits remembered between misses, older ones are forgotten
+_TOUCH_BUFFER_SIZE = 1024
+
+
+def memoize(fun: tp.Optional[tp.Callable] = None, maxsize: tp.Optional[int] = None,
+            ttl: tp.Optional[float] = None, policy: str = 'lru',
+            time_getter: tp.Callable[[], float] = time.monotonic):
+    """
+    A thread safe memoizer based on function's arguments, both positional and keyword.
+    They all have to be hashable.
+
+    The function will be executed only once for given arguments: if other threads call it with
+    the same arguments in the meantime, they will wait for the result of that execution. If it
+    raises an exception, all of them will raise it, and it won't be memoized.
+    Calls with different arguments do not wait for each other. A recursive call with the same
+    arguments, made by the function itself, will execute it again instead of waiting.
+
+    Usage example:
+
+    >>> @memoize
+    >>> def expensive_but_idempotent_operation(a):
+    >>>     ...
+
+    >>> a = expensive_but_idempotent_operation(2)
+    >>> b = expensive_but_idempotent_operation(2)   # is much faster than computing the value anew
+
+    You can also limit the amount of memoized values, and the time they're valid for:
+
+    >>> @memoize(maxsize=1000, ttl=60, policy='lfu')
+    >>> def resolve(hostname):
+    >>>     ...
+
+    The decorated function will have a method cache_info(), returning a namedtuple of
+    (hits, misses, maxsize, currsize), much like functools.lru_cache does. Calls that waited
+    for another thread's execution count as hits. It will also have a method cache_clear().
+
+    Cache hits don't take any lock. They are remembered and applied to the eviction policy
+    on the next miss, so if there are more than a thousand hits between misses, only the
+    latest ones will count.
+
+    :param maxsize: maximum amount of values to memoize. None means no limit.
+    :param ttl: amount of seconds a value is valid for. Expired values are removed as
+        new ones are memoized. None means values never expire.
+    :param policy: which value to evict when there's more than maxsize of them. Either 'lru'
+        (least recently used) or 'lfu' (least frequently used)
+    :param time_getter: a callable without arguments that returns current time, in seconds
+    :raises ValueError: invalid policy
+    """
+    from satella.coding.concurrent import ConcurrentDict, Future, StripedAtomicNumber
+
+    if policy not in _POLICIES:
+        raise ValueError('Unknown policy %s' % (policy,))
+
+    def outer(fun):
+        # key -> (value, expiration time or None)
+        values = ConcurrentDict()
+        in_flight = ConcurrentDict()
+        hits = StripedAtomicNumber()
+        misses = StripedAtomicNumber()
+        bounded = maxsize is not None or ttl is not None
+        # eviction policy and the expiration queue are guarded by this lock
+        lock = threading.Lock()
+        eviction_policy = _POLICIES[policy]()
+        expirations = collections.deque()  # type: tp.Deque[tp.Tuple[float, tp.Hashable]]
+        # keys that were hit, to be applied to the eviction policy on the next miss
+        touches = collections.deque(maxlen=_TOUCH_BUFFER_SIZE)  # type: tp.Deque[tp.Hashable]
+
+        def remove(key) -> None:
+            del values[key]
+            if maxsize is not None:
+                eviction_policy.remove(key)
+
+        def get(key, now: float) -> tp.Tuple[bool, tp.Any]:
+            try:
+                value, expires_at = values[key]
+            except KeyError:
+                return False, None
+            if expires_at is not None and expires_at <= now:
+                return False, None
+            if maxsize is not None:
+                touches.append(key)
+            return True, value
+
+        def store(key, value, now: float) -> None:
+            if not bounded:
+                values[key] = value, None
+                return
+            with lock:
+                while touches:
+                    touched_key = touches.popleft()
+                    if touched_key in values:
+                        eviction_policy.touch(touched_key)
+                while expirations and expirations[0][0] <= now:
+                    expires_at, expired_key = expirations.popleft()
+                    if values.get(expired_key, (None, None))[1] == expires_at:
+                        remove(expired_key)
+                if key in values:
+                    remove(key)
+                expires_at = None
+                if ttl is not None:
+                    expires_at = now + ttl
+                    expirations.append((expires_at, key))
+                values[key] = value, expires_at
+                if maxsize is not None:
+                    eviction_policy.add(key)
+                    while len(values) > maxsize:
+                        del values[eviction_policy.evict()]
+
+        @wraps(fun)
+        def inner(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            found, value = get(key, time_getter())
+            if found:
+                hits.add(1)
+                return value
+
+            future = Future()
+            thread_id = threading.get_ident()
+            running_future, owner = in_flight.setdefault(key, (future, thread_id))
+            if running_future is not future:
+                if owner == thread_id:
+                    # a recursive call, waiting for the future would deadlock
+                    misses.add(1)
+                    return fun(*args, **kwargs)
+                hits.add(1)
+                return running_future.result()
+
+            try:
+                # someone could have memoized it right before we became the one to compute it
+                found, value = get(key, time_getter())
+                if found:
+                    hits.add(1)
+                else:
+                    misses.add(1)
+                    value = fun(*args, **kwargs)
+                    store(key, value, time_getter())
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(value)
+                return value
+            finally:
+                del in_flight[key]
+
+        def cache_info() -> CacheInfo:
+            return CacheInfo(int(hits), int(misses), maxsize, len(values))
+
+        def cache_clear() -> None:
+            nonlocal eviction_policy
+            with lock:
+                values.clear()
+                expirations.clear()
+                touches.clear()
+                eviction_policy = _POLICIES[policy]()
+
+        inner.cache_info = cache_info
+        inner.cache_clear = cache_clear
+        return inner
+
+    if fun is not None:
+        return outer(fun)
+    return outer
+
+
+def cache_memoize(cache_duration: float, time_getter: tp.Callable[[], float] = time.monotonic,
+                  maxsize: tp.Optional[int] = None, policy: str = 'lru'):
+    """
+    A thread-safe memoizer that memoizes the return value for at most cache_duration seconds.
+
+    This is :func:`memoize` with ttl of cache_duration.
+
+    :param cache_duration: cache validity, in seconds
+    :param time_getter: a callable without arguments that yields us a time marker
+    :param maxsize: maximum amount of values to memoize. None means no limit.
+    :param policy: which value to evict when there's more than maxsize of them, 'lru' or 'lfu'
+
+    Usage example:
+
+    >>> @cache_memoize(10)
+    >>> def expensive_but_idempotent_operation(a):
+    >>>     ...
+
+    >>> a = expensive_but_idempotent_operation(2)
+    >>> b = expensive_but_idempotent_operation(2)   # is much faster than computing the value anew
+    >>> time.sleep(10)
+    >>> c = expensive_but_idempotent_operation(2)   # function body is computed anew
+    """
+    return memoize(maxsize=maxsize, ttl=cache_duration, policy=policy, time_getter=time_getter)
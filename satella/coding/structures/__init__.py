@@ -13,15 +13,16 @@ from .ranking import Ranking
 from .singleton import Singleton, SingletonWithRegardsTo, get_instances_for_singleton, \
     delete_singleton_for
 from .sorted_list import SortedList, SliceableDeque
-from .sparse_matrix import SparseMatrix
+from .sparse_matrix import SparseMatrix, CompactSparseMatrix
 from .typednamedtuple import typednamedtuple
 from .lru import LRU
-from .syncable_droppable import DBStorage, SyncableDroppable
+from .syncable_droppable import DBStorage, SyncableDroppable, SyncableDroppableWorker
+from .append_only_log import AppendOnlyLogStorage
 from .tuples import Vector
 
 __all__ = [
     'Vector',
-    'DBStorage', 'SyncableDroppable',
+    'DBStorage', 'SyncableDroppable', 'SyncableDroppableWorker', 'AppendOnlyLogStorage',
     'LRU',
     'LRUCacheDict',
     'HashableMixin',
@@ -50,7 +51,7 @@ __all__ = [
     'HashableWrapper',
     'DictionaryView',
     'frozendict',
-    'SparseMatrix',
+    'SparseMatrix', 'CompactSparseMatrix',
     'OmniHashableMixin',
     'Singleton',
     'SingletonWithRegardsTo',
@@ -0,0 +1,359 @@
+import bisect
+import mmap
+import os
+import pickle
+import struct
+import time
+import typing as tp
+
+from satella.coding.concurrent.monitor import Monitor
+from satella.coding.typing import K, V, KVTuple
+from .syncable_droppable import DBStorage
+
+_HEADER = struct.Struct('>I')
+_METADATA_FILE = 'metadata.pickle'
+_SEGMENT_SUFFIX = '.log'
+
+
+class _Segment:
+    """A single file of the log, along with it's sparse key index"""
+    __slots__ = ('path', 'number', 'size', 'records', 'first_key', 'last_key',
+                 'index_keys', 'index_offsets')
+
+    def __init__(self, path: str, number: int):
+        self.path = path
+        self.number = number
+        self.size = 0
+        self.records = 0
+        self.first_key = None
+        self.last_key = None
+        self.index_keys = []  # type: tp.List[K]
+        self.index_offsets = []  # type: tp.List[int]
+
+    def note_record(self, key: K, offset: int, length: int, index_every: int) -> None:
+        if not self.records % index_every:
+            self.index_keys.append(key)
+            self.index_offsets.append(offset)
+        if self.first_key is None:
+            self.first_key = key
+        self.last_key = key
+        self.records += 1
+        self.size = offset + length
+
+    def offset_for(self, starting_key: tp.Optional[K]) -> int:
+        """Return offset of a record not later than the first record of key >= starting_key"""
+        if starting_key is None:
+            return 0
+        index = bisect.bisect_right(self.index_keys, starting_key) - 1
+        if index < 0:
+            return 0
+        return self.index_offsets[index]
+
+
+def _read_records(buffer, offset: int, stop: int,
+                  loads: tp.Callable[[bytes], KVTuple]) -> tp.Iterator[tp.Tuple[int, int, KVTuple]]:
+    """Yield (offset, length, (key, value)) of records, stopping at a truncated one"""
+    while offset + _HEADER.size <= stop:
+        length, = _HEADER.unpack_from(buffer, offset)
+        end = offset + _HEADER.size + length
+        if end > stop:
+            return
+        yield offset, end - offset, loads(buffer[offset + _HEADER.size:end])
+        offset = end
+
+
+class AppendOnlyLogStorage(DBStorage, Monitor):
+    """
+    A reference :class:`~satella.coding.structures.DBStorage` that keeps the data in local files,
+    for use with :class:`~satella.coding.structures.SyncableDroppable`.
+
+    Data is kept in an append-only log, split into segment files of around segment_size bytes
+    each. Segments are read with mmap. Every index_every-th key of a segment is kept in memory,
+    so :meth:`iterate` can start at any key without scanning the preceding records.
+
+    Keys must be put in ascending order, as SyncableDroppable does. Since the log is append-only,
+    only the oldest keys can be deleted. Deleting a key deletes all the keys before it too.
+    Whole segments are removed once all of their keys have been deleted.
+
+    Writes are fsynced in groups: at most once every fsync_interval seconds, and always by
+    :meth:`sync` and :meth:`close`. If no more writes follow, a
+    :class:`~satella.coding.concurrent.Timer` will fsync them fsync_interval seconds after the
+    previous fsync. A crash may therefore lose around the last fsync_interval seconds of writes.
+    A record that was only partly written is discarded when the log is opened.
+
+    Start entry, stop entry and synced up to reported by SyncableDroppable are persisted too,
+    along with the writes, so that it can be recreated after a restart:
+
+    >>> storage = AppendOnlyLogStorage('/var/lib/myapp/series')
+    >>> sd = SyncableDroppable(storage, storage.start_entry, storage.stop_entry,
+    >>>                        storage.synced_up_to, 3600, 86400)
+
+    This storage is thread-safe.
+
+    :param path: directory to keep the files in. Will be created if it doesn't exist.
+    :param segment_size: size in bytes at which a new segment will be started
+    :param index_every: every which record's key should be kept in the sparse index
+    :param fsync_interval: maximum amount of seconds between fsyncs. 0 means fsync after
+        every write, None means fsync (and persist start entry, stop entry and synced up to)
+        only on :meth:`sync`, :meth:`close` and deletes.
+    :param dumps: callable to serialize a (key, value) tuple into bytes
+    :param loads: callable to deserialize a (key, value) tuple from bytes
+    """
+    __slots__ = ('path', 'segment_size', 'index_every', 'fsync_interval', 'dumps', 'loads',
+                 'segments', 'metadata', '_file', '_last_fsync', '_needs_fsync',
+                 '_metadata_dirty', '_fsync_timer')
+
+    def __init__(self, path: str, segment_size: int = 64 * 1024 * 1024,
+                 index_every: int = 64, fsync_interval: tp.Optional[float] = 1.0,
+                 dumps: tp.Callable[[KVTuple], bytes] = pickle.dumps,
+                 loads: tp.Callable[[bytes], KVTuple] = pickle.loads):
+        Monitor.__init__(self)
+        self.path = path
+        self.segment_size = segment_size
+        self.index_every = index_every
+        self.fsync_interval = fsync_interval
+        self.dumps = dumps
+        self.loads = loads
+        self.segments = []  # type: tp.List[_Segment]
+        self._file = None
+        self._last_fsync = time.monotonic()
+        self._needs_fsync = False
+        self._metadata_dirty = False
+        self._fsync_timer = None
+        os.makedirs(path, exist_ok=True)
+
+        metadata_path = os.path.join(path, _METADATA_FILE)
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'rb') as f_in:
+                self.metadata = pickle.load(f_in)  # type: tp.Dict[str, tp.Any]
+        else:
+            self.metadata = {'start_entry': None, 'stop_entry': None,
+                             'synced_up_to': None, 'deleted_up_to': None}
+
+        for name in sorted(os.listdir(path)):
+            if name.endswith(_SEGMENT_SUFFIX):
+                self._load_segment(name)
+        self._remove_deleted_segments()
+
+    def _load_segment(self, name: str) -> None:
+        segment = _Segment(os.path.join(self.path, name), int(name[:-len(_SEGMENT_SUFFIX)]))
+        file_size = os.path.getsize(segment.path)
+        if file_size:
+            with open(segment.path, 'rb') as f_in, \
+                    mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for offset, length, (key, _) in _read_records(buffer, 0, file_size, self.loads):
+                    segment.note_record(key, offset, length, self.index_every)
+        if segment.size < file_size:
+            # A record was only partly written, get rid of it
+            with open(segment.path, 'r+b') as f_out:
+                f_out.truncate(segment.size)
+        if segment.records:
+            self.segments.append(segment)
+        else:
+            os.unlink(segment.path)
+
+    def _is_deleted(self, key: K) -> bool:
+        deleted_up_to = self.metadata['deleted_up_to']
+        if deleted_up_to is None:
+            return False
+        key_deleted, inclusive = deleted_up_to
+        return key < key_deleted or (inclusive and key == key_deleted)
+
+    def _remove_deleted_segments(self) -> None:
+        while self.segments and self._is_deleted(self.segments[0].last_key):
+            segment = self.segments.pop(0)
+            if not self.segments and self._file is not None:
+                self._file.close()
+                self._file = None
+            os.unlink(segment.path)
+
+    def _write_metadata(self) -> None:
+        temp_path = os.path.join(self.path, _METADATA_FILE + '.tmp')
+        with open(temp_path, 'wb') as f_out:
+            pickle.dump(self.metadata, f_out)
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        os.replace(temp_path, os.path.join(self.path, _METADATA_FILE))
+        self._metadata_dirty = False
+
+    def _append(self, key: K, value: V) -> None:
+        if self.segments and not self.segments[-1].last_key < key:
+            raise ValueError('Keys must be put in ascending order')
+        if not self.segments or self.segments[-1].size >= self.segment_size:
+            number = self.segments[-1].number + 1 if self.segments else 0
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+            segment = _Segment(os.path.join(self.path, '%020d%s' % (number, _SEGMENT_SUFFIX)),
+                               number)
+            self.segments.append(segment)
+            self._file = open(segment.path, 'ab')
+        elif self._file is None:
+            self._file = open(self.segments[-1].path, 'ab')
+        data = self.dumps((key, value))
+        segment = self.segments[-1]
+        self._file.write(_HEADER.pack(len(data)))
+        self._file.write(data)
+        segment.note_record(key, segment.size, _HEADER.size + len(data), self.index_every)
+        self._needs_fsync = True
+
+    def _maybe_fsync(self) -> None:
+        if self.fsync_interval is None:
+            return
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._fsync()
+            if self._metadata_dirty:
+                self._write_metadata()
+        if self._needs_fsync or self._metadata_dirty:
+            self._schedule_fsync()
+
+    def _schedule_fsync(self) -> None:
+        """Must be called with the lock held"""
+        if self.fsync_interval is None or self._fsync_timer is not None:
+            return
+        from satella.coding.concurrent.timer import Timer
+        delay = max(self._last_fsync + self.fsync_interval - time.monotonic(), 0)
+        # fsync can take a while, so don't do it in the thread shared by all the timers
+        self._fsync_timer = Timer(delay, self._timed_fsync, spawn_separate=True)
+        self._fsync_timer.start()
+
+    @Monitor.synchronized
+    def _timed_fsync(self) -> None:
+        self._fsync_timer = None
+        self._fsync()
+        if self._metadata_dirty:
+            self._write_metadata()
+
+    def _cancel_timed_fsync(self) -> None:
+        if self._fsync_timer is not None:
+            self._fsync_timer.cancel()
+            self._fsync_timer = None
+
+    def _fsync(self) -> None:
+        if self._file is not None and self._needs_fsync:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._needs_fsync = False
+        self._last_fsync = time.monotonic()
+
+    @Monitor.synchronized
+    def put(self, key: K, value: V) -> None:
+        """
+        :raises ValueError: key was not greater than the last key put
+        """
+        self._append(key, value)
+        self._maybe_fsync()
+
+    @Monitor.synchronized
+    def put_many(self, items: tp.Sequence[KVTuple]) -> None:
+        """
+        :raises ValueError: keys were not greater than the last key put
+        """
+        for key, value in items:
+            self._append(key, value)
+        self._maybe_fsync()
+
+    def iterate(self, starting_key: tp.Optional[K]) -> tp.Iterator[KVTuple]:
+        with Monitor.acquire(self):
+            if self._file is not None:
+                self._file.flush()
+            if starting_key is None:
+                index = 0
+            else:
+                index = max(bisect.bisect_right([segment.first_key for segment in self.segments],
+                                                starting_key) - 1, 0)
+            segments = [(segment, segment.size) for segment in self.segments[index:]]
+        return self._iterate(segments, starting_key)
+
+    def _iterate(self, segments: tp.List[tp.Tuple[_Segment, int]],
+                 starting_key: tp.Optional[K]) -> tp.Iterator[KVTuple]:
+        for segment, size in segments:
+            try:
+                f_in = open(segment.path, 'rb')
+            except FileNotFoundError:  # deleted in the meantime
+                continue
+            try:
+                with mmap.mmap(f_in.fileno(), size, access=mmap.ACCESS_READ) as buffer:
+                    offset = segment.offset_for(starting_key)
+                    for _, _, (key, value) in _read_records(buffer, offset, size, self.loads):
+                        if starting_key is not None and key < starting_key:
+                            continue
+                        if self._is_deleted(key):
+                            continue
+                        yield key, value
+            finally:
+                f_in.close()
+
+    @Monitor.synchronized
+    def delete(self, key: K) -> None:
+        """
+        Delete given key, along with all the keys before it.
+        """
+        self.metadata['deleted_up_to'] = key, True
+        self._write_metadata()
+        self._remove_deleted_segments()
+
+    @Monitor.synchronized
+    def delete_range(self, start: K, stop: K) -> None:
+        """
+        Delete all the keys before stop. Since the log is append-only, start is ignored.
+        """
+        self.metadata['deleted_up_to'] = stop, False
+        self._write_metadata()
+        self._remove_deleted_segments()
+
+    @property
+    def start_entry(self) -> tp.Optional[K]:
+        """Last start entry reported by SyncableDroppable"""
+        return self.metadata['start_entry']
+
+    @property
+    def stop_entry(self) -> tp.Optional[K]:
+        """Last stop entry reported by SyncableDroppable"""
+        return self.metadata['stop_entry']
+
+    @property
+    def synced_up_to(self) -> tp.Optional[K]:
+        """Last synced up to reported by SyncableDroppable"""
+        return self.metadata['synced_up_to']
+
+    @Monitor.synchronized
+    def on_change_start_entry(self, start_entry: tp.Optional[K]) -> None:
+        self.metadata['start_entry'] = start_entry
+        self._metadata_dirty = True
+        self._maybe_fsync()
+
+    @Monitor.synchronized
+    def on_change_stop_entry(self, stop_entry: tp.Optional[K]) -> None:
+        self.metadata['stop_entry'] = stop_entry
+        self._metadata_dirty = True
+        self._maybe_fsync()
+
+    @Monitor.synchronized
+    def on_change_synced_up_to(self, synced_up_to: tp.Optional[K]) -> None:
+        self.metadata['synced_up_to'] = synced_up_to
+        self._metadata_dirty = True
+        self._maybe_fsync()
+
+    @Monitor.synchronized
+    def sync(self) -> None:
+        """
+        Make sure that everything is written to the disk
+        """
+        self._cancel_timed_fsync()
+        self._fsync()
+        self._write_metadata()
+
+    @Monitor.synchronized
+    def close(self) -> None:
+        """
+        Sync everything to the disk and close the files. The storage can be used afterwards,
+        it will reopen them.
+        """
+        self._cancel_timed_fsync()
+        self._fsync()
+        self._write_metadata()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,58 +1,184 @@
-import queue
+import collections
+import threading
+import time
 import typing as tp
 
-from satella.coding.concurrent.monitor import Monitor
-from satella.coding.recast_exceptions import silence_excs
 from satella.coding.typing import T
+from satella.exceptions import Empty
 
 
 class Subqueue(tp.Generic[T]):
     """
-    Or a named queue is a collection of thread safe queues identified by name
+    Or a named queue is a collection of thread safe queues identified by name.
+
+    Consumers can wait on all of the queues at once with :meth:`get_any` and
+    :meth:`get_any_batch`. Queues are drained fairly, using deficit round-robin: each non-empty
+    queue in turn gets to return up to it's weight of messages before the next one is
+    served. A queue of weight 2 will thus be served twice as often as a queue of weight 1,
+    if both of them have messages waiting. Weights can be fractional, a queue of weight 0.5
+    will be served every other turn.
+
+    :param weights: weights of particular queues
+    :param default_weight: weight of queues not given in weights
+    :raises ValueError: a weight was not positive
     """
+    __slots__ = ('subqueues', 'lock', 'any_condition', 'conditions', 'weights',
+                 'default_weight', 'active', 'deficits')
+
+    def __init__(self, weights: tp.Optional[tp.Dict[str, float]] = None,
+                 default_weight: float = 1):
+        if default_weight <= 0:
+            raise ValueError('Weight must be positive')
+        self.subqueues = {}  # type: tp.Dict[str, tp.Deque[T]]
+        self.lock = threading.Lock()
+        self.any_condition = threading.Condition(self.lock)
+        self.conditions = {}  # type: tp.Dict[str, threading.Condition]
+        self.weights = {}  # type: tp.Dict[str, float]
+        self.default_weight = default_weight
+        # names of non-empty queues, in the order they will be served
+        self.active = collections.deque()  # type: tp.Deque[str]
+        self.deficits = {}  # type: tp.Dict[str, float]
+        for queue_name, weight in (weights or {}).items():
+            self.set_weight(queue_name, weight)
+
+    @property
+    def subqueue_lock(self) -> threading.Lock:
+        """
+        Alias of lock, kept for backwards compatibility.
+        """
+        return self.lock
 
-    def __init__(self):
-        self.subqueues = {}  # type: tp.Dict[str, queue.Queue]
-        self.subqueue_lock = Monitor()
+    def set_weight(self, queue_name: str, weight: float) -> None:
+        """
+        Set the weight of a particular queue.
+
+        :raises ValueError: weight was not positive
+        """
+        if weight <= 0:
+            raise ValueError('Weight must be positive')
+        with self.lock:
+            self.weights[queue_name] = weight
+
+    def _assert_queue(self, queue_name: str) -> None:
+        if queue_name not in self.subqueues:
+            self.subqueues[queue_name] = collections.deque()
+            self.conditions[queue_name] = threading.Condition(self.lock)
+            self.deficits[queue_name] = 0
 
     def assert_queue(self, queue_name: str) -> None:
         """
         Assure that we have a queue with a particular name in the dictionary
         """
-        if queue_name not in self.subqueues:
-            with self.subqueue_lock:
-                if queue_name not in self.subqueues:  # double check for locking
-                    self.subqueues[queue_name] = queue.Queue()
+        with self.lock:
+            self._assert_queue(queue_name)
 
     def put(self, queue_name: str, obj: T) -> None:
         """
         Same semantics as queue.Queue.put
         """
-        self.assert_queue(queue_name)
-        self.subqueues[queue_name].put(obj)
+        with self.lock:
+            self._assert_queue(queue_name)
+            que = self.subqueues[queue_name]
+            if not que:
+                self.active.append(queue_name)
+            que.append(obj)
+            self.conditions[queue_name].notify()
+            self.any_condition.notify()
+
+    def _wait(self, condition: threading.Condition, predicate: tp.Callable[[], bool],
+              block: bool, timeout: tp.Optional[float]) -> None:
+        """Wait for predicate to become true. Must be called with the lock held."""
+        if not block:
+            timeout = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not predicate():
+            if deadline is None:
+                condition.wait()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Empty('No messages in the queue')
+                condition.wait(remaining)
+
+    def _take(self, queue_name: str) -> T:
+        que = self.subqueues[queue_name]
+        obj = que.popleft()
+        if not que:
+            self.active.remove(queue_name)
+            self.deficits[queue_name] = 0
+        return obj
+
+    def _take_fair(self) -> tp.Tuple[str, T]:
+        """Take the next message in deficit round-robin order. There must be any."""
+        while True:
+            queue_name = self.active[0]
+            if self.deficits[queue_name] < 1:
+                # this queue's turn begins
+                self.deficits[queue_name] += self.weights.get(queue_name,
+                                                              self.default_weight)
+                if self.deficits[queue_name] < 1:
+                    self.active.rotate(-1)
+                    continue
+            self.deficits[queue_name] -= 1
+            obj = self._take(queue_name)
+            if self.active and self.active[0] == queue_name and \
+                    self.deficits[queue_name] < 1:
+                self.active.rotate(-1)
+            return queue_name, obj
 
     def get(self, queue_name: str, block=True, timeout=None) -> T:
         """
         Same semantics at queue.Queue.get
+
+        :raises queue.Empty: no message was available in time
         """
-        self.assert_queue(queue_name)
-        return self.subqueues[queue_name].get(block, timeout)
+        with self.lock:
+            self._assert_queue(queue_name)
+            self._wait(self.conditions[queue_name], lambda: self.subqueues[queue_name],
+                       block, timeout)
+            return self._take(queue_name)
 
     def qsize(self) -> int:
         """Calculate the total of entries"""
-        return sum(que.qsize() for que in self.subqueues.values())
+        with self.lock:
+            return sum(len(que) for que in self.subqueues.values())
 
-    def get_any(self) -> tp.Tuple[str, T]:
+    def get_any(self, block: bool = False,
+                timeout: tp.Optional[float] = None) -> tp.Tuple[str, T]:
         """
         Return any message with name of the queue.
 
-        This assumes block=False
+        Messages are picked from the queues fairly, see the class description.
 
+        :param block: whether to wait for a message to appear
+        :param timeout: maximum amount of seconds to wait, None means wait indefinitely.
+            Applicable only if block is True.
         :return: a tuple of (queue_name, object)
-        :raises: queue.Empty()
+        :raises queue.Empty: no message was available in time
+        """
+        with self.lock:
+            self._wait(self.any_condition, lambda: self.active, block, timeout)
+            return self._take_fair()
+
+    def get_any_batch(self, max_items: int, block: bool = False,
+                      timeout: tp.Optional[float] = None) -> tp.List[tp.Tuple[str, T]]:
+        """
+        Return up to max_items messages from any of the queues, with names of their queues.
+
+        If block is True, this waits only for the first message to appear, and then returns
+        as many of them as are available. Messages are picked from the queues fairly, in the
+        same order in which consecutive calls to :meth:`get_any` would return them.
+
+        :param max_items: maximum amount of messages to return
+        :param block: whether to wait for a message to appear
+        :param timeout: maximum amount of seconds to wait, None means wait indefinitely.
+            Applicable only if block is True.
+        :return: a list of tuples of (queue_name, object)
+        :raises queue.Empty: no message was available in time
         """
-        for queue_name, q in self.subqueues.items():
-            with silence_excs(queue.Empty):
-                return queue_name, q.get(block=False)
-        else:
-            raise queue.Empty('No messages in any of the queues')
+        with self.lock:
+            self._wait(self.any_condition, lambda: self.active, block, timeout)
+            result = []
+            while self.active and len(result) < max_items:
+                result.append(self._take_fair())
+            return result
@@ -1,4 +1,5 @@
 import collections
+import itertools
 import typing as tp
 
 from satella.coding.typing import T
@@ -13,7 +14,15 @@ class Ranking(tp.Generic[T]):
     Positions are counted from 0, where 0 has the least key value.
 
     Essentially, this is a SortedList with the option to query at which position can be given
-    element found.
+    element found. Adding, removing, querying the position of an element and querying the
+    element at a position are all O(log n).
+
+    If the key of an element changes, call :meth:`update` (or :meth:`update_many` for a
+    batch of elements) to move it to its new position.
+
+    Elements are told apart by their identity, not by equality. Elements of equal keys are
+    ordered by a sequence number, so that finding one of them is a bisection too. Among them,
+    the most recently added one goes first.
 
     Example usage:
 
@@ -26,35 +35,86 @@ class Ranking(tp.Generic[T]):
     >>> assert ranking[-1] == e3    # Get the last element
     >>> assert ranking.get_position_of(e1) == 0
     """
-    __slots__ = ('items', 'key', 'ranking', 'element_to_position')
+    __slots__ = ('items', 'key', 'ranking', 'element_to_key', '_counter')
 
     def __init__(self, items: tp.List[T], key: tp.Callable[[T], int]):
         self.items = items
         self.key = key
-        self.ranking = SortedList(items, key=key)  # type: SortedList[T]
-        self.element_to_position = {}  # type: tp.Dict[int, int]
-        for position, item in enumerate(self.ranking):
-            self.element_to_position[id(item)] = position
+        self._counter = itertools.count()
+        # id of element -> (it's key, minus it's sequence number)
+        self.element_to_key = {}  # type: tp.Dict[int, tp.Tuple[int, int]]
+        # so that elements of equal keys keep the order in which they were given
+        for item in reversed(items):
+            self._assign_key(item)
+        self.ranking = SortedList(items, key=self._key_of)  # type: SortedList[T]
+
+    def _assign_key(self, item: T) -> None:
+        self.element_to_key[id(item)] = self.key(item), -next(self._counter)
+
+    def _key_of(self, item: T) -> tp.Tuple[int, int]:
+        return self.element_to_key[id(item)]
+
+    def _pop_key_of(self, item: T) -> tp.Tuple[int, int]:
+        try:
+            return self.element_to_key.pop(id(item))
+        except KeyError:
+            raise ValueError('%s is not in the ranking' % (item,))
 
     def calculate_ranking_for(self, item: T) -> int:
-        return self.element_to_position[id(item)]
+        return self.get_position_of(item)
+
+    def __len__(self) -> int:
+        return len(self.ranking)
+
+    def __contains__(self, item: T) -> bool:
+        return id(item) in self.element_to_key
 
     def add(self, item: T) -> None:
         """
         Add a single element to the ranking and recalculate it
         """
-        index = self.ranking.add(item)
-        for position, item in enumerate(self.ranking[index:], start=index):
-            self.element_to_position[id(item)] = position
+        self._assign_key(item)
+        self.ranking.add(item)
+
+    def add_many(self, items: tp.Iterable[T]) -> None:
+        """
+        Add multiple elements to the ranking at once
+        """
+        items = list(items)
+        for item in items:
+            self._assign_key(item)
+        self.ranking.extend(items)
 
     def remove(self, item: T) -> None:
         """
         Remove a single element from the ranking and recalculate it
+
+        :raises ValueError: this element is not in the ranking
+        """
+        self.ranking.remove(item, self._pop_key_of(item))
+
+    def update(self, item: T) -> None:
+        """
+        Notify the ranking that the key of given element has changed, and move it to
+        its new position.
+
+        :raises ValueError: this element is not in the ranking
+        """
+        self.remove(item)
+        self.add(item)
+
+    def update_many(self, items: tp.Iterable[T]) -> None:
+        """
+        Notify the ranking that the keys of given elements have changed.
+
+        This is faster than calling :meth:`update` for each of them.
+
+        :raises ValueError: one of the elements is not in the ranking
         """
-        index = self.ranking.index(item)
-        self.ranking.remove(item)
-        for position, item in enumerate(self.ranking[index:], start=index):
-            self.element_to_position[id(item)] = position
+        items = list(items)
+        for item in items:
+            self.remove(item)
+        self.add_many(items)
 
     def get_position_of(self, item: T) -> int:
         """
@@ -64,7 +124,11 @@ class Ranking(tp.Generic[T]):
         :return: position
         :raises ValueError: this element is not in the ranking
         """
-        return self.ranking.index(item)
+        try:
+            key_value = self.element_to_key[id(item)]
+        except KeyError:
+            raise ValueError('%s is not in the ranking' % (item,))
+        return self.ranking.index(item, key_value)
 
     def __getitem__(self, item: int) -> T:
         """
@@ -1,4 +1,7 @@
+import bisect
 import collections
+import heapq
+import itertools
 import typing as tp
 
 from satella.coding.typing import T
@@ -12,63 +15,336 @@ class SortedList(tp.Generic[T]):
 
     list[0] will have the smallest element, and list[-1] the biggest.
 
-    Addition is O(n) worst-case, so is deletion.
+    Elements are kept in a list of sorted sublists of roughly `load` elements each, with
+    a Fenwick tree over their lengths. This makes searching, positional access, addition
+    and deletion O(log n), plus the cost of a list insertion into a single sublist.
+
+    Elements that have the same key are kept in order of their addition, with the most
+    recently added one being the first.
 
     :param items: items to construct the list with
     :param key: a callable[T]->int that builds the key of the sort
+    :param load: target length of a single sublist
     """
-    __slots__ = ('items', 'keys', 'key')
+    __slots__ = ('key', 'load', '_lists', '_keys', '_maxes', '_tree', '_len')
+
+    DEFAULT_LOAD = 1000
 
-    def __init__(self, items: tp.Iterable[T] = (), key: tp.Callable[[T], int] = lambda a: a):
-        sort = sorted((key(item), item) for item in items)
-        self.items = SliceableDeque(a[1] for a in sort)  # type: SliceableDeque[T]
-        self.keys = collections.deque(a[0] for a in sort)  # type: collections.deque[int]
+    def __init__(self, items: tp.Iterable[T] = (), key: tp.Callable[[T], int] = lambda a: a,
+                 load: int = DEFAULT_LOAD):
         self.key = key  # type: tp.Callable[[T], int]
+        self.load = max(load, 4)  # type: int
+        self._build(sorted(((key(item), item) for item in items), key=lambda a: a[0]))
+
+    def _build(self, sort: tp.List[tp.Tuple[int, T]]) -> None:
+        """Rebuild all the sublists from a list of (key, item), sorted by key"""
+        self._lists = []  # type: tp.List[tp.List[T]]
+        self._keys = []  # type: tp.List[tp.List[int]]
+        self._maxes = []  # type: tp.List[int]
+        self._tree = None  # type: tp.Optional[tp.List[int]]
+        self._len = len(sort)  # type: int
+        for i in range(0, len(sort), self.load):
+            chunk = sort[i:i + self.load]
+            self._lists.append([a[1] for a in chunk])
+            self._keys.append([a[0] for a in chunk])
+            self._maxes.append(chunk[-1][0])
+
+    def _get_tree(self) -> tp.List[int]:
+        """Return the Fenwick tree over sublist lengths, building it if it was invalidated"""
+        if self._tree is None:
+            tree = [0] + [len(lst) for lst in self._lists]
+            size = len(tree)
+            for i in range(1, size):
+                parent = i + (i & -i)
+                if parent < size:
+                    tree[parent] += tree[i]
+            self._tree = tree
+        return self._tree
+
+    def _tree_add(self, pos: int, delta: int) -> None:
+        if self._tree is None:
+            return
+        tree = self._tree
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _loc(self, pos: int, idx: int) -> int:
+        """Convert a (sublist, index in sublist) pair into a global index"""
+        tree = self._get_tree()
+        total = idx
+        i = pos
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _pos(self, index: int) -> tp.Tuple[int, int]:
+        """
+        Convert a global index into a (sublist, index in sublist) pair
+
+        :raises IndexError: index out of range
+        """
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('list index out of range')
+        tree = self._get_tree()
+        pos = 0
+        step = 1 << (len(tree).bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt < len(tree) and tree[nxt] <= index:
+                index -= tree[nxt]
+                pos = nxt
+            step >>= 1
+        return pos, index
+
+    def _find(self, key_value: int, other: T) -> tp.Tuple[int, int]:
+        """
+        Locate given element, knowing its key.
+
+        The very same object is preferred over one that is merely equal to it.
+
+        :return: a (sublist, index in sublist) pair
+        :raises ValueError: element not in list
+        """
+        equal = None
+        pos = bisect.bisect_left(self._maxes, key_value)
+        while pos < len(self._maxes):
+            keys = self._keys[pos]
+            lst = self._lists[pos]
+            idx = bisect.bisect_left(keys, key_value)
+            while idx < len(keys) and keys[idx] == key_value:
+                if lst[idx] is other:
+                    return pos, idx
+                if equal is None and lst[idx] == other:
+                    equal = pos, idx
+                idx += 1
+            if idx < len(keys):
+                break
+            pos += 1
+        if equal is None:
+            raise ValueError('%s is not in list' % (other,))
+        return equal
+
+    def _delete(self, pos: int, idx: int) -> T:
+        """Remove the element at given (sublist, index in sublist) and return it"""
+        lst = self._lists[pos]
+        keys = self._keys[pos]
+        item = lst.pop(idx)
+        del keys[idx]
+        self._len -= 1
+        if not lst:
+            del self._lists[pos]
+            del self._keys[pos]
+            del self._maxes[pos]
+            self._tree = None
+            return item
+
+        self._maxes[pos] = keys[-1]
+        if len(lst) < self.load // 2 and len(self._lists) > 1:
+            # Join with a neighbour, splitting again if that overflows
+            if pos == 0:
+                pos = 1
+            self._lists[pos - 1].extend(self._lists.pop(pos))
+            self._keys[pos - 1].extend(self._keys.pop(pos))
+            del self._maxes[pos]
+            self._maxes[pos - 1] = self._keys[pos - 1][-1]
+            self._tree = None
+            self._split(pos - 1)
+        else:
+            self._tree_add(pos, -1)
+        return item
+
+    def _split(self, pos: int) -> None:
+        """Split given sublist in half if it has grown too large"""
+        lst = self._lists[pos]
+        if len(lst) <= 2 * self.load:
+            return
+        keys = self._keys[pos]
+        half = len(lst) // 2
+        self._lists.insert(pos + 1, lst[half:])
+        self._keys.insert(pos + 1, keys[half:])
+        del lst[half:]
+        del keys[half:]
+        self._maxes.insert(pos, keys[-1])
+        self._tree = None
+
+    @property
+    def items(self) -> tp.List[T]:
+        """
+        All the elements, in order, as a new list.
+
+        This is built on every access, iterate over the list itself instead.
+        """
+        return list(itertools.chain.from_iterable(self._lists))
+
+    @property
+    def keys(self) -> tp.List[int]:
+        """
+        Keys of all the elements, in order, as a new list.
+
+        This is built on every access.
+        """
+        return list(itertools.chain.from_iterable(self._keys))
 
     def __bool__(self) -> bool:
-        return bool(self.items)
+        return self._len > 0
 
     def __contains__(self, item: T) -> bool:
-        return item in self.items
+        try:
+            self._find(self.key(item), item)
+            return True
+        except ValueError:
+            return False
 
     def pop(self) -> T:
-        """Return the highest element, removing it from the list"""
-        self.keys.pop()
-        return self.items.pop()
+        """
+        Return the highest element, removing it from the list
+
+        :raises IndexError: list is empty
+        """
+        if not self._len:
+            raise IndexError('pop from an empty list')
+        return self._delete(len(self._lists) - 1, len(self._lists[-1]) - 1)
 
     def popleft(self) -> T:
-        """Return the smallest element, removing it from the list"""
-        self.keys.popleft()
-        return self.items.popleft()
+        """
+        Return the smallest element, removing it from the list
+
+        :raises IndexError: list is empty
+        """
+        if not self._len:
+            raise IndexError('pop from an empty list')
+        return self._delete(0, 0)
 
     def __iter__(self) -> tp.Iterator[T]:
-        return iter(self.items)
+        return itertools.chain.from_iterable(self._lists)
+
+    def __reversed__(self) -> tp.Iterator[T]:
+        for lst in reversed(self._lists):
+            yield from reversed(lst)
 
     def __len__(self) -> int:
-        return len(self.items)
+        return self._len
+
+    def index(self, other: T, key_value: tp.Optional[int] = None) -> int:
+        """
+        Return index at which given value has been placed
+
+        :param other: element to look for
+        :param key_value: key that the element was added with, if it has changed since.
+            Default is to calculate it.
+        :raises ValueError: element not in list
+        """
+        if key_value is None:
+            key_value = self.key(other)
+        return self._loc(*self._find(key_value, other))
+
+    def bisect_key_left(self, key_value: int) -> int:
+        """
+        Return the index at which the first element with key not smaller than given one is
+        """
+        pos = bisect.bisect_left(self._maxes, key_value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._loc(pos, bisect.bisect_left(self._keys[pos], key_value))
+
+    def bisect_key_right(self, key_value: int) -> int:
+        """
+        Return the index at which the first element with key greater than given one is
+        """
+        pos = bisect.bisect_right(self._maxes, key_value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._loc(pos, bisect.bisect_right(self._keys[pos], key_value))
+
+    def irange(self, min_key: tp.Optional[int] = None,
+               max_key: tp.Optional[int] = None) -> tp.Iterator[T]:
+        """
+        Iterate, in order, over elements whose key is between min_key and max_key, inclusive.
 
-    def index(self, other: T) -> int:
-        """Return index at which given value has been placed"""
-        return self.items.index(other)
+        :param min_key: minimum key. None means no lower bound
+        :param max_key: maximum key. None means no upper bound
+        """
+        if min_key is None:
+            pos, idx = 0, 0
+        else:
+            pos = bisect.bisect_left(self._maxes, min_key)
+            if pos == len(self._maxes):
+                return
+            idx = bisect.bisect_left(self._keys[pos], min_key)
+
+        while pos < len(self._lists):
+            lst = self._lists[pos]
+            if max_key is None or self._maxes[pos] <= max_key:
+                yield from lst[idx:]
+            else:
+                stop = bisect.bisect_right(self._keys[pos], max_key)
+                yield from lst[idx:stop]
+                return
+            pos += 1
+            idx = 0
 
     def extend(self, elements: tp.Iterable[T]):
-        """Adds multiple elements to this list"""
-        for elem in elements:
-            self.add(elem)
+        """
+        Adds multiple elements to this list.
+
+        Elements are sorted once. If there is a lot of them compared to the size of this list,
+        they are merged with current contents in a single pass.
+        """
+        new = [(self.key(elem), elem) for elem in elements]
+        if len(new) * 8 < self._len:
+            for key_value, elem in new:
+                self._add(key_value, elem)
+            return
+        # same as adding them one by one: among equal keys, the most recently added goes first,
+        # and the new elements go before the ones already present, which heapq.merge keeps
+        new.reverse()
+        new.sort(key=lambda a: a[0])
+        current = zip(itertools.chain.from_iterable(self._keys),
+                      itertools.chain.from_iterable(self._lists))
+        self._build(list(heapq.merge(new, current, key=lambda a: a[0])))
 
     def __getitem__(self, item: tp.Union[slice, int]) -> tp.Union[T, tp.Iterator[T]]:
-        return self.items[item]
+        """
+        Return either one element, or an iterator over a slice
 
-    def remove(self, other: T) -> None:
+        :raises IndexError: index out of range
+        """
+        if type(item) is slice:
+            return self._slice(*item.indices(self._len))
+        pos, idx = self._pos(item)
+        return self._lists[pos][idx]
+
+    def _slice(self, start: int, stop: int, step: int) -> tp.Iterator[T]:
+        if step != 1 or start >= stop:
+            for index in range(start, stop, step):
+                yield self[index]
+            return
+        pos, idx = self._pos(start)
+        remaining = stop - start
+        while remaining > 0:
+            part = self._lists[pos][idx:idx + remaining]
+            yield from part
+            remaining -= len(part)
+            pos += 1
+            idx = 0
+
+    def remove(self, other: T, key_value: tp.Optional[int] = None) -> None:
         """
         Remove an element from the list
 
         :param other: element to remove
+        :param key_value: key that the element was added with, if it has changed since.
+            Default is to calculate it.
         :raises ValueError: element not in list
         """
-        index = self.items.index(other)  # throws ValueError
-        del self.items[index]
-        del self.keys[index]
+        if key_value is None:
+            key_value = self.key(other)
+        self._delete(*self._find(key_value, other))
 
     def add(self, other: T) -> int:
         """
@@ -77,17 +353,29 @@ class SortedList(tp.Generic[T]):
         :param other: element to insert
         :return: index that the entry is available now at
         """
-        key_value = self.key(other)
-
-        for index in range(len(self.keys)):
-            if key_value <= self.keys[index]:
-                break
+        return self._add(self.key(other), other)
+
+    def _add(self, key_value: int, other: T) -> int:
+        self._len += 1
+        if not self._maxes:
+            self._lists.append([other])
+            self._keys.append([key_value])
+            self._maxes.append(key_value)
+            self._tree = None
+            return 0
+
+        pos = bisect.bisect_left(self._maxes, key_value)
+        if pos == len(self._maxes):
+            pos -= 1
+            idx = len(self._keys[pos])
+            self._maxes[pos] = key_value
         else:
-            index = len(self.keys)
-
-        self.items.insert(index, other)
-        self.keys.insert(index, key_value)
-
+            idx = bisect.bisect_left(self._keys[pos], key_value)
+        self._lists[pos].insert(idx, other)
+        self._keys[pos].insert(idx, key_value)
+        self._tree_add(pos, 1)
+        index = self._loc(pos, idx)
+        self._split(pos)
         return index
 
 
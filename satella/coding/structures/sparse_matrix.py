@@ -4,9 +4,19 @@ import typing as tp
 from satella.coding.recast_exceptions import silence_excs
 from satella.coding.typing import T
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 KeyArg = tp.Tuple[tp.Union[int, slice], tp.Union[int, slice]]
 
 
+def _require_numpy() -> None:
+    if numpy is None:
+        raise ImportError('numpy is required for this, install satella[numpy]')
+
+
 def _cleanup_key(inst: tp.Union[int, slice], max_count: int):
     if isinstance(inst, slice):
         if not (inst.start is None and inst.stop is None and inst.step is None):
@@ -53,36 +63,106 @@ class SparseMatrix(tp.Generic[T]):
     """
     __slots__ = ('rows_dict', 'known_column_count', 'no_cols', 'no_rows')
 
+    def _values(self) -> tp.Iterator[T]:
+        """Iterate over all defined (ie. non-None) elements, in no particular order"""
+        for cols in self.rows_dict.values():
+            yield from cols.values()
+
     def max(self) -> T:
         """
         Return maximum element.
 
         None elements will be ignored.
+
+        :raises ValueError: matrix has no elements
         """
-        item = self[0, 0]
-        for row in self:
-            for value in row:
-                if value is None:
-                    continue
-                if value > item:
-                    item = value
-        return item
+        return max(self._values())
 
     def min(self) -> T:
         """
         Return minimum element.
 
+        None elements will be ignored.
+
+        :raises ValueError: matrix has no elements
+        """
+        return min(self._values())
+
+    def sum(self) -> T:
+        """
+        Return the sum of all elements.
+
         None elements will be ignored.
         """
-        item = self[0, 0]
-        for row in self:
-            for value in row:
-                if value is None:
-                    continue
+        return sum(self._values())
+
+    def apply(self, fun: tp.Callable[[T], T]) -> None:
+        """
+        Replace every defined element with fun(element), in place.
+
+        None elements will be ignored.
+        """
+        for cols in self.rows_dict.values():
+            for col_no, value in cols.items():
+                cols[col_no] = fun(value)
+
+    def to_coo(self) -> tp.Tuple['numpy.ndarray', 'numpy.ndarray', 'numpy.ndarray']:
+        """
+        Return the defined elements as three numpy arrays: columns, rows and values.
+
+        Elements are ordered by row, and then by column.
+
+        :raises ImportError: numpy is not installed
+        """
+        _require_numpy()
+        cols, rows, values = [], [], []
+        for row_no in sorted(self.rows_dict):
+            row = self.rows_dict[row_no]
+            for col_no in sorted(row):
+                cols.append(col_no)
+                rows.append(row_no)
+                values.append(row[col_no])
+        return numpy.array(cols, dtype=numpy.intp), numpy.array(rows, dtype=numpy.intp), \
+            numpy.array(values)
+
+    def to_numpy(self, fill_value=0, dtype=None) -> 'numpy.ndarray':
+        """
+        Return this matrix as a dense numpy array of shape (rows, columns)
+
+        :param fill_value: value to put in place of undefined elements
+        :param dtype: dtype of the array. Default is to infer it from the values
+        :raises ImportError: numpy is not installed
+        """
+        return self.to_compact().to_numpy(fill_value, dtype)
+
+    def to_scipy(self, format: str = 'csr'):
+        """
+        Return this matrix as a scipy sparse matrix
 
-                if value < item:
-                    item = value
-        return item
+        :param format: format of the matrix, eg. 'csr', 'csc' or 'coo'
+        :raises ImportError: numpy or scipy is not installed
+        """
+        return self.to_compact().to_scipy(format)
+
+    def to_compact(self) -> 'CompactSparseMatrix':
+        """
+        Return a copy of this matrix as a :class:`CompactSparseMatrix`
+
+        :raises ImportError: numpy is not installed
+        """
+        cols, rows, values = self.to_coo()
+        return CompactSparseMatrix(cols, rows, values, self.no_cols, self.no_rows)
+
+    @classmethod
+    def from_numpy(cls, array: 'numpy.ndarray', skip_value=None) -> 'SparseMatrix':
+        """
+        Construct a sparse matrix from a 2D numpy array of shape (rows, columns)
+
+        :param array: array to construct the matrix from
+        :param skip_value: elements equal to this value won't be stored. NaNs are never stored.
+        :raises ImportError: numpy is not installed
+        """
+        return CompactSparseMatrix.from_numpy(array, skip_value).to_sparse_matrix()
 
     def __init__(self, matrix_data: tp.Optional[tp.List[tp.List[T]]] = None):
         self.rows_dict = collections.defaultdict(lambda: collections.defaultdict(lambda: None))
@@ -336,3 +416,204 @@ class SparseMatrix(tp.Generic[T]):
 
             self.no_cols = self._calculate_column_count()
             self.no_rows = self._calculate_row_count()
+
+
+class CompactSparseMatrix(tp.Generic[T]):
+    """
+    A sparse matrix of fixed size that keeps its elements in three numpy arrays (COO format),
+    sorted by row and then by column. Use it for very large matrices, where a dictionary
+    entry per element would take too much memory.
+
+    Elements are looked up by binary search, and all bulk operations are vectorized.
+
+    This requires numpy. scipy is additionally required for :meth:`to_scipy`.
+
+    >>> csm = CompactSparseMatrix.from_numpy(numpy.array([[1, 0], [0, 4]]), skip_value=0)
+    >>> assert csm[1, 1] == 4
+    >>> assert csm[0, 1] is None
+
+    :param cols: column numbers of elements
+    :param rows: row numbers of elements
+    :param values: values of elements
+    :param no_cols: amount of columns. Default is to infer it from cols
+    :param no_rows: amount of rows. Default is to infer it from rows
+    :raises ImportError: numpy is not installed
+    """
+    __slots__ = ('col_indices', 'row_indices', 'values', 'no_cols', 'no_rows', '_flat')
+
+    def __init__(self, cols, rows, values, no_cols: tp.Optional[int] = None,
+                 no_rows: tp.Optional[int] = None):
+        _require_numpy()
+        cols = numpy.asarray(cols, dtype=numpy.intp)
+        rows = numpy.asarray(rows, dtype=numpy.intp)
+        values = numpy.asarray(values)
+        if not (len(cols) == len(rows) == len(values)):
+            raise ValueError('cols, rows and values must have the same length')
+        if no_cols is None:
+            no_cols = int(cols.max()) + 1 if len(cols) else 0
+        if no_rows is None:
+            no_rows = int(rows.max()) + 1 if len(rows) else 0
+        self.no_cols = no_cols  # type: int
+        self.no_rows = no_rows  # type: int
+        order = numpy.lexsort((cols, rows))
+        self.col_indices = cols[order]
+        self.row_indices = rows[order]
+        self.values = values[order]
+        self._flat = self.row_indices * max(no_cols, 1) + self.col_indices
+
+    @classmethod
+    def from_numpy(cls, array: 'numpy.ndarray', skip_value=None) -> 'CompactSparseMatrix':
+        """
+        Construct a compact sparse matrix from a 2D numpy array of shape (rows, columns)
+
+        :param array: array to construct the matrix from
+        :param skip_value: elements equal to this value won't be stored. NaNs and Nones are
+            never stored.
+        :raises ImportError: numpy is not installed
+        """
+        _require_numpy()
+        array = numpy.asarray(array)
+        if array.ndim != 2:
+            raise ValueError('a 2D array is required')
+        if array.dtype.kind in 'fc':
+            mask = ~numpy.isnan(array)
+        elif array.dtype.kind == 'O':
+            mask = numpy.not_equal(array, None)
+        else:
+            mask = numpy.ones(array.shape, dtype=bool)
+        if skip_value is not None:
+            mask &= numpy.not_equal(array, skip_value)
+        rows, cols = numpy.nonzero(mask)
+        return cls(cols, rows, array[rows, cols], array.shape[1], array.shape[0])
+
+    @property
+    def columns(self) -> int:
+        """Return the amount of columns"""
+        return self.no_cols
+
+    @property
+    def rows(self) -> int:
+        """Return the amount of rows"""
+        return self.no_rows
+
+    def __len__(self) -> int:
+        return self.no_rows
+
+    def __eq__(self, other: 'CompactSparseMatrix') -> bool:
+        if not isinstance(other, CompactSparseMatrix):
+            return NotImplemented
+        return self.no_cols == other.no_cols and self.no_rows == other.no_rows and \
+               numpy.array_equal(self._flat, other._flat) and \
+               numpy.array_equal(self.values, other.values)
+
+    def __getitem__(self, item: tp.Tuple[int, int]) -> tp.Optional[T]:
+        """
+        Return a single element, or None if it is not defined
+
+        :param item: a tuple of (column, row). Negative indices are supported.
+        :raises IndexError: index out of range
+        """
+        col, row = item
+        if col < 0:
+            col += self.no_cols
+        if row < 0:
+            row += self.no_rows
+        if not (0 <= col < self.no_cols and 0 <= row < self.no_rows):
+            raise IndexError()
+        flat = row * self.no_cols + col
+        index = int(numpy.searchsorted(self._flat, flat))
+        if index == len(self._flat) or self._flat[index] != flat:
+            return None
+        return self.values[index:index + 1].tolist()[0]
+
+    def get_row(self, row_no: int) -> tp.List[T]:
+        """
+        Return a single row of provided number, with None in place of undefined elements.
+
+        :param row_no: row number, numbered from 0
+        """
+        start, stop = numpy.searchsorted(self.row_indices, [row_no, row_no + 1])
+        output = [None] * self.no_cols
+        for col_no, value in zip(self.col_indices[start:stop].tolist(),
+                                 self.values[start:stop].tolist()):
+            output[col_no] = value
+        return output
+
+    def __iter__(self) -> tp.Iterator[tp.List[T]]:
+        return (self.get_row(i) for i in range(self.no_rows))
+
+    def max(self) -> T:
+        """
+        Return maximum element.
+
+        :raises ValueError: matrix has no elements
+        """
+        return self.values.max()
+
+    def min(self) -> T:
+        """
+        Return minimum element.
+
+        :raises ValueError: matrix has no elements
+        """
+        return self.values.min()
+
+    def sum(self) -> T:
+        """Return the sum of all elements"""
+        return self.values.sum()
+
+    def apply(self, fun: tp.Callable[['numpy.ndarray'], 'numpy.ndarray']) -> None:
+        """
+        Replace the values of all elements with fun(values), in place.
+
+        :param fun: a vectorized function, that will be called with the array of all
+            values and has to return an array of the same length
+        """
+        values = numpy.asarray(fun(self.values))
+        if values.shape != self.values.shape:
+            raise ValueError('fun must return an array of the same shape')
+        self.values = values
+
+    def to_coo(self) -> tp.Tuple['numpy.ndarray', 'numpy.ndarray', 'numpy.ndarray']:
+        """
+        Return the elements as three numpy arrays: columns, rows and values.
+
+        Elements are ordered by row, and then by column.
+        """
+        return self.col_indices, self.row_indices, self.values
+
+    def to_numpy(self, fill_value=0, dtype=None) -> 'numpy.ndarray':
+        """
+        Return this matrix as a dense numpy array of shape (rows, columns)
+
+        :param fill_value: value to put in place of undefined elements
+        :param dtype: dtype of the array. Default is to infer it from the values
+        """
+        if dtype is None:
+            dtype = numpy.result_type(self.values, numpy.asarray(fill_value))
+        output = numpy.full((self.no_rows, self.no_cols), fill_value, dtype=dtype)
+        output[self.row_indices, self.col_indices] = self.values
+        return output
+
+    def to_scipy(self, format: str = 'csr'):
+        """
+        Return this matrix as a scipy sparse matrix
+
+        :param format: format of the matrix, eg. 'csr', 'csc' or 'coo'
+        :raises ImportError: scipy is not installed
+        """
+        import scipy.sparse
+        coo = scipy.sparse.coo_matrix((self.values, (self.row_indices, self.col_indices)),
+                                      shape=(self.no_rows, self.no_cols))
+        return coo.asformat(format)
+
+    def to_sparse_matrix(self) -> SparseMatrix:
+        """Return a copy of this matrix as a :class:`SparseMatrix`"""
+        sm = SparseMatrix()
+        for col_no, row_no, value in zip(self.col_indices.tolist(), self.row_indices.tolist(),
+                                         self.values.tolist()):
+            sm.rows_dict[row_no][col_no] = value
+            sm._increment_column_count(col_no)
+        sm.no_cols = sm._calculate_column_count()
+        sm.no_rows = sm._calculate_row_count()
+        return sm
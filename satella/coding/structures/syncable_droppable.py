@@ -1,13 +1,39 @@
-import bisect
 import itertools
 import math
+import threading
 from abc import ABCMeta, abstractmethod
 import typing as tp
 
-from satella.coding.concurrent.monitor import RMonitor
+from satella.coding.concurrent.monitor import RMonitor, Monitor
+from satella.coding.concurrent.thread import IntervalTerminableThread
 from satella.coding.recast_exceptions import silence_excs
 from satella.coding.sequences import try_close
 from satella.coding.typing import V, K, KVTuple
+from satella.time import measure
+
+
+def _bisect_left(data: tp.Sequence[KVTuple], key: K) -> int:
+    """bisect.bisect_left over the keys of a sorted sequence of KVTuples"""
+    lo, hi = 0, len(data)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if data[mid][0] < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _bisect_right(data: tp.Sequence[KVTuple], key: K) -> int:
+    """bisect.bisect_right over the keys of a sorted sequence of KVTuples"""
+    lo, hi = 0, len(data)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key < data[mid][0]:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
 
 
 class DBStorage(metaclass=ABCMeta):
@@ -30,6 +56,20 @@ class DBStorage(metaclass=ABCMeta):
         :param value: value to store
         """
 
+    def put_many(self, items: tp.Sequence[KVTuple]) -> None:
+        """
+        Put multiple values to storage. They will be sorted by key ascending.
+
+        This may block for a while.
+
+        By default this calls :meth:`put` for every item. Override it if your database
+        supports bulk inserts.
+
+        :param items: a sequence of (key, value) to store
+        """
+        for key, value in items:
+            self.put(key, value)
+
     @abstractmethod
     def iterate(self, starting_key: tp.Optional[K]) -> tp.Iterator[KVTuple]:
         """
@@ -78,6 +118,26 @@ class DBStorage(metaclass=ABCMeta):
         :param key: key to remove
         """
 
+    def delete_range(self, start: K, stop: K) -> None:
+        """
+        Called by SyncableDroppable when there's a need to remove all keys from start (included)
+        to stop (excluded).
+
+        By default this finds these keys with :meth:`iterate` and calls :meth:`delete` for each
+        one of them. Override it if your database can delete a range of keys at once.
+
+        :param start: first key to remove
+        :param stop: key to stop at, it won't be removed
+        """
+        iterator = self.iterate(start)
+        try:
+            keys = list(itertools.takewhile(lambda key: key < stop,
+                                            (kv[0] for kv in iterator)))
+        finally:
+            try_close(iterator)
+        for key in keys:
+            self.delete(key)
+
 
 class SyncableDroppable(RMonitor, tp.Generic[K, V]):
     """
@@ -88,7 +148,14 @@ class SyncableDroppable(RMonitor, tp.Generic[K, V]):
     For brevity, this will refer to keys as timestamps. The keys must be __eq__able, comparable
     and subtractable.
 
-    A rule is that an item can never be both in memory and in the DB.
+    A rule is that an item can never be both in memory and in the DB. The only exception is
+    when it is being written to the DB: it is then removed from memory just after the write
+    completes.
+
+    The lock of this monitor is held only to update the bookkeeping, DB I/O is done outside of
+    it, so that :meth:`on_new_data` does not wait for the DB. Only a single DB operation
+    is done at a time. To run the cleanups periodically in the background, use
+    :class:`~satella.coding.structures.SyncableDroppableWorker`.
 
     :param db_storage: a DBStorage implementation of your own provision, that serves as class'
         interface with the database
@@ -106,7 +173,8 @@ class SyncableDroppable(RMonitor, tp.Generic[K, V]):
               :meth:`~satella.coding.structures.SyncableDroppable.cleanup`
     """
     __slots__ = ('db_storage', '_start_entry', '_stop_entry', '_synced_up_to', 'data_in_memory',
-                 'span_to_keep_in_memory', 'span_to_keep_in_db')
+                 'span_to_keep_in_memory', 'span_to_keep_in_db', '_doing_io', '_io_done',
+                 '_write_outs')
 
     def __init__(self, db_storage: DBStorage, start_entry: tp.Optional[K],
                  stop_entry: tp.Optional[K], synced_up_to: tp.Optional[K],
@@ -121,6 +189,10 @@ class SyncableDroppable(RMonitor, tp.Generic[K, V]):
         self.data_in_memory = []                                  # type: tp.List[KVTuple]
         self.span_to_keep_in_db = span_to_keep_in_db              # type: K
         self.span_to_keep_in_memory = span_to_keep_in_memory      # type: K
+        self._doing_io = False                                    # type: bool
+        self._io_done = threading.Condition(self._monitor_lock)   # type: threading.Condition
+        # amount of times entries were moved from memory onto the DB
+        self._write_outs = 0                                      # type: int
 
     @property
     def start_entry(self) -> tp.Optional[K]:
@@ -149,14 +221,46 @@ class SyncableDroppable(RMonitor, tp.Generic[K, V]):
         self._stop_entry = v
         self.db_storage.on_change_stop_entry(v)
 
-    @RMonitor.synchronized
+    def _start_io(self) -> None:
+        """Wait until no other DB operation is in progress and mark one as started"""
+        while self._doing_io:
+            self._io_done.wait()
+        self._doing_io = True
+
+    def _finish_io(self) -> None:
+        self._doing_io = False
+        self._io_done.notify_all()
+
+    def _write_out(self, cutoff: tp.Optional[K]) -> None:
+        """
+        Move entries of keys up to cutoff (included) from memory onto the DB.
+
+        The lock is held only to take these entries and to remove them afterwards.
+
+        :param cutoff: maximum key to move, or None to move everything
+        """
+        with Monitor.acquire(self):
+            self._start_io()
+            if cutoff is None:
+                to_write = self.data_in_memory[:]
+            else:
+                to_write = self.data_in_memory[:_bisect_right(self.data_in_memory, cutoff)]
+        try:
+            if to_write:
+                self.db_storage.put_many(to_write)
+        finally:
+            with Monitor.acquire(self):
+                if to_write:
+                    del self.data_in_memory[:_bisect_right(self.data_in_memory,
+                                                           to_write[-1][0])]
+                    self._write_outs += 1
+                self._finish_io()
+
     def sync_to_db(self) -> None:
         """
         Make sure that everything's that in memory in also stored in the DB.
         """
-        for key, value in self.data_in_memory:
-            self.db_storage.put(key, value)
-        self.data_in_memory = []
+        self._write_out(None)
 
     def cleanup(self) -> None:
         """
@@ -174,29 +278,36 @@ class SyncableDroppable(RMonitor, tp.Generic[K, V]):
 
         :return: if all entries in the DB have been trashed
         """
-        if self.start_entry is None:
-            return False
-        cutoff_span = self.stop_entry - self.span_to_keep_in_db
-        iterator = self.db_storage.iterate(self.start_entry)
+        with Monitor.acquire(self):
+            if self.start_entry is None:
+                return False
+            self._start_io()
+            start_entry = self.start_entry
+            cutoff_span = self.stop_entry - self.span_to_keep_in_db
+
         try:
-            for key, value in iterator:
-                if key < cutoff_span:
-                    self.db_storage.delete(key)
-                else:
-                    self.start_entry = key
-                    break
-            else:
+            iterator = self.db_storage.iterate(cutoff_span)
+            try:
+                new_start = next(iter(iterator), None)
+            finally:
+                try_close(iterator)
+            self.db_storage.delete_range(start_entry, cutoff_span)
+
+            with Monitor.acquire(self):
+                if new_start is not None:
+                    self.start_entry = new_start[0]
+                    return False
+
                 # This means that we have wiped entire DB
                 if self.data_in_memory:
                     self.start_entry = self.data_in_memory[0][0]
-                    self.db_storage.on_change_start_entry(self.start_entry)
                 else:
                     # We no longer have ANY data
                     self.start_entry = self.stop_entry = None
                 return True
         finally:
-            try_close(iterator)
-        return False
+            with Monitor.acquire(self):
+                self._finish_io()
 
     def get_archive(self, start: K, stop: K) -> tp.Iterator[KVTuple]:
         """
@@ -208,28 +319,34 @@ class SyncableDroppable(RMonitor, tp.Generic[K, V]):
         """
         if not self.data_in_memory:
             return []
-        if self.first_key_in_memory <= start:
-            # We'll serve it from memory
-            for key, value in self.data_in_memory:
-                if key < start:
-                    continue
-                if key > stop:
-                    return
-                yield key, value
-        else:
-            it = self.db_storage.iterate(start)
-            try:
-                for key, value in it:
-                    if key < start:
-                        continue
-                    if key > stop:
-                        return
-                    yield key, value
-                # We must iterate from the memory
-                if self.data_in_memory:
-                    yield from self.get_archive(self.first_key_in_memory, stop)
-            finally:
-                try_close(it)
+        last_key = None
+        while True:
+            with Monitor.acquire(self):
+                write_outs = self._write_outs
+                first_key_in_memory = self.first_key_in_memory
+            if first_key_in_memory is None or first_key_in_memory > start:
+                it = self.db_storage.iterate(start if last_key is None else last_key)
+                try:
+                    for key, value in it:
+                        if key < start or (last_key is not None and key <= last_key):
+                            continue
+                        if key > stop:
+                            return
+                        yield key, value
+                        last_key = key
+                finally:
+                    try_close(it)
+            # We must iterate from the memory
+            with Monitor.acquire(self):
+                if self._write_outs == write_outs:
+                    if last_key is None:
+                        index = _bisect_left(self.data_in_memory, start)
+                    else:
+                        index = _bisect_right(self.data_in_memory, last_key)
+                    data = self.data_in_memory[index:_bisect_right(self.data_in_memory, stop)]
+                    break
+            # entries were moved onto the DB after it was read, read them from there
+        yield from data
 
     def get_latest_value(self) -> KVTuple:
         """
@@ -249,47 +366,41 @@ class SyncableDroppable(RMonitor, tp.Generic[K, V]):
             finally:
                 iterator.close()
 
-    @RMonitor.synchronized
     def cleanup_keep_in_memory(self) -> None:
         """
         Eject values from memory that should reside in the DB onto the DB
         """
-        first_key = self.first_key_in_memory
-        if first_key is None:
-            return
-        cutoff_point = self.stop_entry - self.span_to_keep_in_memory
-        for index, row in enumerate(self.data_in_memory):
-            ts, value = row
-            if ts > cutoff_point:
-                for ts, value in self.data_in_memory[:index]:
-                    self.db_storage.put(ts, value)
-                del self.data_in_memory[:index]
-                break
-        else:
-            self.sync_to_db()
-            self.data_in_memory = []
-            return
+        with Monitor.acquire(self):
+            if self.first_key_in_memory is None:
+                return
+            cutoff_point = self.stop_entry - self.span_to_keep_in_memory
+        self._write_out(cutoff_point)
 
-    @RMonitor.synchronized
     def cleanup_keep_in_db(self) -> None:
         """
         Clear up the database to conform to our span_to_keep_in_db
         """
-        if self.start_entry is None or not self.data_in_memory:
-            return
-        cutoff_span = self.stop_entry - self.span_to_keep_in_db
-        if self.start_entry == self.first_key_in_memory:
-            # The entire series is loaded in the memory
-            self.data_in_memory = [tpl for tpl in self.data_in_memory if tpl[0] >= cutoff_span]
-            if self.data_in_memory:
-                self.start_entry = self.first_key_in_memory
-            else:
-                self.start_entry = self.stop_entry = None
-        else:
-            if not self._cleanup_the_db():
-                return
+        with Monitor.acquire(self):
+            # a write out in progress could put into the DB the entries dropped here
+            self._start_io()
+            try:
+                if self.start_entry is None or not self.data_in_memory:
+                    return
+                if self.start_entry == self.first_key_in_memory:
+                    # The entire series is loaded in the memory
+                    cutoff_span = self.stop_entry - self.span_to_keep_in_db
+                    del self.data_in_memory[:_bisect_left(self.data_in_memory, cutoff_span)]
+                    if self.data_in_memory:
+                        self.start_entry = self.first_key_in_memory
+                    else:
+                        self.start_entry = self.stop_entry = None
+                    return
+            finally:
+                self._finish_io()
+        if self._cleanup_the_db():
             self.cleanup_keep_in_db()
 
+    @RMonitor.synchronized
     def on_new_data(self, key: K, value: V) -> None:
         """
         Called by the user when there's new data gathered.
@@ -309,68 +420,74 @@ class SyncableDroppable(RMonitor, tp.Generic[K, V]):
         if self.start_entry is None:
             self.start_entry = key
 
-    def on_sync_request(self, maximum_entries: tp.Optional[int] = math.inf) -> tp.Iterator[KVTuple]:
+    def on_sync_request(self, maximum_entries: tp.Optional[int] = math.inf,
+                        after: tp.Optional[K] = None) -> tp.Iterator[KVTuple]:
         """
         Return an iterator that will provide the source of the data for synchronization.
 
         This will preferentially start from the first value, so as to keep values synchronized
         in-order.
 
-        :param maximum_entries:
+        The iterator is lazy. It streams entries from the DB and then from memory, and it stops
+        after maximum_entries, so only a single batch is ever read, even for a very large series.
+        Close it if you don't read it to the end, so the DB iterator gets closed.
+
+        To read data in pages without marking it as synced, pass the key of the last entry
+        returned by the previous page as after.
+
+        :param maximum_entries: maximum amount of entries to return
+        :param after: key after which to start, a paging token. Defaults to synced_up_to.
         :return: an iterator of (KVTuple) that should be synchronized against the server
         :raise ValueError: nothing to synchronize!
         """
-        if not self.start_entry:
+        if after is None:
+            after = self.synced_up_to
+        if self.start_entry is None:
             raise ValueError('Nothing to synchronize!')
-        if self.synced_up_to == self.data_in_memory[-1][0]:
+        if after is not None and after >= self.stop_entry:
             raise ValueError('Nothing to synchronize!')
-        if self.synced_up_to is None:
-            # Sync everything
-            iterator = self.db_storage.iterate(None)
-            try:
-                data = list(iterator)
-                if len(data) < maximum_entries:
-                    entries_left = maximum_entries - len(data)
-                    if entries_left == math.inf:
-                        data = itertools.chain(data, self.data_in_memory)
-                    else:
-                        data = itertools.chain(data, self.data_in_memory[:entries_left])
-                return data
-            finally:
-                try_close(iterator)
-        else:
-            if self.first_key_in_memory <= self.synced_up_to:
-                # Means we have to sync from memory
-                if self.synced_up_to is None:
-                    return self.data_in_memory
-                else:
-                    index = bisect.bisect_right([y[0] for y in self.data_in_memory],
-                                                self.synced_up_to)
-                    if maximum_entries == math.inf:
-                        return self.data_in_memory[index:]
-                    else:
-                        return self.data_in_memory[index:index+maximum_entries]
-            else:
+        return self._iterate_for_sync(after, maximum_entries)
+
+    def _iterate_for_sync(self, after: tp.Optional[K],
+                          maximum_entries: int) -> tp.Iterator[KVTuple]:
+        """
+        Yield at most maximum_entries entries of keys greater than after, from the DB and then
+        from the memory
+        """
+        entries_left = maximum_entries
+        if entries_left <= 0:
+            return
+
+        while True:
+            with Monitor.acquire(self):
+                write_outs = self._write_outs
+                first_key_in_memory = self.first_key_in_memory
+            if first_key_in_memory is None or after is None or after < first_key_in_memory:
                 # We have to start off the disk
-                data = []
-                iterator = self.db_storage.iterate(self.start_entry)
+                iterator = self.db_storage.iterate(after)
                 try:
-                    while len(data) < maximum_entries:
-                        try:
-                            data.append(next(iterator))
-                        except StopIteration:
-                            for index, tpl in enumerate(self.data_in_memory):
-                                if len(data) >= maximum_entries:
-                                    break
-                                if self.synced_up_to is not None:
-                                    if tpl[0] > self.synced_up_to:
-                                        break
-                            return itertools.chain(data, self.data_in_memory[:index])
-                    else:
-                        return data
+                    for key, value in iterator:
+                        if after is not None and key <= after:
+                            continue
+                        yield key, value
+                        after = key
+                        entries_left -= 1
+                        if not entries_left:
+                            return
                 finally:
                     try_close(iterator)
 
+            with Monitor.acquire(self):
+                if self._write_outs == write_outs:
+                    index = 0 if after is None else _bisect_right(self.data_in_memory, after)
+                    if entries_left == math.inf:
+                        data = self.data_in_memory[index:]
+                    else:
+                        data = self.data_in_memory[index:index + entries_left]
+                    break
+            # entries were moved onto the DB after it was read, read them from there
+        yield from data
+
     def on_synced_up_to(self, key: K) -> None:
         """
         Called when data was successfully synced up to key included
@@ -388,3 +505,56 @@ class SyncableDroppable(RMonitor, tp.Generic[K, V]):
             return None
         else:
             return self.data_in_memory[0][0]
+
+
+class SyncableDroppableWorker(IntervalTerminableThread):
+    """
+    A thread that periodically moves data of a
+    :class:`~satella.coding.structures.SyncableDroppable` onto the DB and ages data out of the DB,
+    so that the threads that feed it data do not have to.
+
+    Each run writes all the data due to be written with a single
+    :meth:`~satella.coding.structures.DBStorage.put_many` call. When terminated, the thread
+    does a final run.
+
+    Use like:
+
+    >>> worker = SyncableDroppableWorker(sd, 10).start()
+    >>> ...
+    >>> worker.terminate().join()
+
+    :param syncable_droppable: the SyncableDroppable to maintain
+    :param interval: amount of seconds between the runs
+    :param sync_everything: if True, each run will write everything that is in memory onto the
+        DB, instead of only the entries older than span_to_keep_in_memory
+    :param flush_latency: a metric that will be updated with the amount of seconds each run took
+    :param backlog: a fresh CallableMetric that will be patched to yield the amount of
+        entries kept in memory, that have not been written to the DB yet
+    """
+
+    def __init__(self, syncable_droppable: SyncableDroppable, interval: float,
+                 sync_everything: bool = False, flush_latency=None, backlog=None,
+                 *args, **kwargs):
+        super().__init__(interval, *args, daemon=True, **kwargs)
+        self.syncable_droppable = syncable_droppable
+        self.sync_everything = sync_everything
+        self.flush_latency = flush_latency
+        if backlog is not None:
+            backlog.callable = lambda: len(self.syncable_droppable.data_in_memory)
+
+    def run_once(self) -> None:
+        """
+        Do a single run, in the calling thread
+        """
+        with measure() as measurement:
+            self.syncable_droppable.cleanup()
+            if self.sync_everything:
+                self.syncable_droppable.sync_to_db()
+        if self.flush_latency is not None:
+            self.flush_latency.runtime(measurement())
+
+    def loop(self) -> None:
+        self.run_once()
+
+    def cleanup(self) -> None:
+        self.run_once()
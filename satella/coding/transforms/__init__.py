@@ -5,15 +5,15 @@ import typing as tp
 
 from satella.coding.decorators import for_argument
 from .jsonify import jsonify
-from .merger import merge_series
+from .merger import merge_series, resample_series
 from .percentile import percentile
 from .base64 import b64encode
 from .interpol import linear_interpolate
 from .words import hashables_to_int
 
 __all__ = ['stringify', 'split_shuffle_and_join', 'one_tuple', 'none_if_false',
-           'merge_series', 'pad_to_multiple_of_length', 'clip', 'hashables_to_int',
-           'jsonify', 'intify', 'percentile', 'b64encode', 'linear_interpolate']
+           'merge_series', 'resample_series', 'pad_to_multiple_of_length', 'clip',
+           'hashables_to_int', 'jsonify', 'intify', 'percentile', 'b64encode', 'linear_interpolate']
 
 from satella.coding.typing import T, NoArgCallable, Appendable, Number, Predicate
 
@@ -1,11 +1,7 @@
+import heapq
 import typing as tp
 
-from satella.coding.recast_exceptions import rethrow_as
-from satella.coding.structures import SetHeap
-
-
-def _is_x_none(x) -> bool:
-    return x is None
+from .interpol import linear_interpolate
 
 
 class merge_series:
@@ -14,103 +10,123 @@ class merge_series:
 
     This will behave as a single-use iterator and return (timestamp, value1, value2, ...)
 
-    :raises ValueError: one of the given series was empty
+    The first returned timestamp is the greatest of the first timestamps of the series,
+    and a row is returned for every timestamp that any of the series has from then on,
+    carrying the last value seen in each series. Series are merged with a heap, so producing
+    a row costs O(log k) heap operations, where k is the amount of series.
+
+    Every series must be sorted by timestamp ascending.
+
+    If any of the series is empty, nothing will be returned.
+
+    .. versionchanged:: 2.14.33
+        Methods advance, next, assert_preloaded and assert_have_timestamps and the attribute
+        empty were removed. Use it just as an iterator.
     """
-    __slots__ = ('series', 'next_preloaded_values', 'empty', 'timestamps',
-                 'super_next_preloaded_values')
+    __slots__ = ('series', 'values', 'heap', 'pending', 'first_timestamp')
 
-    def __init__(self, *series: tp.Iterator[tp.Tuple[float, tp.Any]]):
+    def __init__(self, *series: tp.Iterable[tp.Tuple[float, tp.Any]]):
         self.series = [iter(x) for x in series]
+        self.heap = []  # type: tp.List[tp.Tuple[float, int]]
+        self.first_timestamp = None
         try:
-            self.next_preloaded_values = [next(x) for x in self.series]
+            first = [next(x) for x in self.series]
         except StopIteration:
-            self.empty = True
             return
-        else:
-            self.empty = False
-
-        self.timestamps = SetHeap()
-        timestamps = {x[0] for x in self.next_preloaded_values}
-        max_ts = max(timestamps)
-        self.timestamps.push(max_ts)
-
-        self.super_next_preloaded_values = []
-        for series in self.series:
-            try:
-                value = next(series)
-                self.super_next_preloaded_values.append(value)
-                self.timestamps.push(value[0])
-            except StopIteration:
-                self.super_next_preloaded_values.append(None)
+
+        self.first_timestamp = max(x[0] for x in first)
+        self.values = [x[1] for x in first]
+        self.pending = [None] * len(self.series)  # type: tp.List[tp.Tuple[float, tp.Any]]
+        for i, series in enumerate(self.series):
+            for ts, value in series:
+                if ts > self.first_timestamp:
+                    self.pending[i] = ts, value
+                    self.heap.append((ts, i))
+                    break
+                self.values[i] = value
+        heapq.heapify(self.heap)
 
     def __iter__(self) -> tp.Iterator:
         return self
 
-    def advance(self, i: int) -> None:
-        """
-        :param i: timestamp to advance to
-        :raises ValueError: given series was empty
-        """
-        if self.super_next_preloaded_values[i] is None:
-            raise ValueError('Cannot advance on series %s which is empty' % (i,))
+    def _advance(self, i: int) -> None:
+        """Make the pending value of i-th series current and load it's next pending value"""
+        self.values[i] = self.pending[i][1]
+        try:
+            self.pending[i] = next(self.series[i])
+        except StopIteration:
+            self.pending[i] = None
+            heapq.heappop(self.heap)
         else:
-            self.next_preloaded_values[i] = self.super_next_preloaded_values[i]
-            try:
-                self.super_next_preloaded_values[i] = next(self.series[i])
-                self.timestamps.push(self.super_next_preloaded_values[i][0])
-            except StopIteration:
-                self.super_next_preloaded_values[i] = None
-
-    def next(self) -> None:
-        minimum_timestamp, _ = min(self.next_preloaded_values)
-        for i, v in enumerate(self.next_preloaded_values):
-            if v[0] == minimum_timestamp:
-                self.advance(i)
-
-    def assert_preloaded(self, for_ts: int) -> bool:
-        """
-        Assert every next preloaded value can at least report for for_ts
-
-        :param for_ts: timestamp to report for
-        :return: whether every value can report for for_ts
-        """
-        for i, _ in enumerate(self.series):
-            if self.super_next_preloaded_values[i] is None:
-                if self.next_preloaded_values[i][0] > for_ts:
-                    return False
-            else:
-                try:
-                    while not (self.next_preloaded_values[i][0] <= for_ts
-                               < self.super_next_preloaded_values[i][0]):
-                        self.advance(i)
-                except TypeError:  # we've reached the finale
-                    if self.next_preloaded_values[i][0] > for_ts:
-                        return False
-        return True
-
-    def assert_have_timestamps(self) -> None:
-        """
-        Assert that self.timestamps is not empty, or raise StopIteration if it can't be filled in
-        """
-        if self.timestamps:
-            return
-        if all(map(_is_x_none, self.super_next_preloaded_values)):
-            raise StopIteration('sequence exhausted')
-        self.next()
-        if not self.timestamps:
-            raise StopIteration('cannot advance series anymore')
+            heapq.heapreplace(self.heap, (self.pending[i][0], i))
 
-    @rethrow_as(IndexError, StopIteration)
-    def __next__(self):
-        if self.empty:
-            raise StopIteration('empty right from the start')
+    def __next__(self) -> tuple:
+        if self.first_timestamp is not None:
+            ts, self.first_timestamp = self.first_timestamp, None
+            return (ts, *self.values)
+
+        if not self.heap:
+            raise StopIteration('sequence exhausted')
 
-        self.assert_have_timestamps()
+        ts = self.heap[0][0]
+        while self.heap and self.heap[0][0] == ts:
+            self._advance(self.heap[0][1])
+        return (ts, *self.values)
 
-        ts = self.timestamps.pop()
 
-        while not self.assert_preloaded(ts):
-            ts = self.timestamps.pop()  # throws IndexError
+def resample_series(*series: tp.Iterable[tp.Tuple[float, tp.Any]], interval: float,
+                    start: tp.Optional[float] = None, stop: tp.Optional[float] = None,
+                    interpolate: bool = False) -> tp.Iterator[tuple]:
+    """
+    Merge multiple sequences that return (timestamp, value) into rows of
+    (timestamp, value1, value2, ...) taken every interval.
+
+    Every series must be sorted by timestamp ascending.
+
+    If any of the series is empty, nothing will be returned.
+
+    :param series: series to merge
+    :param interval: difference between timestamps of consecutive rows
+    :param start: timestamp of the first row. Default is the greatest of the first
+        timestamps of the series
+    :param stop: no rows after this timestamp will be returned. Default is the greatest
+        timestamp found in any of the series
+    :param interpolate: if False, last value seen in each series will be used. If True, the
+        value will be linearly interpolated (with :func:`linear_interpolate`) between the last
+        value seen and the next one. Past the end of a series, it's last value will be used.
+    :return: an iterator of rows
+    :raises ValueError: interval was not positive
+    """
+    if interval <= 0:
+        raise ValueError('interval must be positive')
+    iterators = [iter(x) for x in series]
+    try:
+        previous = [next(x) for x in iterators]
+    except StopIteration:
+        return
+    following = [next(x, None) for x in iterators]
+    last_timestamp = max(x[0] for x in previous + following if x is not None)
+
+    t = max(x[0] for x in previous) if start is None else start
+    while True:
+        for i, iterator in enumerate(iterators):
+            while following[i] is not None and following[i][0] <= t:
+                previous[i] = following[i]
+                following[i] = next(iterator, None)
+                if following[i] is not None and following[i][0] > last_timestamp:
+                    last_timestamp = following[i][0]
+
+        if t > (last_timestamp if stop is None else stop):
+            return
 
-        output = (ts, *(v[1] for v in self.next_preloaded_values))
-        return output
+        if interpolate:
+            row = [t]
+            for prev, foll in zip(previous, following):
+                if foll is None or t <= prev[0]:
+                    row.append(prev[1])
+                else:
+                    row.append(linear_interpolate((prev, foll), t))
+            yield tuple(row)
+        else:
+            yield (t, *(x[1] for x in previous))
+        t += interval
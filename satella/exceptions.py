@@ -6,7 +6,7 @@ __all__ = ['BaseSatellaError', 'ResourceLockingError', 'ResourceNotLocked', 'Res
            'ConfigurationValidationError', 'ConfigurationError', 'ConfigurationSchemaError',
            'PreconditionError', 'MetricAlreadyExists', 'BaseSatellaException', 'CustomException',
            'CodedCustomException', 'CodedCustomExceptionMetaclass', 'WouldWaitMore',
-           'ProcessFailed', 'AlreadyAllocated', 'Empty', 'ImpossibleError']
+           'ProcessFailed', 'AlreadyAllocated', 'Empty', 'Full', 'ImpossibleError']
 
 
 class CustomException(Exception):
@@ -167,6 +167,10 @@ class Empty(BaseSatellaError, queue.Empty):
     """The queue was empty"""
 
 
+class Full(BaseSatellaError, queue.Full):
+    """The queue was full"""
+
+
 class ConfigurationError(BaseSatellaError, ValueError):
     """A generic error during configuration"""
 
@@ -11,6 +11,9 @@ class CPUTimeAwareIntervalTerminableThread(IntervalTerminableThread, metaclass=A
     An IntervalTerminableThread that can call the loop a bit faster than usual,
     based of current CPU time metrics.
 
+    If it's pooled, the loop is called by the scheduler on a regular interval, without
+    calling it faster.
+
     :param seconds: time that a single looping through should take. This will
         include the time spent on calling .loop(), the rest of this time will
         be spent safe_sleep()ing.
@@ -2,6 +2,7 @@ import logging
 import os
 import time
 import typing as tp
+from concurrent.futures import Executor
 
 import psutil
 
@@ -43,6 +44,11 @@ class MemoryPressureManager(TerminableThread):
         consumption is other this many percent of it's maximum_available amount of memory.
     :param check_interval: amount of seconds of pause between consecutive checks
     :param log_transitions: whether to log to logger when a transition takes place
+    :param callback_executor: an executor to call the callbacks of a single event in parallel
+        in, so that a slow one doesn't delay the others. By default they are called one after
+        another in this thread.
+    :param callback_timeout: amount of seconds to wait for callbacks called in the executor.
+        See :class:`~satella.coding.concurrent.CallableGroup`.
 
     :ivar severity_level: current severity level (int)
         0 means memory is OK, 1 and more means memory is progressively more limited
@@ -51,7 +57,9 @@ class MemoryPressureManager(TerminableThread):
     def __init__(self, maximum_available: tp.Optional[int] = None,
                  severity_levels: tp.List[BaseCondition] = None,
                  check_interval: int = 10,
-                 log_transitions: bool = True):
+                 log_transitions: bool = True,
+                 callback_executor: tp.Optional[Executor] = None,
+                 callback_timeout: tp.Optional[float] = None):
         super().__init__(name='memory pressure manager', daemon=True)
         self.log_transitions = log_transitions  # type: bool
         self.process = psutil.Process(os.getpid())  # type: psutil.Process
@@ -59,16 +67,23 @@ class MemoryPressureManager(TerminableThread):
         self.severity_levels = [ZerothSeverity()] + (
                 severity_levels or [])  # type: tp.List[BaseCondition]
 
-        self.callbacks_on_entered = [CallableGroup(gather=False) for _ in
+        def new_group() -> CallableGroup:
+            return CallableGroup(gather=False, executor=callback_executor,
+                                 timeout=callback_timeout)
+
+        self.callbacks_on_entered = [new_group() for _ in
                                      range(len(
                                          self.severity_levels))]  # type: tp.List[CallableGroup]
-        self.callbacks_on_remains = [CallableGroup(gather=False) for _ in
+        self.callbacks_on_remains = [new_group() for _ in
                                      range(len(
                                          self.severity_levels))]  # type: tp.List[CallableGroup]
-        self.callbacks_on_left = [CallableGroup(gather=False) for _ in
+        self.callbacks_on_left = [new_group() for _ in
                                   range(len(
                                       self.severity_levels))]  # type: tp.List[CallableGroup]
-        self.callbacks_on_memory_normal = CallableGroup(gather=False)
+        self.callbacks_on_memory_normal = new_group()
+        self._groups = self.callbacks_on_entered + self.callbacks_on_remains + \
+            self.callbacks_on_left + [self.callbacks_on_memory_normal]
+        self._sweep_index = 0
         self.severity_level = 0  # type: int
         self.stopped = False  # type: bool
         self.check_interval = check_interval  # type: int
@@ -106,16 +121,10 @@ class MemoryPressureManager(TerminableThread):
         if self.stopped:
             return time.sleep(self.check_interval)
 
-        self.callbacks_on_memory_normal.remove_cancelled()
-
-        for cg in self.callbacks_on_entered:
-            cg.remove_cancelled()
-
-        for cg in self.callbacks_on_left:
-            cg.remove_cancelled()
-
-        for cg in self.callbacks_on_remains:
-            cg.remove_cancelled()
+        # groups drop their cancelled callbacks when called, sweep the ones that are not called
+        # one at a time
+        self._groups[self._sweep_index % len(self._groups)].remove_cancelled()
+        self._sweep_index += 1
 
         with measure() as measurement:
             severity_level = self.calculate_severity_level()
@@ -1,3 +1,4 @@
+import collections
 import itertools
 import queue
 import threading
@@ -17,7 +18,7 @@ from satella.time import measure
 from satella.instrumentation.metrics.metric_types import EmptyMetric, MetricLevel, CallableMetric
 
 
-def _worker(executor_reference, work_queue, initializer, initargs):
+def _worker(executor_reference, work_queue, initializer, initargs, idle_timeout):
     if initializer is not None:
         try:
             initializer(*initargs)
@@ -29,19 +30,27 @@ def _worker(executor_reference, work_queue, initializer, initargs):
             return
     try:
         while True:
-            work_item = work_queue.get(block=True)
+            try:
+                work_item = work_queue.get(block=True, timeout=idle_timeout)
+            except queue.Empty:
+                executor = executor_reference()
+                if executor is None or executor._retire_worker():
+                    return
+                del executor
+                continue
+
             if work_item is not None:
                 # Measure the time spent in waiting
                 executor = executor_reference()
                 work_item.measure.stop()
-                executor.waiting_time_metric.handle(executor.metric_level, work_item.measure())
+                executor._on_work_item_started(work_item.measure())
                 del executor
 
                 with measure() as measurement:
                     work_item.run()
 
                 executor = executor_reference()
-                executor.executing_time_metric.handle(executor.metric_level, measurement())
+                executor._on_work_item_finished(measurement())
                 # Delete references to object. See issue16284
                 del work_item
 
@@ -77,6 +86,14 @@ class MetrifiedThreadPoolExecutor(ThreadPoolExecutor):
     This class will also backport some of Python 3.8's characteristics of the thread pool executor
     to earlier Pythons, thread name prefix, initializer, initargs and BrokenThreadPool behaviour.
 
+    The pool can also size itself. By default a new worker is started whenever a task is
+    submitted and there's no idle worker, up to max_workers. If target_waiting_time is given,
+    a new worker will be started only if there are less than min_workers of them, or if tasks
+    wait, or are expected to wait judging by the average execution time, for a worker for
+    longer than target_waiting_time. This is checked when a task is submitted and when a worker
+    picks a task up. If idle_timeout is given, workers that were
+    idle for that long will be retired, as long as there are more than min_workers of them.
+
     :param time_spent_waiting: a metric (can be aggregate) to which times spent waiting in the
         queue will be deposited
     :param time_spent_executing: a metric (can be aggregate) to which times spent executing will
@@ -84,6 +101,13 @@ class MetrifiedThreadPoolExecutor(ThreadPoolExecutor):
     :param waiting_tasks: a fresh CallableMetric that will be patched to yield the number of
         currently waiting tasks
     :param metric_level: a level with which to log to these two metrics
+    :param min_workers: amount of workers below which the pool will not shrink
+    :param target_waiting_time: amount of seconds that tasks can wait for a worker before more
+        workers are started. None means start them whenever no worker is idle.
+    :param idle_timeout: amount of seconds after which an idle worker is retired. None means
+        never retire workers.
+    :param utilization: a fresh CallableMetric that will be patched to yield the fraction of
+        workers that are currently busy
     """
 
     _counter = itertools.count().__next__
@@ -93,7 +117,11 @@ class MetrifiedThreadPoolExecutor(ThreadPoolExecutor):
                  time_spent_waiting=None,
                  time_spent_executing=None,
                  waiting_tasks: tp.Optional[CallableMetric] = None,
-                 metric_level: MetricLevel = MetricLevel.RUNTIME):
+                 metric_level: MetricLevel = MetricLevel.RUNTIME,
+                 min_workers: int = 0,
+                 target_waiting_time: tp.Optional[float] = None,
+                 idle_timeout: tp.Optional[float] = None,
+                 utilization: tp.Optional[CallableMetric] = None):
         super().__init__(max_workers)
         self._initializer = initializer
         self._initargs = initargs
@@ -105,8 +133,34 @@ class MetrifiedThreadPoolExecutor(ThreadPoolExecutor):
         self.waiting_time_metric = time_spent_waiting or EmptyMetric('')
         self.executing_time_metric = time_spent_executing or EmptyMetric('')
         self.metric_level = metric_level
+        self.min_workers = min_workers
+        self.target_waiting_time = target_waiting_time
+        self.idle_timeout = idle_timeout
+        # measures of tasks waiting for a worker, oldest first
+        self._waiting_measures = collections.deque()  # type: tp.Deque[measure]
+        self._busy_workers = 0
+        # exponential moving average, guarded by the busy lock
+        self._average_executing_time = 0
+        self._busy_lock = threading.Lock()
         if waiting_tasks is not None:
             waiting_tasks.callable = lambda: self.get_queue_length()
+        if utilization is not None:
+            utilization.callable = lambda: self.get_utilization()
+
+    def get_worker_count(self) -> int:
+        """
+        Return the amount of currently running workers
+        """
+        return len(self._threads)
+
+    def get_utilization(self) -> float:
+        """
+        Return the fraction of workers that are currently busy, 0 if there are no workers
+        """
+        workers = len(self._threads)
+        if not workers:
+            return 0
+        return self._busy_workers / workers
 
     def get_queue_length(self) -> int:
         """
@@ -143,15 +197,37 @@ class MetrifiedThreadPoolExecutor(ThreadPoolExecutor):
             f = _base.Future()
             w = _WorkItem(f, fn, args, kwargs)
             w.measure = measure()
+            self._waiting_measures.append(w.measure)
             self._work_queue.put(w)
             self._adjust_thread_count()
             return f
 
+    def _expected_waiting_time(self) -> float:
+        """
+        Return how long did the oldest task wait for a worker, or how long the newest one is
+        expected to wait, judging by average execution time, whichever is greater.
+        """
+        try:
+            oldest = self._waiting_measures[0]()
+        except IndexError:
+            return 0
+        expected = len(self._waiting_measures) * self._average_executing_time / \
+            max(len(self._threads), 1)
+        return max(oldest, expected)
+
     def _adjust_thread_count(self):
         # if idle threads are available, don't spin new threads
         if self._idle_semaphore.acquire(timeout=0):
             return
 
+        if self.target_waiting_time is not None and \
+                len(self._threads) >= max(self.min_workers, 1) and \
+                self._expected_waiting_time() < self.target_waiting_time:
+            return
+
+        self._start_worker()
+
+    def _start_worker(self):
         # When the executor gets lost, the weakref callback will wake up
         # the worker threads.
         def weakref_cb(_, q=self._work_queue):
@@ -165,12 +241,54 @@ class MetrifiedThreadPoolExecutor(ThreadPoolExecutor):
                                  args=(weakref.ref(self, weakref_cb),
                                        self._work_queue,
                                        self._initializer,
-                                       self._initargs))
+                                       self._initargs,
+                                       self.idle_timeout))
             t.daemon = True
             t.start()
             self._threads.add(t)
             thread._threads_queues[t] = self._work_queue
 
+    def _on_work_item_started(self, time_spent_waiting: float) -> None:
+        self.waiting_time_metric.handle(self.metric_level, time_spent_waiting)
+        try:
+            self._waiting_measures.popleft()
+        except IndexError:
+            pass
+        with self._busy_lock:
+            self._busy_workers += 1
+        if self.target_waiting_time is not None and \
+                time_spent_waiting >= self.target_waiting_time and self._waiting_measures:
+            with self._shutdown_lock:
+                if not self._shutdown:
+                    self._start_worker()
+
+    def _on_work_item_finished(self, time_spent_executing: float) -> None:
+        with self._busy_lock:
+            self._busy_workers -= 1
+            if self._average_executing_time:
+                self._average_executing_time += 0.2 * (time_spent_executing -
+                                                       self._average_executing_time)
+            else:
+                self._average_executing_time = time_spent_executing
+        self.executing_time_metric.handle(self.metric_level, time_spent_executing)
+
+    def _retire_worker(self) -> bool:
+        """
+        Called by a worker that was idle for idle_timeout.
+
+        :return: whether the worker should terminate
+        """
+        with self._shutdown_lock:
+            if self._shutdown or len(self._threads) <= self.min_workers:
+                return False
+            # this worker is idle, so it has released the semaphore
+            if not self._idle_semaphore.acquire(timeout=0):
+                return False
+            current_thread = threading.current_thread()
+            self._threads.discard(current_thread)
+            thread._threads_queues.pop(current_thread, None)
+            return True
+
     def _initializer_failed(self):
         with self._shutdown_lock:
             self._broken = ('A thread initializer failed, the thread pool '
@@ -16,6 +16,7 @@ setup(keywords=['ha', 'high availability', 'scalable', 'scalability', 'server',
             'TOMLSource': ['toml'],
             'FasterJSON': ['ujson'],
             'cassandra': ['cassandra-driver'],
-            'opentracing': ['opentracing']
+            'opentracing': ['opentracing'],
+            'numpy': ['numpy']
       }
       )
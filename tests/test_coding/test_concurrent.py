@@ -1,3 +1,4 @@
+import asyncio
 import copy
 import platform
 import random
@@ -10,10 +11,15 @@ from concurrent.futures import ThreadPoolExecutor, Future as PythonFuture
 from satella.coding.concurrent import TerminableThread, CallableGroup, Condition, MonitorList, \
     LockedStructure, AtomicNumber, Monitor, IDAllocator, call_in_separate_thread, Timer, \
     parallel_execute, run_as_future, sync_threadpool, IntervalTerminableThread, Future, \
-    WrappingFuture, PeekableQueue, SequentialIssuer, CancellableCallback
-from satella.coding.concurrent.futures import call_in_future, ExecutorWrapper
+    WrappingFuture, PeekableQueue, SequentialIssuer, CancellableCallback, \
+    StripedAtomicNumber, RWMonitor, RWMonitorDict, RWLockedStructure, ConcurrentDict, \
+    MonitorDict, BoundedThreadPoolExecutor, PriorityThreadPoolExecutor, Batcher, \
+    PeriodicScheduler, enable_lock_profiling, disable_lock_profiling, get_top_contended_locks, \
+    get_shared_executor
+from satella.coding.concurrent.futures import call_in_future, ExecutorWrapper, gather, \
+    first_completed, any_success, with_timeout, to_asyncio, from_asyncio
 from satella.coding.sequences import unique
-from satella.exceptions import WouldWaitMore, AlreadyAllocated, Empty
+from satella.exceptions import WouldWaitMore, AlreadyAllocated, Empty, Full
 
 
 class TestConcurrent(unittest.TestCase):
@@ -42,6 +48,34 @@ class TestConcurrent(unittest.TestCase):
         d = si.issue()
         self.assertGreater(d, c)
 
+    def test_sequential_issuer_modes(self):
+        self.assertEqual(SequentialIssuer(5).issue(), 5)
+        self.assertRaises(ValueError, lambda: SequentialIssuer(block_size=8, lock_free=True))
+        si = SequentialIssuer(lock_free=True)
+        self.assertEqual(si.no_less_than(10 ** 12), 10 ** 12)
+        self.assertEqual(si.issue(), 10 ** 12 + 1)
+
+        for si in (SequentialIssuer(10, block_size=64), SequentialIssuer(10, lock_free=True)):
+            results = []
+
+            def issue_ids():
+                ids = [si.issue() for _ in range(2000)]
+                ids.append(si.no_less_than(ids[-1] + 100))
+                ids.extend(si.issue() for _ in range(2000))
+                results.append(ids)
+
+            threads = [threading.Thread(target=issue_ids) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            for ids in results:
+                self.assertEqual(ids, sorted(ids))
+            all_ids = [id_ for ids in results for id_ in ids]
+            self.assertEqual(len(all_ids), len(set(all_ids)))
+            self.assertGreaterEqual(min(all_ids), 10)
+
     def test_peekable_queue(self):
         pkb = PeekableQueue()
 
@@ -62,6 +96,32 @@ class TestConcurrent(unittest.TestCase):
         self.assertEqual(pkb.get(), 1)
         self.assertEqual(pkb.qsize(), 0)
 
+    def test_peekable_queue_batches(self):
+        pkb = PeekableQueue(maxsize=3)
+        pkb.put_many([1, 2])
+        pkb.put(3)
+        self.assertRaises(Full, lambda: pkb.put(4, timeout=0.1))
+        self.assertEqual(pkb.get_many(2), [1, 2])
+        self.assertEqual(pkb.get_many(5), [3])
+        self.assertRaises(Empty, lambda: pkb.get_many(5, timeout=0.1))
+
+        @call_in_separate_thread()
+        def get_from_queue():
+            time.sleep(0.2)
+            return pkb.get_many(10)
+
+        fut = get_from_queue()
+        pkb.put_many([4, 5, 6, 7], timeout=1)
+        self.assertEqual(fut.result(), [4, 5, 6])
+        self.assertEqual(pkb.get(), 7)
+        self.assertEqual(pkb.qsize(), 0)
+
+        for maxsize in (0, -1):
+            pkb = PeekableQueue(maxsize=maxsize)
+            pkb.put(1, timeout=1)
+            pkb.put_many([2, 3], timeout=1)
+            self.assertEqual(pkb.get_many(5), [1, 2, 3])
+
     def test_future_on(self):
         fut = Future()
         a = {'success': False, 'exception': False}
@@ -206,6 +266,199 @@ class TestConcurrent(unittest.TestCase):
         tp.submit(lambda: time.sleep(0.4))
         sync_threadpool(tp, 2)
 
+    def test_bounded_thread_pool_executor(self):
+        class Metric:
+            def __init__(self):
+                self.values = []
+
+            def runtime(self, value):
+                self.values.append(value)
+
+        depth, waiting = Metric(), Metric()
+        executor = BoundedThreadPoolExecutor(1, max_queue=1, queue_depth_metric=depth,
+                                             waiting_time_metric=waiting)
+        self.assertRaises(ValueError, lambda: BoundedThreadPoolExecutor(rejection_policy='x'))
+
+        @call_in_separate_thread(executor=executor)
+        def sleep(delay):
+            time.sleep(delay)
+            return threading.current_thread()
+
+        fut1, fut2 = sleep(0.5), sleep(0)
+        self.assertRaises(Full, lambda: sleep(0))
+        self.assertIsNot(fut1.result(), threading.current_thread())
+        fut2.result()
+        self.assertEqual(executor.get_queue_length(), 0)
+        self.assertEqual(len(depth.values), 4)
+        self.assertEqual(depth.values[-1], 0)
+        self.assertGreaterEqual(waiting.values[1], 0.4)
+
+        executor.rejection_policy = 'caller_runs'
+        fut1, fut2, fut3 = sleep(0.5), sleep(0), sleep(0)
+        self.assertIs(fut3.result(), threading.current_thread())
+        fut2.result()
+        executor.shutdown()
+
+        @run_as_future(pooled=True)
+        def add(a, b):
+            return a + b
+
+        self.assertEqual(add(1, 2).result(), 3)
+        self.assertEqual(get_shared_executor().max_queue, 1024)
+        self.assertEqual(get_shared_executor().rejection_policy, 'caller_runs')
+
+    def test_future_combinators(self):
+        executor = ThreadPoolExecutor(4)
+
+        def sleep_and_return(delay, value):
+            time.sleep(delay)
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        futures = [executor.submit(sleep_and_return, 0.1 - i / 100, i) for i in range(4)]
+        self.assertEqual(gather(futures).result(), [0, 1, 2, 3])
+        self.assertEqual(gather([]).result(), [])
+        self.assertRaises(ValueError, gather([
+            executor.submit(sleep_and_return, 0.1, 1),
+            executor.submit(sleep_and_return, 0, ValueError())]).result)
+
+        self.assertEqual(first_completed([executor.submit(sleep_and_return, 0.2, 1),
+                                          executor.submit(sleep_and_return, 0, 2)]).result(), 2)
+        self.assertEqual(any_success([executor.submit(sleep_and_return, 0, ValueError()),
+                                      executor.submit(sleep_and_return, 0.1, 2)]).result(), 2)
+        self.assertRaises(KeyError, any_success([
+            executor.submit(sleep_and_return, 0, ValueError()),
+            executor.submit(sleep_and_return, 0.1, KeyError())]).result)
+
+        fut = Future()
+        mapped = fut.map(lambda x: x + 1)
+        flat_mapped = fut.flat_map(lambda x: executor.submit(sleep_and_return, 0, x * 2))
+        failed = fut.map(lambda x: x / 0)
+        fut.set_result(2)
+        self.assertEqual(mapped.result(), 3)
+        self.assertEqual(flat_mapped.result(), 4)
+        self.assertRaises(ZeroDivisionError, failed.result)
+
+        fut = Future()
+        started = time.monotonic()
+        self.assertRaises(WouldWaitMore, with_timeout(fut, 0.1, cancel=True).result)
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertTrue(fut.cancelled())
+        self.assertEqual(with_timeout(executor.submit(sleep_and_return, 0, 5), 1).result(), 5)
+        executor.shutdown()
+
+        loop = asyncio.new_event_loop()
+        fut = Future()
+        asyncio_future = to_asyncio(fut, loop)
+        threading.Thread(target=fut.set_result, args=(6,)).start()
+        self.assertEqual(loop.run_until_complete(asyncio_future), 6)
+
+        async def await_future():
+            fut = Future()
+            threading.Thread(target=fut.set_result, args=(8,)).start()
+            return await to_asyncio(fut)
+
+        self.assertEqual(loop.run_until_complete(await_future()), 8)
+
+        asyncio_future = loop.create_future()
+        fut = from_asyncio(asyncio_future)
+        loop.call_soon(asyncio_future.set_result, 7)
+        loop.run_until_complete(asyncio_future)
+        self.assertEqual(fut.result(timeout=1), 7)
+        loop.close()
+
+    def test_batcher(self):
+        class Metric:
+            def __init__(self):
+                self.values = []
+
+            def runtime(self, value, **labels):
+                self.values.append(value)
+
+        batch_sizes = Metric()
+        latencies = Metric()
+
+        def double(items):
+            time.sleep(0.05)
+            return [item * 2 for item in items]
+
+        batcher = Batcher(double, max_batch_size=4, max_latency=0.1,
+                          batch_size_metric=batch_sizes, latency_metric=latencies)
+        futures = [batcher.submit(i) for i in range(10)]
+        self.assertEqual([future.result() for future in futures], [i * 2 for i in range(10)])
+        self.assertEqual(batch_sizes.values, [4, 4, 2])
+        self.assertEqual(len(latencies.values), 3)
+        self.assertEqual(batcher(21), 42)
+        batcher.close()
+        self.assertRaises(RuntimeError, lambda: batcher.submit(1))
+
+        def fail(items):
+            raise ValueError()
+
+        batcher = Batcher(fail, max_latency=0.01)
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            self.assertRaises(ValueError, future.result)
+        batcher.close()
+
+        batcher = Batcher(lambda items: items[1:], max_latency=0.01)
+        futures = [batcher.submit(i) for i in range(3)]
+        batcher.close()
+        for future in futures:
+            self.assertRaises(ValueError, future.result)
+
+        executor = ThreadPoolExecutor(1)
+        executor.shutdown()
+        batcher = Batcher(double, max_latency=0.01, executor=executor)
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            self.assertRaises(RuntimeError, future.result)
+        self.assertRaises(RuntimeError, lambda: batcher(3, timeout=1))
+        batcher.close()
+
+    def test_priority_thread_pool_executor(self):
+        class Metric:
+            def __init__(self):
+                self.values = []
+
+            def runtime(self, value, **labels):
+                self.values.append((value, labels))
+
+        depth = Metric()
+        executor = PriorityThreadPoolExecutor(1, starvation_timeout=0.5,
+                                              queue_depth_metric=depth)
+        order = []
+
+        def append(item, delay=0):
+            time.sleep(delay)
+            order.append(item)
+
+        executor.submit(append, 'blocker', delay=0.3)
+        time.sleep(0.1)
+        executor.submit(append, 'bulk', priority=10)
+        executor.submit(append, 'interactive', priority=0)
+        expired = executor.submit(append, 'expired', deadline=time.monotonic() + 0.1)
+        executor.submit(append, 'interactive 2', priority=-1)
+        self.assertEqual(executor.get_queue_length(), 4)
+        self.assertEqual(executor.get_queue_length(10), 1)
+        executor.shutdown()
+        self.assertEqual(order, ['blocker', 'interactive 2', 'interactive', 'bulk'])
+        self.assertTrue(expired.cancelled())
+        self.assertIn((1, {'priority': 10}), depth.values)
+        self.assertEqual(depth.values[-1][0], 0)
+        self.assertRaises(RuntimeError, lambda: executor.submit(append, 'late'))
+
+        executor = PriorityThreadPoolExecutor(1, starvation_timeout=0.15)
+        order = []
+        executor.submit(append, 'blocker', delay=0.3)
+        time.sleep(0.1)
+        executor.submit(append, 'bulk', priority=10)
+        for i in range(3):
+            executor.submit(append, i, delay=0.15, priority=0)
+        executor.shutdown()
+        self.assertEqual(order, ['blocker', 'bulk', 0, 1, 2])
+
     def test_run_as_future(self):
         a = {}
 
@@ -226,6 +479,43 @@ class TestConcurrent(unittest.TestCase):
         fut = raises()
         self.assertRaises(ValueError, fut.result)
 
+    def test_parallel_execute_streaming(self):
+        executor = ThreadPoolExecutor(8)
+        lock = threading.Lock()
+        in_flight = {'now': 0, 'max': 0}
+        calls = []
+
+        def sleep(delay):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            time.sleep(delay)
+            with lock:
+                in_flight['now'] -= 1
+            return delay
+
+        def submit(delay):
+            calls.append(delay)
+            return executor.submit(sleep, delay)
+
+        delays = [(0.4,), (0.1,), (0.2,), (0.0,)]
+        self.assertEqual(list(parallel_execute(submit, delays, max_in_flight=2, ordered=False)),
+                         [0.1, 0.2, 0.0, 0.4])
+        self.assertEqual(in_flight['max'], 2)
+        self.assertEqual(list(parallel_execute(submit, delays, max_in_flight=2)),
+                         [0.4, 0.1, 0.2, 0.0])
+
+        results = list(parallel_execute(submit, [(1.0,), (0.1,)], timeout=0.5))
+        self.assertIsInstance(results[0], WouldWaitMore)
+        self.assertEqual(results[1], 0.1)
+
+        del calls[:]
+        iterator = parallel_execute(submit, iter([(0.1,)] * 10), max_in_flight=3, ordered=False)
+        next(iterator)
+        iterator.close()
+        self.assertLessEqual(len(calls), 4)
+        executor.shutdown()
+
     def test_parallel_execute(self):
         a = {'times_called': 0}
 
@@ -301,6 +591,22 @@ class TestConcurrent(unittest.TestCase):
         self.assertTrue(9000 <= id_alloc.allocate_int() <= 9009)
         self.assertTrue(9000 <= id_alloc.allocate_int() <= 9009)
 
+    def test_id_allocator_lowest_free(self):
+        id_alloc = IDAllocator(10)
+        self.assertEqual([id_alloc.allocate_int() for _ in range(100)], list(range(10, 110)))
+        id_alloc.mark_as_free(50)
+        id_alloc.mark_as_free(20)
+        self.assertEqual(id_alloc.allocate_int(), 20)
+        self.assertEqual(id_alloc.allocate_range(3), 110)
+        id_alloc.mark_as_allocated(200)
+        self.assertEqual(id_alloc.allocate_range(87), 113)
+        self.assertEqual(id_alloc.allocate_range(1), 50)
+        self.assertEqual(id_alloc.allocate_int(), 201)
+        self.assertRaises(ValueError, lambda: id_alloc.mark_as_free(5000))
+        self.assertRaises(ValueError, lambda: id_alloc.allocate_range(0))
+        id_alloc.mark_as_allocated(10000)
+        self.assertRaises(AlreadyAllocated, lambda: id_alloc.mark_as_allocated(150))
+
     def test_atomic_number_timeout(self):
         """Test comparison while the lock is held all the time"""
         a = AtomicNumber(2)
@@ -328,6 +634,193 @@ class TestConcurrent(unittest.TestCase):
         self.assertEqual(str(an), '1')
         self.assertEqual(repr(an), 'AtomicNumber(1)')
 
+    def test_striped_atomic_number(self):
+        a = StripedAtomicNumber(5)
+
+        def increment():
+            nonlocal a
+            for _ in range(10000):
+                a += 1
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        self.assertEqual(a.wait_until(lambda v: v == 80005, timeout=10), 80005)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(a, 80005)
+        a -= 5
+        self.assertEqual(a.sum_then_reset(), 80000)
+        self.assertEqual(int(a), 0)
+        self.assertRaises(WouldWaitMore, lambda: a.wait_until(lambda v: v > 0, timeout=0.2))
+
+        # cells of short-lived threads are folded even if the value is never read
+        for _ in range(200):
+            thread = threading.Thread(target=a.add, args=(1, ))
+            thread.start()
+            thread.join()
+        self.assertLess(len(a._cells), 20)
+        self.assertEqual(a, 200)
+
+    def test_lock_profiling(self):
+        class Metric:
+            def __init__(self):
+                self.values = []
+
+            def runtime(self, value, **labels):
+                self.values.append((value, labels))
+
+        class Contended(Monitor):
+            @Monitor.synchronized
+            def slow(self):
+                time.sleep(0.1)
+
+            @Monitor.synchronized
+            def fast(self):
+                pass
+
+        waits = Metric()
+        holds = Metric()
+        enable_lock_profiling(waits, holds, sampling_rate=1)
+        try:
+            contended = Contended()
+            threads = [threading.Thread(target=contended.slow) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            contended.fast()
+            condition = Condition()
+            condition.notify()
+            condition.wait(0.01, dont_raise=True)
+            Condition(name='ready').notify()
+            dct = MonitorDict()
+            with dct:
+                dct['a'] = 1
+            with Monitor.acquire(dct, site='dct.update'):
+                dct['b'] = 2
+            with Monitor.acquire(dct):
+                pass
+        finally:
+            disable_lock_profiling()
+
+        top = get_top_contended_locks()
+        self.assertEqual(top[0].site, 'TestConcurrent.test_lock_profiling.<locals>.Contended.slow')
+        self.assertEqual(top[0].samples, 3)
+        self.assertGreater(top[0].total_wait, 0.25)
+        self.assertGreater(top[0].max_wait, 0.15)
+        self.assertGreater(top[0].total_hold, 0.25)
+        sites = {stats.site for stats in top}
+        self.assertIn('Condition.wait', sites)
+        self.assertIn('Condition.notify', sites)
+        self.assertIn('ready.notify', sites)
+        self.assertIn('dct.update', sites)
+        self.assertTrue(sites & {'TestConcurrent.test_lock_profiling', 'test_lock_profiling'})
+        self.assertEqual(len(waits.values), 10)
+        self.assertEqual(len(holds.values), 8)
+        self.assertEqual(len(get_top_contended_locks(1)), 1)
+
+        contended.fast()
+        self.assertEqual(len(waits.values), 10)
+
+        monitor = Monitor()
+
+        @Monitor.synchronize_on(monitor)
+        def foo():
+            pass
+
+        enable_lock_profiling(sampling_rate=0.5)
+        try:
+            for _ in range(2000):
+                foo()
+        finally:
+            disable_lock_profiling()
+        top = get_top_contended_locks()
+        self.assertEqual([stats.site for stats in top],
+                         ['TestConcurrent.test_lock_profiling.<locals>.foo'])
+        self.assertTrue(800 < top[0].samples < 1200)
+
+    def test_rw_monitor(self):
+        class Table(RWMonitor):
+            def __init__(self):
+                super().__init__()
+                self.readers = 0
+                self.max_readers = 0
+                self.value = 0
+
+            @RWMonitor.synchronized_read
+            def read(self):
+                with Monitor.acquire(counter_lock):
+                    self.readers += 1
+                    self.max_readers = max(self.max_readers, self.readers)
+                time.sleep(0.2)
+                with Monitor.acquire(counter_lock):
+                    self.readers -= 1
+                return self.value
+
+            @RWMonitor.synchronized_write
+            def write(self, value):
+                self.assertions.append(self.readers)
+                self.value = value
+
+        counter_lock = Monitor()
+        table = Table()
+        table.assertions = []
+        readers = [threading.Thread(target=table.read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        time.sleep(0.1)
+        writer = threading.Thread(target=table.write, args=(2,))
+        writer.start()
+        # writers are preferred, so this reader has to wait for the writer
+        self.assertEqual(table.read(), 2)
+        writer.join()
+        self.assertEqual(table.max_readers, 4)
+        self.assertEqual(table.assertions, [0])
+
+        with RWMonitor.acquire_read(table), RWMonitor.acquire_read(table):
+            pass
+        with RWMonitor.acquire_write(table):
+            pass
+
+        dct = RWMonitorDict({1: 2})
+        with RWMonitor.acquire_read(dct):
+            self.assertEqual(dct[1], 2)
+
+        ls = RWLockedStructure({1: 2})
+        with ls.reading():
+            self.assertEqual(ls[1], 2)
+        with ls:
+            ls[1] = 3
+        self.assertEqual(ls[1], 3)
+
+    def test_concurrent_dict(self):
+        cd = ConcurrentDict({1: 2}, stripes=4)
+        self.assertEqual(cd.compute_if_absent(1, lambda key: 5), 2)
+        self.assertEqual(cd.compute_if_absent(2, lambda key: key * 2), 4)
+        self.assertEqual(cd.compute_if_present(2, lambda key, value: value + 1), 5)
+        self.assertIsNone(cd.compute_if_present(3, lambda key, value: value + 1))
+        self.assertIsNone(cd.compute_if_present(2, lambda key, value: None))
+        self.assertNotIn(2, cd)
+
+        def increment():
+            for i in range(1000):
+                cd.compute_if_absent(i, lambda key: 0)
+                cd.compute_if_present(i, lambda key, value: value + 1)
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for i in range(1000, 1100):
+            cd[i] = 0
+            for key, value in cd.items():
+                self.assertIn(key, cd)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(cd), 1100)
+        self.assertEqual(cd[1], 6)
+        self.assertEqual(sum(cd.values()), 4 * 1000 + 2)
+
     def test_atomic_number(self):
         a = AtomicNumber(4)
         a -= 1
@@ -453,6 +946,68 @@ class TestConcurrent(unittest.TestCase):
         mtt.start()
         mtt.terminate().join()
 
+    def test_periodic_scheduler(self):
+        class Metric:
+            def __init__(self):
+                self.values = []
+
+            def runtime(self, value, **labels):
+                self.values.append((value, labels))
+
+        run_times = Metric()
+        lags = Metric()
+        scheduler = PeriodicScheduler(2, jitter=0.1, run_time_metric=run_times, lag_metric=lags)
+        runs = []
+        overruns = []
+
+        def slow():
+            time.sleep(0.15)
+
+        fast_job = scheduler.schedule(lambda: runs.append(time.monotonic()), 0.1, name='fast')
+        slow_job = scheduler.schedule(slow, 0.1, on_overrun=overruns.append, name='slow')
+        time.sleep(0.55)
+        fast_job.cancel()
+        slow_job.cancel()
+        slow_job.finished.result(timeout=1)
+        self.assertIn(len(runs), (4, 5, 6))
+        self.assertTrue(overruns)
+        self.assertTrue(all(overrun > 0.1 for overrun in overruns))
+        self.assertIn({'job': 'slow'}, [labels for _, labels in run_times.values])
+        self.assertEqual(len(lags.values), len(run_times.values))
+        runs_after_cancel = len(runs)
+        time.sleep(0.2)
+        self.assertEqual(len(runs), runs_after_cancel)
+
+        class Counter(IntervalTerminableThread):
+            def __init__(self):
+                super().__init__(0.05, scheduler=scheduler)
+                self.prepared = False
+                self.cleaned_up = False
+                self.count = 0
+
+            def prepare(self) -> None:
+                self.prepared = True
+
+            def loop(self) -> None:
+                self.count += 1
+
+            def cleanup(self):
+                self.cleaned_up = True
+
+        threads_before = threading.active_count()
+        counters = [Counter().start() for _ in range(10)]
+        self.assertEqual(threading.active_count(), threads_before)
+        time.sleep(0.3)
+        for counter in counters:
+            self.assertTrue(counter.is_alive())
+            counter.terminate().join()
+            self.assertFalse(counter.is_alive())
+            self.assertTrue(counter.prepared)
+            self.assertTrue(counter.cleaned_up)
+            self.assertGreater(counter.count, 2)
+        scheduler.shutdown()
+        self.assertRaises(RuntimeError, lambda: scheduler.schedule(slow, 1))
+
     def test_interval_terminable_thread(self):
         class MyTerminableThread(IntervalTerminableThread):
             def __init__(self):
@@ -514,6 +1069,43 @@ class TestConcurrent(unittest.TestCase):
         mtt.join(3)
         self.assertFalse(mtt.is_alive())
 
+    def test_callable_group_parallel(self):
+        executor = ThreadPoolExecutor(4)
+        cg = CallableGroup(executor=executor, timeout=0.5)
+        cg.add(lambda x: time.sleep(0.2) or x)
+        cg.add(lambda x: time.sleep(0.2) or x * 2)
+        cg.add(lambda x: x * 3, one_shot=True)
+        started = time.monotonic()
+        self.assertEqual(cg(2), [2, 4, 6])
+        self.assertLess(time.monotonic() - started, 0.35)
+        self.assertEqual(cg(2), [2, 4])
+
+        cg.add(lambda x: time.sleep(1))
+        cg.add(lambda x: 1 / 0)
+        self.assertRaises(WouldWaitMore, lambda: cg(2))
+
+        cg = CallableGroup(executor=executor, swallow_exceptions=True)
+        cg.add(lambda: 1 / 0)
+        cg.add(lambda: 5)
+        results = cg()
+        self.assertIsInstance(results[0], ZeroDivisionError)
+        self.assertEqual(results[1], 5)
+        executor.shutdown()
+
+    def test_callable_group_removes_cancelled(self):
+        cg = CallableGroup()
+        callbacks = [CancellableCallback(lambda: 1) for _ in range(3)]
+        for callback in callbacks:
+            cg.add(callback)
+        callbacks[0].cancel()
+        self.assertTrue(cg.has_cancelled_callbacks)
+        self.assertEqual(cg(), [1, 1])
+        self.assertEqual(len(cg.callables), 2)
+        callbacks[1].cancel()
+        cg.remove_cancelled()
+        self.assertFalse(cg.has_cancelled_callbacks)
+        self.assertEqual(len(cg.callables), 1)
+
     def test_callable_group_some_raise(self):
         cg = CallableGroup(gather=True)
         cg.add(lambda: dupa)
@@ -3,6 +3,7 @@ import queue
 import unittest
 from socket import socket
 
+import threading
 import time
 from satella.coding import wraps, chain_functions, postcondition, \
     log_exceptions, queue_get, precondition, short_none
@@ -35,6 +36,84 @@ class TestDecorators(unittest.TestCase):
         self.assertEqual(returns(6), 6)
         self.assertEqual(a['calls'], 2)
 
+    def test_memoize_bounded(self):
+        calls = []
+        now = 0
+
+        @memoize(maxsize=2, ttl=10, policy='lfu', time_getter=lambda: now)
+        def returns(b, c=0):
+            calls.append((b, c))
+            return b + c
+
+        self.assertEqual(returns(1), 1)
+        self.assertEqual(returns(1), 1)
+        self.assertEqual(returns(1, c=2), 3)
+        self.assertEqual(returns(2), 2)     # evicts (1, c=2), used least frequently
+        self.assertEqual(returns(1), 1)
+        self.assertEqual(returns(1, c=2), 3)
+        self.assertEqual(calls, [(1, 0), (1, 2), (2, 0), (1, 2)])
+        self.assertEqual(returns.cache_info(), (2, 4, 2, 2))
+        now = 11
+        self.assertEqual(returns(1), 1)
+        self.assertEqual(calls[-1], (1, 0))
+        returns.cache_clear()
+        self.assertEqual(returns.cache_info().currsize, 0)
+
+        @memoize(maxsize=2)
+        def identity(b):
+            calls.append(b)
+            return b
+
+        del calls[:]
+        identity(1)
+        identity(2)
+        identity(1)
+        identity(3)     # evicts 2, used least recently
+        identity(1)
+        identity(2)
+        self.assertEqual(calls, [1, 2, 3, 2])
+
+    def test_memoize_single_flight(self):
+        calls = []
+
+        @memoize
+        def slow(b):
+            calls.append(b)
+            time.sleep(0.5)
+            if b < 0:
+                raise ValueError()
+            return b
+
+        threads = [threading.Thread(target=slow, args=(5, )) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, [5])
+        self.assertEqual(slow.cache_info().hits, 3)
+        self.assertRaises(ValueError, lambda: slow(-1))
+        self.assertRaises(ValueError, lambda: slow(-1))
+        self.assertEqual(calls, [5, -1, -1])
+
+    def test_memoize_recursive(self):
+        @memoize
+        def factorial(n):
+            return 1 if n <= 1 else n * factorial(n - 1)
+
+        self.assertEqual(factorial(10), 3628800)
+
+        @memoize
+        def same_key(depth):
+            nonlocal remaining
+            if remaining:
+                remaining -= 1
+                return same_key(depth) + 1
+            return 0
+
+        remaining = 2
+        self.assertEqual(same_key(0), 2)
+        self.assertEqual(same_key(0), 2)
+
     def test_transform_arguments(self):
         @transform_arguments(a='a*a')
         def square(a):
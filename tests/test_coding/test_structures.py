@@ -2,11 +2,17 @@ import abc
 import collections
 import copy
 import math
+import queue
 import time
 import unittest
 
 import mock
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from satella.coding.concurrent import call_in_separate_thread
 from satella.coding.structures import TimeBasedHeap, Heap, typednamedtuple, \
     OmniHashableMixin, DictObject, apply_dict_object, Immutable, frozendict, SetHeap, \
@@ -14,7 +20,7 @@ from satella.coding.structures import TimeBasedHeap, Heap, typednamedtuple, \
     DirtyDict, KeyAwareDefaultDict, Proxy, ReprableMixin, TimeBasedSetHeap, ExpiringEntryDict, SelfCleaningDefaultDict, \
     CacheDict, StrEqHashableMixin, ComparableIntEnum, HashableIntEnum, ComparableAndHashableBy, \
     ComparableAndHashableByInt, SparseMatrix, ExclusiveWritebackCache, Subqueue, \
-    CountingDict, ComparableEnum, LRU, LRUCacheDict, Vector, DefaultDict
+    CountingDict, ComparableEnum, LRU, LRUCacheDict, Vector, DefaultDict, CompactSparseMatrix
 
 
 class TestMisc(unittest.TestCase):
@@ -80,6 +86,8 @@ class TestMisc(unittest.TestCase):
         a = Subqueue()
         a.put('test', 2)
         self.assertEqual(a.get('test'), 2)
+        with a.subqueue_lock:
+            self.assertEqual(len(a.subqueues['test']), 0)
 
         @call_in_separate_thread()
         def put_a_message():
@@ -93,6 +101,28 @@ class TestMisc(unittest.TestCase):
         self.assertEqual(a.qsize(), 1)
         self.assertEqual(a.get_any(), ('test2', 4))
 
+    def test_subqueue_fair(self):
+        a = Subqueue(weights={'heavy': 2})
+        self.assertRaises(queue.Empty, a.get_any)
+        self.assertRaises(queue.Empty, lambda: a.get_any(True, 0.1))
+        self.assertRaises(ValueError, lambda: a.set_weight('light', 0))
+        for i in range(4):
+            a.put('heavy', i)
+            a.put('light', i)
+        self.assertEqual([a.get_any() for _ in range(3)],
+                         [('heavy', 0), ('heavy', 1), ('light', 0)])
+        self.assertEqual(a.get_any_batch(10), [('heavy', 2), ('heavy', 3), ('light', 1),
+                                               ('light', 2), ('light', 3)])
+        self.assertEqual(a.qsize(), 0)
+
+        @call_in_separate_thread()
+        def put_a_message():
+            time.sleep(0.5)
+            a.put('light', 5)
+
+        put_a_message()
+        self.assertEqual(a.get_any_batch(10, True, 5), [('light', 5)])
+
     def test_exclusive_writeback_cache(self):
         a = {5: 3, 4: 2, 1: 0}
         b = {'no_calls': 0}
@@ -169,6 +199,38 @@ class TestMisc(unittest.TestCase):
         self.assertEqual(sm2.max(), 4)
         self.assertRaises(IndexError, lambda: sm2[3, 3])
 
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_sparse_matrix_numpy(self):
+        sm = SparseMatrix([[1, None, 2], [None, 3, None]])
+        self.assertEqual(sm.sum(), 6)
+        self.assertTrue(numpy.array_equal(sm.to_numpy(), [[1, 0, 2], [0, 3, 0]]))
+        cols, rows, values = sm.to_coo()
+        self.assertEqual(cols.tolist(), [0, 2, 1])
+        self.assertEqual(rows.tolist(), [0, 0, 1])
+        self.assertEqual(values.tolist(), [1, 2, 3])
+        sm2 = SparseMatrix.from_numpy(numpy.array([[1, 0, 2], [0, 3, 0]]), skip_value=0)
+        self.assertEqual(sm, sm2)
+        sm2.apply(lambda x: x * 2)
+        self.assertEqual(list(sm2), [[2, None, 4], [None, 6, None]])
+
+        csm = sm.to_compact()
+        self.assertEqual(csm[2, 0], 2)
+        self.assertIsNone(csm[1, 0])
+        self.assertEqual(csm[-1, -1], None)
+        self.assertRaises(IndexError, lambda: csm[3, 0])
+        self.assertEqual(list(csm), list(sm))
+        self.assertEqual((csm.min(), csm.max(), csm.sum()), (1, 3, 6))
+        csm.apply(lambda values: values + 1)
+        self.assertEqual(csm.to_sparse_matrix(), SparseMatrix([[2, None, 3], [None, 4, None]]))
+        self.assertEqual(csm, CompactSparseMatrix.from_numpy(
+            numpy.array([[2, numpy.nan, 3], [numpy.nan, 4, numpy.nan]])))
+        self.assertNotEqual(csm, 5)
+        try:
+            import scipy
+        except ImportError:
+            return
+        self.assertEqual(csm.to_scipy('csr').toarray().tolist(), [[2, 0, 3], [0, 4, 0]])
+
     def test_comparable_and_hashable_by_int(self):
         class MyClass(ComparableAndHashableByInt):
             def __init__(self, a: int):
@@ -497,6 +559,38 @@ class TestMisc(unittest.TestCase):
         self.assertEqual(sl.pop(), 5)
         self.assertEqual(sl.popleft(), 2)
 
+    def test_sorted_list_chunked(self):
+        sl = SortedList(range(0, 100, 2), load=4)
+        self.assertEqual(len(sl), 50)
+        self.assertEqual(sl.add(7), 4)
+        self.assertEqual(sl.index(8), 5)
+        self.assertIn(7, sl)
+        self.assertNotIn(9, sl)
+        self.assertEqual(list(sl.irange(5, 10)), [6, 7, 8, 10])
+        self.assertEqual(list(sl[2:6]), [4, 6, 7, 8])
+        sl.extend([1, 3, 5, 99])
+        self.assertEqual(list(sl.irange(None, 8)), [0, 1, 2, 3, 4, 5, 6, 7, 8])
+        self.assertEqual(sl[-1], 99)
+        self.assertEqual(sl.bisect_key_left(7), 7)
+        self.assertEqual(sl.bisect_key_right(7), 8)
+        for i in range(0, 100, 2):
+            sl.remove(i)
+        self.assertEqual(list(sl), [1, 3, 5, 7, 99])
+        self.assertRaises(ValueError, lambda: sl.remove(2))
+
+    def test_sorted_list_extend_order(self):
+        Entry = collections.namedtuple('Entry', ('key', 'no'))
+        for present in (0, 20, 100):
+            added = SortedList([Entry(1, i) for i in range(present)], lambda e: e.key, load=4)
+            extended = SortedList(added, lambda e: e.key, load=4)
+            new = [Entry(1, i) for i in range(100, 110)] + [Entry(0, 110)]
+            for entry in new:
+                added.add(entry)
+            extended.extend(new)
+            self.assertEqual(list(extended), list(added))
+            self.assertEqual(extended.items, list(added))
+            self.assertEqual(extended.keys, [0] + [1] * (present + 10))
+
     def test_two_way_dict2(self):
         self.assertRaises(ValueError, lambda: TwoWayDictionary([(1, 2), (2, 2)]))
 
@@ -521,6 +615,46 @@ class TestMisc(unittest.TestCase):
         ranking.add(e25)
         self.assertEqual(list(ranking.get_sorted()), [e2, e25, e3])
 
+    def test_ranking_ties(self):
+        Entry = collections.namedtuple('Entry', ('a',))
+        entries = [Entry(1) for _ in range(20000)]
+        ranking = Ranking(entries, lambda e: e.a)  # type: Ranking[Entry]
+        self.assertEqual(ranking.get_position_of(entries[0]), 0)
+        self.assertEqual(ranking.get_position_of(entries[12345]), 12345)
+        newest = Entry(1)
+        ranking.add(newest)
+        self.assertEqual(ranking.get_position_of(newest), 0)
+        self.assertEqual(ranking.get_position_of(entries[-1]), 20000)
+
+        self.assertRaises(ValueError, lambda: ranking.remove(Entry(1)))
+        self.assertEqual(len(ranking), 20001)
+        ranking.remove(entries[5])
+        self.assertNotIn(entries[5], ranking)
+        self.assertIn(entries[6], ranking)
+        self.assertEqual(ranking.get_position_of(entries[6]), 6)
+
+    def test_ranking_update(self):
+        class Entry:
+            def __init__(self, a):
+                self.a = a
+
+        entries = [Entry(i) for i in range(10)]
+        ranking = Ranking(entries, lambda e: e.a)  # type: Ranking[Entry]
+        self.assertEqual(ranking.get_position_of(entries[3]), 3)
+        entries[3].a = 20
+        ranking.update(entries[3])
+        self.assertEqual(ranking.get_position_of(entries[3]), 9)
+        self.assertEqual(ranking.get_position_of(entries[4]), 3)
+        entries[0].a = 30
+        entries[9].a = -1
+        ranking.update_many([entries[0], entries[9]])
+        self.assertEqual(ranking[0], entries[9])
+        self.assertEqual(ranking[-1], entries[0])
+        ranking.remove(entries[0])
+        self.assertNotIn(entries[0], ranking)
+        self.assertEqual(len(ranking), 9)
+        self.assertRaises(ValueError, lambda: ranking.get_position_of(entries[0]))
+
     def test_two_way_dict(self):
         twd = TwoWayDictionary({1: 2, 3: 4})
         self.assertEqual(twd.reverse[4], 3)
@@ -1,11 +1,17 @@
 import bisect
+import os
+import tempfile
+import threading
+import time
 import typing as tp
 import unittest
 
 from satella.coding.predicates import x
 from satella.coding.sequences import index_of
-from satella.coding.structures import DBStorage, SyncableDroppable
+from satella.coding.structures import DBStorage, SyncableDroppable, AppendOnlyLogStorage, \
+    SyncableDroppableWorker
 from satella.coding.typing import K, KVTuple, V
+from satella.instrumentation.metrics import getMetric
 
 
 class Iterator:
@@ -57,7 +63,85 @@ class MyDBStorage(DBStorage):
         self.data.append((key, value))
 
 
+class MyBulkDBStorage(MyDBStorage):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def put(self, key: K, value: V) -> None:
+        raise AssertionError('put_many should have been used')
+
+    def delete(self, key: K) -> None:
+        raise AssertionError('delete_range should have been used')
+
+    def put_many(self, items: tp.Sequence[KVTuple]) -> None:
+        self.calls.append(('put_many', len(items)))
+        self.data.extend(items)
+
+    def delete_range(self, start: K, stop: K) -> None:
+        self.calls.append(('delete_range', start, stop))
+        self.data = [kv for kv in self.data if not (start <= kv[0] < stop)]
+
+
 class TestSyncableDroppable(unittest.TestCase):
+    def test_sync_request_paging(self):
+        db = MyDBStorage()
+        sd = SyncableDroppable(db, None, None, None, 100, 200)
+        for i in range(300):
+            sd.on_new_data(i, i)
+        sd.cleanup_keep_in_memory()
+        self.assertEqual(len(db.data), 200)
+        page = list(sd.on_sync_request(150))
+        self.assertEqual(page, [(i, i) for i in range(150)])
+        page = list(sd.on_sync_request(100, after=page[-1][0]))
+        self.assertEqual(page, [(i, i) for i in range(150, 250)])
+        page = list(sd.on_sync_request(after=page[-1][0]))
+        self.assertEqual(page, [(i, i) for i in range(250, 300)])
+        self.assertRaises(ValueError, lambda: sd.on_sync_request(after=299))
+        self.assertFalse(db.iterators)
+        sd.on_synced_up_to(210)
+        self.assertEqual(next(sd.on_sync_request()), (211, 211))
+
+    def test_worker(self):
+        db = MyBulkDBStorage()
+        sd = SyncableDroppable(db, None, None, None, 100, 200)
+        flush_latency = getMetric('syncable_droppable.flush_latency', 'summary')
+        backlog = getMetric('syncable_droppable.backlog', 'callable')
+        worker = SyncableDroppableWorker(sd, 0.1, flush_latency=flush_latency,
+                                         backlog=backlog).start()
+        for i in range(500):
+            sd.on_new_data(i, i)
+        time.sleep(0.5)
+        self.assertEqual(sd.first_key_in_memory, 400)
+        self.assertEqual(backlog.callable(), 100)
+        self.assertEqual(db.data[0], (299, 299))
+        self.assertGreater(flush_latency.tot_calls, 0)
+        worker.terminate().join()
+        self.assertFalse(worker.is_alive())
+
+        worker = SyncableDroppableWorker(sd, 10, sync_everything=True).start()
+        sd.on_new_data(500, 500)
+        worker.terminate().join()
+        self.assertEqual(db.data[-1], (500, 500))
+        self.assertFalse(sd.data_in_memory)
+
+    def test_bulk_operations(self):
+        db = MyBulkDBStorage()
+        sd = SyncableDroppable(db, None, None, None, 100, 200)
+        for i in range(1000):
+            sd.on_new_data(i, i)
+        sd.cleanup_keep_in_memory()
+        self.assertEqual(db.calls, [('put_many', 900)])
+        self.assertEqual(sd.first_key_in_memory, 900)
+        self.assertEqual(list(sd.get_archive(950, 952)), [(950, 950), (951, 951), (952, 952)])
+        sd.cleanup_keep_in_db()
+        self.assertEqual(db.calls[1], ('delete_range', 0, 799))
+        self.assertEqual(sd.start_entry, 799)
+        self.assertEqual(db.data[0], (799, 799))
+        sd.sync_to_db()
+        self.assertEqual(db.calls[2], ('put_many', 100))
+        self.assertEqual(len(db.data), 201)
+
     def test_sync_drop(self):
         db = MyDBStorage()
         sd = SyncableDroppable(db, None, None, None, 100, 200)
@@ -97,3 +181,101 @@ class TestSyncableDroppable(unittest.TestCase):
         self.assertEqual(db.data, [(400, 5), (405, 5), (409, 5)])
         self.assertFalse(db.iterators)
         self.assertEqual(sd.get_latest_value(), (510, 5))
+
+    def test_cleanup_during_write_out(self):
+        class SlowDBStorage(MyBulkDBStorage):
+            def put_many(self, items: tp.Sequence[KVTuple]) -> None:
+                writing.set()
+                proceed.wait()
+                super().put_many(items)
+
+        writing = threading.Event()
+        proceed = threading.Event()
+        db = SlowDBStorage()
+        sd = SyncableDroppable(db, None, None, None, 100, 200)
+        for i in range(0, 500, 5):
+            sd.on_new_data(i, i)
+        writer = threading.Thread(target=sd.sync_to_db)
+        writer.start()
+        writing.wait()
+        cleaner = threading.Thread(target=sd.cleanup_keep_in_db)
+        cleaner.start()
+        cleaner.join(0.5)
+        waited = cleaner.is_alive()
+        proceed.set()
+        writer.join()
+        cleaner.join()
+        self.assertTrue(waited)
+        self.assertFalse(sd.data_in_memory)
+        self.assertTrue(all(key >= sd.start_entry for key, _ in db.data))
+
+    def test_read_during_write_out(self):
+        class HookedDBStorage(MyBulkDBStorage):
+            hook = None
+
+            def iterate(self, starting_key: tp.Optional[K]) -> tp.Iterator[KVTuple]:
+                iterator = super().iterate(starting_key)
+                try:
+                    yield from iterator
+                finally:
+                    iterator.close()
+                if self.hook is not None:
+                    hook, self.hook = self.hook, None
+                    hook()
+
+        db = HookedDBStorage()
+        sd = SyncableDroppable(db, None, None, None, 100, 200)
+        for i in range(0, 50, 5):
+            sd.on_new_data(i, i)
+        # entries are moved onto the DB right after it was read
+        db.hook = sd.sync_to_db
+        self.assertEqual(list(sd.on_sync_request()), [(i, i) for i in range(0, 50, 5)])
+
+        for i in range(50, 100, 5):
+            sd.on_new_data(i, i)
+        db.hook = sd.sync_to_db
+        self.assertEqual(list(sd.get_archive(0, 95)), [(i, i) for i in range(0, 100, 5)])
+        self.assertFalse(sd.data_in_memory)
+        self.assertFalse(db.iterators)
+
+    def test_append_only_log_storage_timed_fsync(self):
+        with tempfile.TemporaryDirectory() as path:
+            db = AppendOnlyLogStorage(path, fsync_interval=0.2)
+            db.put(1, '1')
+            db.put(2, '2')
+            db.on_change_stop_entry(2)
+            time.sleep(1)
+            self.assertFalse(db._needs_fsync)
+            self.assertEqual(AppendOnlyLogStorage(path).stop_entry, 2)
+            db.close()
+
+    def test_append_only_log_storage(self):
+        with tempfile.TemporaryDirectory() as path:
+            db = AppendOnlyLogStorage(path, segment_size=100, index_every=3)
+            sd = SyncableDroppable(db, None, None, None, 100, 200)
+            for i in range(0, 500, 5):
+                sd.on_new_data(i, str(i))
+            sd.cleanup_keep_in_memory()
+            self.assertGreater(len(os.listdir(path)), 2)
+            self.assertEqual(list(db.iterate(None))[0], (0, '0'))
+            self.assertEqual(list(db.iterate(101))[:2], [(105, '105'), (110, '110')])
+            self.assertEqual(list(sd.get_archive(390, 410)),
+                             [(390, '390'), (395, '395'), (400, '400'), (405, '405'),
+                              (410, '410')])
+            self.assertRaises(ValueError, lambda: db.put(5, '5'))
+            segments = len(os.listdir(path))
+            sd.cleanup_keep_in_db()
+            self.assertEqual(sd.start_entry, 295)
+            self.assertEqual(next(db.iterate(None)), (295, '295'))
+            self.assertLess(len(os.listdir(path)), segments)
+            db.close()
+
+            with open(os.path.join(path, sorted(os.listdir(path))[-2]), 'ab') as f_out:
+                f_out.write(b'\x00\x00\x01')      # a torn write
+            db = AppendOnlyLogStorage(path)
+            self.assertEqual(db.start_entry, 295)
+            self.assertEqual(db.stop_entry, 495)
+            self.assertEqual(list(db.iterate(None)), [(i, str(i)) for i in range(295, 400, 5)])
+            db.put(500, '500')
+            self.assertEqual(list(db.iterate(499)), [(500, '500')])
+            db.close()
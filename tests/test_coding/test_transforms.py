@@ -4,7 +4,7 @@ import base64
 
 from satella.coding.transforms import stringify, split_shuffle_and_join, one_tuple, \
     merge_series, pad_to_multiple_of_length, clip, b64encode, linear_interpolate, \
-    hashables_to_int, none_if_false
+    hashables_to_int, none_if_false, resample_series
 
 
 class TestTransforms(unittest.TestCase):
@@ -109,6 +109,24 @@ class TestTransforms(unittest.TestCase):
         s3 = list(merge_series(s1, s2))
         self.assertEqual(s3, [(15, 'A', 'C'), (17, 'A', 'D'), (20, 'B', 'D'), (21, 'B', 'E')])
 
+    def test_merge_series_duplicate_timestamps(self):
+        s1 = [(10, 'A'), (20, 'B'), (20, 'C'), (30, 'D')]
+        s2 = [(5, 'E'), (25, 'F')]
+        self.assertEqual(list(merge_series(s1, s2)), [(10, 'A', 'E'), (20, 'C', 'E'),
+                                                      (25, 'C', 'F'), (30, 'D', 'F')])
+
+    def test_resample_series(self):
+        s1 = [(0, 0), (10, 10), (20, 0)]
+        s2 = [(5, 100), (15, 200)]
+        self.assertEqual(list(resample_series(s1, s2, interval=5)),
+                         [(5, 0, 100), (10, 10, 100), (15, 10, 200), (20, 0, 200)])
+        self.assertEqual(list(resample_series(s1, s2, interval=5, interpolate=True)),
+                         [(5, 5, 100), (10, 10, 150), (15, 5, 200), (20, 0, 200)])
+        self.assertEqual(list(resample_series(s1, s2, interval=4, start=8, stop=12)),
+                         [(8, 0, 100), (12, 10, 100)])
+        self.assertEqual(list(resample_series(s1, [], interval=5)), [])
+        self.assertRaises(ValueError, lambda: list(resample_series(s1, interval=0)))
+
     def test_one_tuple(self):
         self.assertEqual(list(one_tuple([1, 2, 3])), [(1, ), (2, ), (3, )])
 
@@ -140,3 +140,28 @@ class TestThreadPoolExecutor(unittest.TestCase):
         fr.result()
         self.assertIn(choose('.count', executing_summary.to_metric_data()).value, {2, 3})
         self.assertEqual(choose('.count', waiting_summary.to_metric_data()).value, 3)
+
+    def test_metrified_thread_pool_executor_autoscaling(self):
+        utilization = getMetric('mtpe.utilization', 'callable')
+        mtpe = MetrifiedThreadPoolExecutor(max_workers=4, min_workers=1,
+                                           target_waiting_time=0.1, idle_timeout=0.5,
+                                           utilization=utilization)
+
+        def sleep():
+            time.sleep(0.2)
+
+        mtpe.submit(sleep).result()
+        self.assertEqual(mtpe.get_worker_count(), 1)
+        futures = []
+        for _ in range(8):
+            futures.append(mtpe.submit(sleep))
+            time.sleep(0.01)
+        time.sleep(0.1)
+        self.assertGreater(mtpe.get_worker_count(), 1)
+        self.assertGreater(n_th(utilization.to_metric_data().values).value, 0.5)
+        for future in futures:
+            future.result()
+        time.sleep(1.5)
+        self.assertEqual(mtpe.get_worker_count(), 1)
+        self.assertEqual(n_th(utilization.to_metric_data().values).value, 0)
+        mtpe.shutdown()